@@ -0,0 +1,119 @@
+"""
+Compares the expected evaluation cost of the action rule conditions of the
+preconfigured slipo_get_osm_* FAGI profiles as rendered originally and after
+ordering them cheapest first (gkgaas.fagi.optimizer.order_conditions()).
+
+FAGI evaluates And/Or operands in document order and stops as soon as the
+result is known. The expected cost of a condition per linked entity pair is
+computed from the relative function costs of gkgaas.fagi.optimizer, assuming
+every evaluation function is true with the given probability, independently
+of the others. The time of rendering the rules file with and without ordering
+is reported as well; the ordered rules are cached after the first repeat, as
+in the service.
+
+The function costs are estimates, not measurements of FAGI, so the reported
+cost reduction is that of the cost model only. It does not show that FAGI
+actually fuses faster; that requires timing FAGI runs on real datasets.
+
+Usage (from the repository root):
+
+    python -m benchmarks.fagi_conditions --true-probability 0.5
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from typing import Tuple
+
+import gkgaas.fagi.preconfigs.profiles as fagiprofiles
+from gkgaas.fagi.condition import FAGIRuleConditionExpression, \
+    SimpleFAGIRuleConditionExpression, And, Or, Not
+from gkgaas.fagi.optimizer import get_cost, order_conditions
+from gkgaas.fagi.rule import FAGIRulesSpec
+
+
+def _get_expected_cost(
+        expression: FAGIRuleConditionExpression,
+        true_probability: float) -> Tuple[float, float]:
+    """
+    Returns the expected evaluation cost of an expression and the probability
+    of it being true
+    """
+    if isinstance(expression, SimpleFAGIRuleConditionExpression):
+        return get_cost(expression), true_probability
+
+    if isinstance(expression, Not):
+        cost, probability = \
+            _get_expected_cost(expression.expression, true_probability)
+
+        return cost, 1 - probability
+
+    first_cost, first_probability = _get_expected_cost(
+        expression.first_expression, true_probability)
+    second_cost, second_probability = _get_expected_cost(
+        expression.second_expression, true_probability)
+
+    if isinstance(expression, And):
+        return \
+            first_cost + first_probability * second_cost, \
+            first_probability * second_probability
+
+    assert isinstance(expression, Or)
+
+    return \
+        first_cost + (1 - first_probability) * second_cost, \
+        1 - (1 - first_probability) * (1 - second_probability)
+
+
+def _get_rules_cost(rules: FAGIRulesSpec, true_probability: float) -> float:
+    return sum([
+        _get_expected_cost(
+            action_rule.condition.expression, true_probability)[0]
+        for rule in rules.rules
+        for action_rule in rule.action_rule_set])
+
+
+def _measure_rendering(rules: FAGIRulesSpec, order: bool, repeat: int) \
+        -> float:
+    tmp_dir = tempfile.mkdtemp()
+    file_path = os.path.join(tmp_dir, 'rules.xml')
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        (order_conditions(rules) if order else rules).to_file(file_path)
+
+    duration = time.perf_counter() - start
+    shutil.rmtree(tmp_dir)
+
+    return duration / repeat
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--true-probability', type=float, default=0.5)
+    arg_parser.add_argument('--repeat', type=int, default=100)
+    args = arg_parser.parse_args()
+
+    print(f'Expected cost per linked pair, functions true with probability '
+          f'{args.true_probability}')
+
+    for name in sorted(dir(fagiprofiles)):
+        if not name.startswith('slipo_get_osm_'):
+            continue
+
+        rules = getattr(fagiprofiles, name).rules
+        cost = _get_rules_cost(rules, args.true_probability)
+        ordered_cost = _get_rules_cost(
+            order_conditions(rules), args.true_probability)
+        render_time = _measure_rendering(rules, False, args.repeat)
+        ordered_render_time = _measure_rendering(rules, True, args.repeat)
+
+        print(f'{name:>24}: cost {cost:8.1f} -> {ordered_cost:8.1f} '
+              f'({1 - ordered_cost / cost:6.1%} less), rendering '
+              f'{render_time * 1000:6.2f} ms -> '
+              f'{ordered_render_time * 1000:6.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Compares the streaming LIMES links converter with the former rdflib based
+implementation of LIMESRunner._create_links_kg w.r.t. run time and peak
+(Python heap) memory.
+
+Usage (from the repository root):
+
+    python -m benchmarks.links_writer --num-links 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from rdflib import Graph, OWL, URIRef
+
+from gkgaas.limes.links import convert_limes_links
+
+
+def _write_limes_links(file_path: str, num_links: int):
+    rnd = random.Random(42)
+
+    with open(file_path, 'w') as out_file:
+        for i in range(num_links):
+            out_file.write(
+                f'<http://slipo.eu/id/poi/{i}>\t'
+                f'<https://sws.geonames.org/{rnd.randint(0, 10 ** 7)}/>\t'
+                f'{rnd.uniform(0.5, 1)}\n')
+
+
+def _rdflib_create_links_kg(links_file_path: str, links_kg_file_path: str):
+    g = Graph()
+
+    with open(links_file_path, 'r') as links_file:
+        for line in links_file:
+            if line.strip() == '':
+                continue
+            left_iri_str, right_iri_str, confidence_score_str = line.split()
+
+            g.add((
+                URIRef(left_iri_str[1:-1]),
+                OWL.sameAs,
+                URIRef(right_iri_str[1:-1])))
+
+    with open(links_kg_file_path, 'wb') as out_file:
+        g.serialize(out_file, format='ntriples')
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    fn(*args)
+
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return duration, peak
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--num-links', type=int, default=100000)
+    args = arg_parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    limes_links_file_path = os.path.join(tmp_dir, 'accepted.csv')
+    _write_limes_links(limes_links_file_path, args.num_links)
+
+    print(f'{args.num_links} links')
+
+    for name, fn in [
+            ('rdflib', _rdflib_create_links_kg),
+            ('streaming', convert_limes_links)]:
+        duration, peak = _measure(
+            fn, limes_links_file_path, os.path.join(tmp_dir, f'{name}.nt'))
+
+        print(f'{name:>10}: {duration:8.2f} s, '
+              f'peak memory {peak / 1024 ** 2:8.1f} MiB')
+
+    shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Compares the in-process NativeLinker with LIMES on synthetic POI data w.r.t.
+run time and found links, using the 'slipo equi match by name and distance'
+profile.
+
+The target dataset holds random POIs, the source dataset holds slightly moved
+and misspelled copies of some of them plus unrelated POIs. Precision and
+recall are computed w.r.t. the copied POIs (accepted and review links
+together).
+
+Usage (from the repository root):
+
+    python -m benchmarks.native_linker --num-target-pois 100000 \\
+        --limes-executable-path /path/to/run_limes.sh
+
+Without --limes-executable-path only the NativeLinker is run.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.native import NativeLinker
+from gkgaas.limes.preconfigs.profiles import \
+    slipo_equi_match_by_name_and_distance, \
+    slipo_equi_match_by_name_and_distance_native
+from gkgaas.limes.runner import LIMESRunner
+
+_poi_template = \
+    '<{iri}> <http://slipo.eu/def#name> <{iri}/name> .\n' \
+    '<{iri}/name> <http://slipo.eu/def#nameValue> "{name}"@en .\n' \
+    '<{iri}> <http://www.opengis.net/ont/geosparql#hasGeometry> <{iri}/geom> .\n' \
+    '<{iri}/geom> <http://www.opengis.net/ont/geosparql#asWKT> ' \
+    '"POINT ({lon} {lat})"^^<http://www.opengis.net/ont/geosparql#wktLiteral> .\n'
+
+_syllables = [
+    'ka', 'lo', 'mi', 'ne', 'ta', 'ri', 'so', 'pa', 'de', 'vu', 'xe', 'zo']
+
+
+def _random_name(rnd: random.Random) -> str:
+    return ' '.join([
+        ''.join(rnd.choices(_syllables, k=rnd.randint(2, 4)))
+        for _ in range(rnd.randint(1, 3))])
+
+
+def _misspell(rnd: random.Random, name: str) -> str:
+    if len(name) < 8 or rnd.random() < 0.5:
+        return name
+
+    i = rnd.randrange(len(name))
+
+    return name[:i] + name[i + 1:]
+
+
+def _write_datasets(
+        source_file_path: str,
+        target_file_path: str,
+        num_target_pois: int,
+        num_source_pois: int,
+        matching_ratio: float):
+    """
+    Writes the synthetic datasets (POIs spread over a 2x2 degree box) and
+    returns the set of true links
+    """
+    rnd = random.Random(42)
+    targets = []
+
+    with open(target_file_path, 'w') as out_file:
+        for i in range(num_target_pois):
+            iri = f'http://ex.org/target/{i}'
+            name = _random_name(rnd)
+            lat, lon = rnd.uniform(37, 39), rnd.uniform(22, 24)
+
+            targets.append((iri, name, lat, lon))
+            out_file.write(
+                _poi_template.format(iri=iri, name=name, lat=lat, lon=lon))
+
+    true_links = set()
+
+    with open(source_file_path, 'w') as out_file:
+        for i in range(num_source_pois):
+            iri = f'http://ex.com/source/{i}'
+
+            if rnd.random() < matching_ratio:
+                target_iri, name, lat, lon = rnd.choice(targets)
+                # moved by up to ~20m
+                lat += rnd.uniform(-0.0002, 0.0002)
+                lon += rnd.uniform(-0.0002, 0.0002)
+                name = _misspell(rnd, name)
+                true_links.add((iri, target_iri))
+            else:
+                name = _random_name(rnd)
+                lat, lon = rnd.uniform(37, 39), rnd.uniform(22, 24)
+
+            out_file.write(
+                _poi_template.format(iri=iri, name=name, lat=lat, lon=lon))
+
+    return true_links
+
+
+def _read_links(*file_paths):
+    links = set()
+
+    for file_path in file_paths:
+        with open(file_path) as in_file:
+            for line in in_file:
+                source_iri, target_iri = line.strip().split(',')[:2]
+                links.add((source_iri, target_iri))
+
+    return links
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--num-target-pois', type=int, default=100000)
+    arg_parser.add_argument('--num-source-pois', type=int, default=10000)
+    arg_parser.add_argument('--matching-ratio', type=float, default=0.5)
+    arg_parser.add_argument('--limes-executable-path')
+    args = arg_parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    source_file_path = os.path.join(tmp_dir, 'source.nt')
+    target_file_path = os.path.join(tmp_dir, 'target.nt')
+
+    true_links = _write_datasets(
+        source_file_path,
+        target_file_path,
+        args.num_target_pois,
+        args.num_source_pois,
+        args.matching_ratio)
+
+    print(f'{args.num_source_pois} source POIs, {args.num_target_pois} '
+          f'target POIs, {len(true_links)} true links')
+
+    linkers = [(
+        'native',
+        NativeLinker,
+        {},
+        slipo_equi_match_by_name_and_distance_native)]
+
+    if args.limes_executable_path is not None:
+        linkers.append((
+            'LIMES',
+            LIMESRunner,
+            {'limes_executable_path': args.limes_executable_path},
+            slipo_equi_match_by_name_and_distance))
+
+    found_links = {}
+
+    for name, linker_cls, linker_kwargs, profile in linkers:
+        links_file_path = os.path.join(tmp_dir, f'{name}_links.csv')
+        review_file_path = os.path.join(tmp_dir, f'{name}_review_links.csv')
+
+        linker = linker_cls(
+            profile=profile,
+            source_input_file_path=source_file_path,
+            target_input_file_path=target_file_path,
+            result_links_kg_file_path=links_file_path,
+            output_dir=tmp_dir,
+            result_review_links_kg_file_path=review_file_path,
+            links_format=LinksFormat.CSV,
+            **linker_kwargs)
+
+        start = time.perf_counter()
+        linker.run()
+        duration = time.perf_counter() - start
+
+        links = _read_links(links_file_path, review_file_path)
+        found_links[name] = links
+        num_correct = len(links & true_links)
+
+        print(f'{name:>8}: {duration:8.2f} s, {len(links)} links, '
+              f'precision {num_correct / max(len(links), 1):.3f}, '
+              f'recall {num_correct / max(len(true_links), 1):.3f}')
+
+    if len(found_links) == 2:
+        native_links, limes_links = found_links['native'], found_links['LIMES']
+        print(f'{len(native_links & limes_links)} links found by both, '
+              f'{len(native_links - limes_links)} only by native, '
+              f'{len(limes_links - native_links)} only by LIMES')
+
+    shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
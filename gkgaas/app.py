@@ -1,28 +1,60 @@
+import contextlib
 import logging
 import logging.config
 import os
+import shutil
 import tempfile
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
 
 import yaml
 from fastapi import FastAPI, HTTPException
 from fastapi import Response
 from fastapi import status
 from starlette.datastructures import URL
+from starlette.responses import StreamingResponse
 
 import gkgaas.limes.preconfigs.profiles as limesprofiles
 import gkgaas.triplegeo.preconfigs.profiles as triplegeoprofiles
 from gkgaas.exceptions import WrongExecutablePath, RunnerExecutionFailed, \
-    ProtocolNotSupportedException
+    ProtocolNotSupportedException, RunnerTimeout, SPARQLServerNotReady, \
+    SPARQLQueryFailed, SPARQLQueryTimeout
 from gkgaas.fagi import LinksFormat
 from gkgaas.fagi.preconfigs.profiles import slipo_default_ab_mode
+from gkgaas.fagi.fagiprofile import FAGIProfile
 from gkgaas.fagi.runner import FAGIRunner
+from gkgaas.fagi.sharding import ShardedFAGIRunner
+from gkgaas.jobs import Job, JobManager, JobQueueFull, JobStage
+from gkgaas.limes.clusters import SameAsClusters
+from gkgaas.limes.limesprofile import LIMESProfile, LinkerType
+from gkgaas.limes.links import iter_links, write_links
+from gkgaas.limes.native import NativeLinker
+from gkgaas.limes.pruning import TargetPruning
+from gkgaas.limes.resolution import OneToOneResolution
 from gkgaas.limes.runner import LIMESRunner
+from gkgaas.limes.scores import ScoredLinks
+from gkgaas.limes.snapshot import LinkingSnapshotStore
+from gkgaas.limes.tiling import TiledLIMESRunner
 from gkgaas.model import ConversionDescription, KnowledgeGraphConversionInformation, \
-    KnowledgeGraphInfo
+    KnowledgeGraphInfo, JobInfo, SPARQLQueryRequest, SPARQLResultFormat
 from gkgaas.sparqlserver.fusekiwrapper import FusekiWrapper
+from gkgaas.sparqlserver.paging import InvalidQuery, get_paged_query, \
+    encode_cursor, decode_cursor, format_ndjson_row, format_csv_row, \
+    get_csv_values, is_ordered
+from gkgaas.sparqlserver.pool import SPARQLServerPool, \
+    SPARQLServerPoolExhausted
+from gkgaas.sparqlserver.resultcache import SPARQLResultCache
+from gkgaas.sparqlserver.tdb2 import TDB2DatasetStore
+from gkgaas.toolrunner import ToolRunner
+from gkgaas.triplegeo.profile import TripleGeoProfile
 from gkgaas.triplegeo.runner import TripleGeoRunner
-from gkgaas.utils.paths import get_file_name_base, get_links_file_path
+from gkgaas.utils.classindex import get_class_index, write_class_index
+from gkgaas.utils.filecache import FileCache
+from gkgaas.utils.metrics import metrics
+from gkgaas.utils.paths import get_file_name_base, get_links_file_path, \
+    get_review_links_file_path, get_scores_file_path, \
+    get_unique_links_file_path, get_same_as_links_file_path
 from gkgaas.utils.pidserviceclient import DummyPIDServiceClient
 
 logging.config.fileConfig(os.getenv('LOGGING_FILE_CONFIG', './logging.conf'))
@@ -39,6 +71,263 @@ except FileNotFoundError:
         'No settings.yml file found. Please create one, e.g. by copying the '
         'provided settings.yml.template.')
 
+jobs_cfg = cfg.get('jobs') or {}
+job_manager = JobManager(
+    max_workers=jobs_cfg.get('max_workers', 2),
+    max_pending_jobs=jobs_cfg.get('max_pending_jobs', 32),
+    max_retained_jobs=jobs_cfg.get('max_retained_jobs', 1000),
+    log_dir=jobs_cfg.get('log_dir'),
+    log_max_bytes=jobs_cfg.get('log_max_size_mb', 100) * 1024 ** 2,
+    log_backup_count=jobs_cfg.get('log_backup_count', 3))
+
+
+def _get_file_cache(tool_cfg: dict) -> Optional[FileCache]:
+    cache_dir = tool_cfg.get('cache_dir')
+
+    if cache_dir is None:
+        return None
+
+    max_size_mb = tool_cfg.get('cache_max_size_mb', 10240)
+
+    return FileCache(cache_dir, max_size_mb * 1024 * 1024)
+
+
+triplegeo_cache = _get_file_cache(cfg.get('triplegeo') or {})
+limes_cache = _get_file_cache(cfg.get('limes') or {})
+
+# Linking profile used by /add_to_knowledge_graph jobs
+add_to_kg_limes_profile = limesprofiles.name_to_profile[
+    (cfg.get('limes') or {}).get(
+        'profile', 'slipo equi match by name and distance')]
+
+
+def _get_tool_slots(tool_cfg: dict) -> threading.BoundedSemaphore:
+    """
+    Returns a semaphore bounding the number of concurrently running instances
+    of an external tool (and thus the memory used by their JVMs)
+    """
+    return threading.BoundedSemaphore(tool_cfg.get('max_concurrency', 2))
+
+
+triplegeo_slots = _get_tool_slots(cfg.get('triplegeo') or {})
+limes_slots = _get_tool_slots(cfg.get('limes') or {})
+fagi_slots = _get_tool_slots(cfg.get('fagi') or {})
+
+
+def _get_tool_limits(tool_cfg: dict) -> dict:
+    """
+    Returns the wall-clock timeout (in seconds) and the memory limit (in
+    bytes) configured for an external tool as keyword arguments for its runner
+    """
+    memory_limit_mb = tool_cfg.get('memory_limit_mb')
+
+    return {
+        'timeout': tool_cfg.get('timeout'),
+        'memory_limit':
+            None if memory_limit_mb is None else memory_limit_mb * 1024 ** 2
+    }
+
+
+triplegeo_limits = _get_tool_limits(cfg.get('triplegeo') or {})
+limes_limits = _get_tool_limits(cfg.get('limes') or {})
+fagi_limits = _get_tool_limits(cfg.get('fagi') or {})
+fagi_smush_same_as = (cfg.get('fagi') or {}).get('smush_same_as', False)
+fagi_sharding_cfg = (cfg.get('fagi') or {}).get('sharding')
+fagi_extract_linked_entities = \
+    (cfg.get('fagi') or {}).get('extract_linked_entities', False)
+fuseki_memory_limit = \
+    _get_tool_limits(cfg.get('fuseki') or {})['memory_limit']
+limes_tiling_cfg = (cfg.get('limes') or {}).get('tiling')
+
+
+def _get_target_pruning(limes_cfg: dict) -> Optional[TargetPruning]:
+    pruning_cfg = limes_cfg.get('target_pruning')
+
+    if pruning_cfg is None:
+        return None
+
+    return TargetPruning(
+        margin=pruning_cfg.get('margin', 0.0),
+        match_categories=pruning_cfg.get('match_categories', True))
+
+
+limes_target_pruning = _get_target_pruning(cfg.get('limes') or {})
+limes_project_inputs = (cfg.get('limes') or {}).get('project_inputs', False)
+
+
+def _get_snapshot_store(limes_cfg: dict) -> Optional[LinkingSnapshotStore]:
+    snapshot_dir = limes_cfg.get('snapshot_dir')
+
+    if snapshot_dir is None:
+        return None
+
+    return LinkingSnapshotStore(
+        snapshot_dir, limes_cfg.get('snapshot_partition_size', 1.0))
+
+
+# linking-ready snapshots of the topio KG
+topio_kg_snapshots = _get_snapshot_store(cfg.get('limes') or {})
+
+
+def _get_one_to_one_resolution(limes_cfg: dict) \
+        -> Optional[OneToOneResolution]:
+    resolution_cfg = limes_cfg.get('one_to_one')
+
+    if resolution_cfg is None:
+        return None
+
+    return OneToOneResolution(
+        exact=resolution_cfg.get('exact', False),
+        max_exact_component_size=resolution_cfg.get(
+            'max_exact_component_size', 100))
+
+
+limes_one_to_one_resolution = \
+    _get_one_to_one_resolution(cfg.get('limes') or {})
+
+
+def _create_linker(
+        limes_exec_path: str,
+        profile: LIMESProfile,
+        output_logger: logging.Logger = None,
+        target_snapshots: LinkingSnapshotStore = None,
+        target_id: str = None,
+        **kwargs) -> Union[LIMESRunner, NativeLinker]:
+    """
+    Returns the linker of a profile, i.e. a NativeLinker for profiles to be
+    run in-process, a TiledLIMESRunner if tiling is configured and the
+    profile's metric bounds the link distance, and a LIMESRunner otherwise.
+    LIMES runs read the target from a snapshot if a snapshot store is given,
+    kept under the target's ID (see LIMESRunner).
+    """
+    if profile.linker == LinkerType.NATIVE:
+        return NativeLinker(profile=profile, **kwargs)
+
+    if limes_tiling_cfg is not None and \
+            TiledLIMESRunner.supports_profile(profile):
+        return TiledLIMESRunner(
+            limes_executable_path=limes_exec_path,
+            profile=profile,
+            cache=limes_cache,
+            **limes_limits,
+            output_logger=output_logger,
+            target_pruning=limes_target_pruning,
+            target_snapshots=target_snapshots,
+            target_id=target_id,
+            tile_size=limes_tiling_cfg.get('tile_size', 1.0),
+            max_workers=limes_tiling_cfg.get('max_workers', 2),
+            slots=limes_slots,
+            **kwargs)
+
+    return LIMESRunner(
+        limes_executable_path=limes_exec_path,
+        profile=profile,
+        cache=limes_cache,
+        **limes_limits,
+        output_logger=output_logger,
+        target_pruning=limes_target_pruning,
+        project_inputs=limes_project_inputs,
+        target_snapshots=target_snapshots,
+        target_id=target_id,
+        **kwargs)
+
+
+def _run_tool(
+        runner: Union[ToolRunner, NativeLinker],
+        slots: threading.BoundedSemaphore):
+    """
+    Runs a tool holding one of the tool's slots. Runners starting several
+    tool processes, like TiledLIMESRunner and ShardedFAGIRunner, acquire a
+    slot per process themselves.
+    """
+    if getattr(runner, 'slots', None) is not None:
+        runner.run()
+        return
+
+    with slots:
+        runner.run()
+
+
+def _create_fuser(
+        fagi_exec_path: str,
+        profile: FAGIProfile,
+        **kwargs) -> Union[FAGIRunner, ShardedFAGIRunner]:
+    """
+    Returns a ShardedFAGIRunner if sharding is configured and a FAGIRunner
+    otherwise. Sharded runs always extract the linked entities.
+    """
+    if fagi_sharding_cfg is not None:
+        return ShardedFAGIRunner(
+            fagi_executable_path=fagi_exec_path,
+            profile=profile,
+            **fagi_limits,
+            num_shards=fagi_sharding_cfg.get('num_shards', 4),
+            max_workers=fagi_sharding_cfg.get('max_workers', 2),
+            slots=fagi_slots,
+            **kwargs)
+
+    return FAGIRunner(
+        fagi_executable_path=fagi_exec_path,
+        profile=profile,
+        **fagi_limits,
+        extract_linked_entities=fagi_extract_linked_entities,
+        **kwargs)
+
+
+fuseki_cfg = cfg.get('fuseki') or {}
+
+
+def _get_tdb2_store(fuseki_cfg: dict) -> Optional[TDB2DatasetStore]:
+    tdb2_dir = fuseki_cfg.get('tdb2_dir')
+
+    if tdb2_dir is None:
+        return None
+
+    return TDB2DatasetStore(
+        fuseki_cfg['tdb2_loader_path'],
+        tdb2_dir,
+        **_get_tool_limits(fuseki_cfg.get('tdb2_loader') or {}))
+
+
+tdb2_store = _get_tdb2_store(fuseki_cfg)
+
+result_cache_cfg = fuseki_cfg.get('result_cache') or {}
+sparql_result_cache = SPARQLResultCache(
+    max_entries=result_cache_cfg.get('max_entries', 1000),
+    ttl=result_cache_cfg.get('ttl', 600),
+    max_rows=result_cache_cfg.get('max_rows', 10000))
+
+
+def _create_fuseki_server(rdf_file_paths: List[str]) -> FusekiWrapper:
+    return FusekiWrapper(
+        cfg['fuseki']['executable_path'],
+        rdf_file_paths,
+        memory_limit=fuseki_memory_limit,
+        tdb2_store=tdb2_store,
+        result_cache=sparql_result_cache)
+
+
+fuseki_pool = SPARQLServerPool(
+    _create_fuseki_server,
+    max_instances=fuseki_cfg.get('pool_max_instances', 4),
+    idle_timeout=fuseki_cfg.get('pool_idle_timeout', 600),
+    ready_timeout=fuseki_cfg.get('ready_timeout', 300))
+
+query_cfg = cfg.get('query') or {}
+
+# Workers to process the input files of one request in parallel
+workers_cfg = cfg.get('workers') or {}
+worker_pool = ThreadPoolExecutor(
+    max_workers=workers_cfg.get('max_workers', os.cpu_count()),
+    thread_name_prefix='gkgaas-worker')
+
+
+@gkgaas_app.on_event('shutdown')
+def shutdown():
+    job_manager.shutdown(wait=False)
+    worker_pool.shutdown(wait=False)
+    fuseki_pool.close()
+
 
 @gkgaas_app.get('/triplegeo/profiles/list')
 def list_triplegeo_profiles():
@@ -52,6 +341,8 @@ pid_service.set_id_mappings({
     'topio.iais.my_dataset.file':
         '/tmp/topio_kg/corfu/get_pois_v02_corfu_2100.shp'
 })
+# Cached query results of a replaced KG version are not needed anymore
+pid_service.add_asset_replacement_listener(sparql_result_cache.invalidate)
 
 
 def _get_file(topio_id: str):
@@ -115,16 +406,32 @@ def get_file_path(topio_id: str) -> str:
     return file_path
 
 
-@gkgaas_app.post('/add_to_knowledge_graph', status_code=status.HTTP_201_CREATED)
-def add_to_knowledge_graph(
-        kg_conversion_information: KnowledgeGraphConversionInformation
-) -> KnowledgeGraphInfo:
+def _get_job_info(job: Job) -> JobInfo:
+    return JobInfo(
+        job_id=job.id,
+        status=job.status,
+        stage=job.stage,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        stage_durations=job.stage_durations,
+        result=job.result,
+        error=job.error)
 
-    working_dir = tempfile.mkdtemp()
 
-    ############################################################################
-    # Data conversion - TripleGeo
-    #
+@gkgaas_app.post(
+    '/add_to_knowledge_graph',
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=JobInfo)
+def add_to_knowledge_graph(
+        kg_conversion_information: KnowledgeGraphConversionInformation,
+        response: Response
+) -> JobInfo:
+    """
+    Validates the request and schedules the conversion, linking and fusion
+    pipeline as a background job. The job's progress and its resulting
+    KnowledgeGraphInfo can be polled via GET /jobs/{job_id}.
+    """
 
     # set up TripleGeo...
     try:
@@ -157,12 +464,116 @@ def add_to_knowledge_graph(
     # TODO: Check whether file format matches triplegeo_profile.input_format
     # return status.HTTP_400_BAD_REQUEST if file format does not match
 
+    # ...LIMES...
+    try:
+        limes_cfg = cfg['limes']
+        limes_exec_path = limes_cfg['executable_path']
+        limes_target_topio_id = kg_conversion_information.topio_kg_topio_id
+    except (KeyError, AttributeError):
+        log_msg = 'Linking tool LIMES was not configured properly'
+        logger.error(log_msg)
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=log_msg
+        )
+
+    topio_kg_file_path = get_file_path(limes_target_topio_id)
+
+    # ...and FAGI
+    try:
+        fagi_cfg = cfg['fagi']
+        fagi_exec_path = fagi_cfg['executable_path']
+
+    except (KeyError, AttributeError):
+        log_msg = 'Data fusion tool FAGI was not configured properly'
+        logger.error(log_msg)
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=log_msg
+        )
+
+    try:
+        job = job_manager.submit(
+            _add_to_knowledge_graph,
+            kg_conversion_information=kg_conversion_information,
+            triplegeo_exec_path=triplegeo_exec_path,
+            triplegeo_profile=triplegeo_profile,
+            triplegeo_input_file_path=triplegeo_input_file_path,
+            limes_exec_path=limes_exec_path,
+            topio_kg_file_path=topio_kg_file_path,
+            fagi_exec_path=fagi_exec_path)
+
+    except JobQueueFull as e:
+        logger.warning(str(e))
+
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many knowledge graph jobs are waiting for execution. '
+                   'Please try again later.'
+        )
+
+    response.headers['Location'] = f'/jobs/{job.id}'
+
+    return _get_job_info(job)
+
+
+@gkgaas_app.get('/metrics')
+def get_metrics() -> dict:
+    return metrics.to_dict()
+
+
+def _accumulate_same_as_links(
+        previous_links_file_path: str,
+        links_file_path: str,
+        links_format: LinksFormat,
+        out_file_path: str):
+    """
+    Writes the owl:sameAs links of all fusions which led to a fused dataset,
+    i.e. those of the fused topio KG version (if any), followed by the links
+    of the current fusion, s.t. the links are in the order of the fusions
+    (see SameAsClusters)
+    """
+    if os.path.exists(previous_links_file_path):
+        shutil.copyfile(previous_links_file_path, out_file_path)
+    else:
+        open(out_file_path, 'w').close()
+
+    write_links(
+        ((left_iri, right_iri, 1.0) for left_iri, right_iri
+         in iter_links(links_file_path, links_format)),
+        out_file_path,
+        append=True)
+
+
+def _add_to_knowledge_graph(
+        job: Job,
+        kg_conversion_information: KnowledgeGraphConversionInformation,
+        triplegeo_exec_path: str,
+        triplegeo_profile: TripleGeoProfile,
+        triplegeo_input_file_path: str,
+        limes_exec_path: str,
+        topio_kg_file_path: str,
+        fagi_exec_path: str
+) -> KnowledgeGraphInfo:
+
+    working_dir = tempfile.mkdtemp()
+
+    ############################################################################
+    # Data conversion - TripleGeo
+    #
+    job.enter_stage(JobStage.CONVERSION)
+
     try:
         triplegeo = TripleGeoRunner(
             triplegeo_executable_path=triplegeo_exec_path,
             profile=triplegeo_profile,
             input_files=[triplegeo_input_file_path],
-            output_dir=working_dir)
+            output_dir=working_dir,
+            cache=triplegeo_cache,
+            **triplegeo_limits,
+            output_logger=job.output_logger)
 
     except WrongExecutablePath as e:
         # In case the TripleGeo executable path is mis-configured this will
@@ -177,7 +588,12 @@ def add_to_knowledge_graph(
         )
 
     try:
-        triplegeo.run()
+        with triplegeo_slots:
+            triplegeo.run()
+    except RunnerTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail='The RDF conversion process did not finish in time.')
     except RunnerExecutionFailed:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -191,34 +607,28 @@ def add_to_knowledge_graph(
     ############################################################################
     # Linking - LIMES
     #
-    try:
-        limes_cfg = cfg['limes']
-        limes_exec_path = limes_cfg['executable_path']
-        limes_target_topio_id = kg_conversion_information.topio_kg_topio_id
-    except (KeyError, AttributeError):
-        log_msg = 'Linking tool LIMES was not configured properly'
-        logger.error(log_msg)
-
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=log_msg
-        )
-
-    topio_kg_file_path = get_file_path(limes_target_topio_id)
+    job.enter_stage(JobStage.LINKING)
 
     # TODO: Determine which linking profile to use based on metadata? So far we concentrate on POI data
-    limes_profile = limesprofiles.slipo_equi_match_by_name_and_distance
+    limes_profile = add_to_kg_limes_profile
 
     links_file_path = get_links_file_path(triplegeo_result_file_path)
+    scores_file_path = get_scores_file_path(triplegeo_result_file_path)
 
     try:
-        limes = LIMESRunner(
-            limes_executable_path=limes_exec_path,
-            profile=limes_profile,
+        limes = _create_linker(
+            limes_exec_path,
+            limes_profile,
+            output_logger=job.output_logger,
+            target_snapshots=topio_kg_snapshots,
+            target_id=kg_conversion_information.topio_kg_topio_id,
             source_input_file_path=triplegeo_result_file_path,
             target_input_file_path=topio_kg_file_path,
             result_links_kg_file_path=links_file_path,
-            output_dir=working_dir)
+            output_dir=working_dir,
+            result_review_links_kg_file_path=get_review_links_file_path(
+                triplegeo_result_file_path),
+            scores_file_path=scores_file_path)
 
     except WrongExecutablePath as e:
         logger.error(str(e))
@@ -231,7 +641,11 @@ def add_to_knowledge_graph(
         )
 
     try:
-        limes.run()
+        _run_tool(limes, limes_slots)
+    except RunnerTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail='The linking process did not finish in time.')
     except RunnerExecutionFailed:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -240,32 +654,33 @@ def add_to_knowledge_graph(
     ############################################################################
     # Data fusion - FAGI
     #
-    try:
-        # set up FAGI for data fusion
-        fagi_cfg = cfg['fagi']
-        fagi_exec_path = fagi_cfg['executable_path']
-
-    except (KeyError, AttributeError):
-        log_msg = 'Data fusion tool FAGI was not configured properly'
-        logger.error(log_msg)
-
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=log_msg
-        )
+    job.enter_stage(JobStage.FUSION)
 
     # FIXME: Read through FAGI profiles again and choose appropriate mode
-    fagi_profile = slipo_default_ab_mode
+    # The preconfigured profile is shared between concurrently running jobs
+    # and thus must not be modified in place
+    fagi_profile = slipo_default_ab_mode.copy()
     fagi_profile.config.links.links_format = LinksFormat.NT
 
+    if limes_one_to_one_resolution is not None:
+        # FAGI gets the accepted links resolved into one-to-one links
+        links_file_path = \
+            get_unique_links_file_path(triplegeo_result_file_path)
+        limes_one_to_one_resolution.write(
+            ScoredLinks.load(scores_file_path).get_links(
+                limes_profile.acceptance_condition.threshold),
+            links_file_path)
+        fagi_profile.config.links.links_format = LinksFormat.CSV_UNIQUE_LINKS
+
     try:
-        fagi = FAGIRunner(
-            fagi_executable_path=fagi_exec_path,
-            profile=fagi_profile,
+        fagi = _create_fuser(
+            fagi_exec_path,
+            fagi_profile,
             left_input_file_path=triplegeo_result_file_path,
             right_input_file_path=topio_kg_file_path,
             links_file_path=links_file_path,
-            output_dir_path=working_dir)
+            output_dir_path=working_dir,
+            output_logger=job.output_logger)
 
     except WrongExecutablePath as e:
         logger.error(str(e))
@@ -276,18 +691,52 @@ def add_to_knowledge_graph(
                    'executable path could not be found')
 
     try:
-        fagi.run()
-
+        _run_tool(fagi, fagi_slots)
+    except RunnerTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail='The data fusion process did not finish in time.')
     except RunnerExecutionFailed:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail='The data fusion process failed due to an internal error')
 
-    # TODO: Write back result files to Topio Drive
     fused_dataset_file_path = os.path.join(
         working_dir, fagi_profile.config.target.fused)
 
-    pid_service.register_asset(fused_dataset_file_path)
+    if fagi_smush_same_as:
+        # Rewrite the linked resources onto one IRI each, s.t. later linking
+        # and fusion runs do not walk owl:sameAs chains
+        same_as_links_file_path = \
+            get_same_as_links_file_path(fused_dataset_file_path)
+        _accumulate_same_as_links(
+            get_same_as_links_file_path(topio_kg_file_path),
+            links_file_path,
+            fagi_profile.config.links.links_format,
+            same_as_links_file_path)
+        same_as_clusters = SameAsClusters.from_link_files(
+            [same_as_links_file_path])
+        smushed_file_path = fused_dataset_file_path + '.smushed'
+        same_as_clusters.smush(fused_dataset_file_path, smushed_file_path)
+        os.replace(smushed_file_path, fused_dataset_file_path)
+
+    ############################################################################
+    # Registration
+    #
+    job.enter_stage(JobStage.REGISTRATION)
+
+    # TODO: Write back result files to Topio Drive
+
+    # The fused dataset is the new version of the topio KG
+    pid_service.register_asset(
+        fused_dataset_file_path, replaced_asset_local_id=topio_kg_file_path)
+    write_class_index(fused_dataset_file_path)
+
+    # Bulk-load the new KG version once s.t. SPARQL servers can start on it
+    # right away
+    if tdb2_store is not None:
+        tdb2_store.get_dataset_dir(fused_dataset_file_path)
+
     fused_dataset_topio_id = pid_service.get_topio_id(fused_dataset_file_path)
 
     return KnowledgeGraphInfo(
@@ -296,6 +745,19 @@ def add_to_knowledge_graph(
     )
 
 
+@gkgaas_app.get('/jobs/{job_id}', response_model=JobInfo)
+def get_job(job_id: str) -> JobInfo:
+    job = job_manager.get(job_id)
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Job {job_id} not found'
+        )
+
+    return _get_job_info(job)
+
+
 @gkgaas_app.post('/make_knowledge_graph', status_code=status.HTTP_201_CREATED)
 def make_knowledge_graph(
         conversion_description: ConversionDescription,
@@ -326,71 +788,86 @@ def make_knowledge_graph(
     # TODO: Check whether file format matches triplegeo_profile.input_format
     # return status.HTTP_400_BAD_REQUEST if file format does not match
 
-    try:
+    limes_target = conversion_description.file_to_link_with
+
+    if limes_target is not None:
+        # ...and LIMES
+        limes_cfg = cfg['limes']
+        limes_exec_path = limes_cfg['executable_path']
+        limes_profile_name = conversion_description.linking_profile_name
+
+        if limes_profile_name is None:
+            # chosen randomly...
+            limes_profile = limesprofiles.slipo_default_match
+        else:
+            limes_profile = \
+                limesprofiles.name_to_profile.get(limes_profile_name.lower())
+
+        if limes_profile is None:
+            raise Exception(f'Linking profile {limes_profile_name} is not '
+                            f'known')
+
+    def convert_and_link(input_file: str) -> Tuple[str, Optional[str]]:
+        """
+        Converts one input file and links the result with the file to link
+        with (if any). Returns the result file path and the links file path.
+        """
         triplegeo = TripleGeoRunner(
             triplegeo_executable_path=triplegeo_exec_path,
             profile=triplegeo_profile,
-            input_files=triplegeo_input_files,
-            output_dir=working_dir)
-    except WrongExecutablePath as e:
-        # In case the TripleGeo executable path is mis-configured this will
-        # cause an unrecoverable error
-        logger.error(str(e))
-        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-        # TODO: Rather not let the users know this internal message?
-        response.body = 'The TripleGeo executable path could not be found'
+            input_files=[input_file],
+            output_dir=working_dir,
+            cache=triplegeo_cache,
+            **triplegeo_limits)
 
-        return response
-
-    triplegeo.run()
+        with triplegeo_slots:
+            triplegeo.run()
 
-    result_files = []
-    result_file_paths = []
-    for input_file in triplegeo_input_files:
         out_file_name = \
             get_file_name_base(input_file) + default_rdf_file_postfix
-
         out_file_path = os.path.join(working_dir, out_file_name)
-        result_files.append(out_file_name)
-        result_file_paths.append(out_file_path)
 
-    if conversion_description.file_to_link_with is not None:
-        print('Start linking')
-        # ...then run LIMES
-        limes_cfg = cfg['limes']
-        limes_exec_path = limes_cfg['executable_path']
-        limes_profile_name = conversion_description.linking_profile_name.lower()
-        limes_target = conversion_description.file_to_link_with
+        if limes_target is None:
+            return out_file_path, None
 
-        if limes_profile_name is None:
-            # chosen randomly...
-            limes_profile_name = limesprofiles.slipo_default_match
+        links_file = get_links_file_path(out_file_path)
 
-        limes_profile = limesprofiles.name_to_profile.get(limes_profile_name)
+        limes = _create_linker(
+            limes_exec_path,
+            limes_profile,
+            source_input_file_path=out_file_path,
+            target_input_file_path=limes_target,
+            result_links_kg_file_path=links_file,
+            output_dir=working_dir,
+            result_review_links_kg_file_path=get_review_links_file_path(
+                out_file_path),
+            scores_file_path=get_scores_file_path(out_file_path))
 
-        if limes_profile is None:
-            raise Exception(f'Linking profile {limes_profile_name} is not '
-                            f'known')
+        _run_tool(limes, limes_slots)
+
+        return out_file_path, links_file
 
-        links_files = []
-        for result_file_path in result_file_paths:
-            links_file = get_links_file_path(result_file_path)
+    # Input files are converted and linked in parallel. The results are
+    # collected in the order of the input files.
+    try:
+        results = list(worker_pool.map(convert_and_link, triplegeo_input_files))
 
-            limes = LIMESRunner(
-                limes_executable_path=limes_exec_path,
-                profile=limes_profile,
-                source_input_file_path=result_file_path,
-                target_input_file_path=limes_target,
-                result_links_kg_file_path=links_file,
-                output_dir=working_dir)
+    except WrongExecutablePath as e:
+        # In case the TripleGeo or LIMES executable path is mis-configured this
+        # will cause an unrecoverable error
+        logger.error(str(e))
+        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        # TODO: Rather not let the users know this internal message?
+        response.body = \
+            'The TripleGeo or LIMES executable path could not be found'
 
-            limes.run()
+        return response
 
-            links_files.append(links_file)
+    result_file_paths = [result_file_path for result_file_path, _ in results]
 
+    if limes_target is not None:
         result_file_paths.append(limes_target)
-        result_file_paths += links_files
-        print('Linking done')
+        result_file_paths += [links_file for _, links_file in results]
 
     # start SPARQL server with result files
     print('Starting fuseki...')
@@ -398,9 +875,11 @@ def make_knowledge_graph(
     fuseki_exec_path = fuseki_cfg['executable_path']
     sparql_server = FusekiWrapper(
         fuseki_exec_path,
-        result_file_paths)
+        result_file_paths,
+        memory_limit=fuseki_memory_limit)
 
     sparql_server.run()
+    sparql_server.wait_until_ready(fuseki_cfg.get('ready_timeout', 300))
 
     # TODO: Move generated files to Topio file store
     # TODO: Delete working_dir!
@@ -432,10 +911,47 @@ def get_classes(kg_info: KnowledgeGraphInfo) -> List[str]:
     topio_kg_file_path = get_file_path(kg_info.topio_kg_topio_id)
     user_kg_file_path = get_file_path(kg_info.user_kg_topio_id)
 
+    # The classes are served from the class indexes stored next to the
+    # datasets instead of querying a SPARQL server
     try:
-        fuseki_cfg = cfg['fuseki']
-        fuseki_exec_path = fuseki_cfg['executable_path']
-    except (KeyError, AttributeError):
+        iris = set()
+
+        for file_path in [topio_kg_file_path, user_kg_file_path]:
+            iris.update(get_class_index(file_path).keys())
+
+    except FileNotFoundError as e:
+        logger.error(str(e))
+
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='One of the input files could not be found'
+        )
+
+    mappings = _get_normalization_mapping(sorted(iris))
+    logger.info(f'Found mappings for these classes: {str(mappings)}')
+
+    return [k for k in mappings.keys()]
+
+
+@gkgaas_app.post('/query/sparql', status_code=status.HTTP_200_OK)
+def query_sparql(query_request: SPARQLQueryRequest):
+    """
+    Runs a SELECT query over the union of a user KG and a topio KG and streams
+    one page of the result as newline-delimited JSON (one SPARQL JSON result
+    binding object per line) or CSV. For queries with an ORDER BY clause the
+    X-Next-Cursor response header holds the cursor of the next page; a page
+    with less than limit rows is the last one. The row order of unordered
+    queries may differ between executions, so they are not given cursors and
+    requests with a cursor are rejected for them. Queries with dataset clauses
+    (FROM, FROM NAMED) are rejected as well, as the query always runs over
+    the two KGs.
+    """
+    topio_kg_file_path = get_file_path(
+        query_request.knowledge_graph.topio_kg_topio_id)
+    user_kg_file_path = get_file_path(
+        query_request.knowledge_graph.user_kg_topio_id)
+
+    if fuseki_cfg.get('executable_path') is None:
         log_msg = 'SPARQL server was not configured properly'
         logger.error(log_msg)
 
@@ -444,20 +960,45 @@ def get_classes(kg_info: KnowledgeGraphInfo) -> List[str]:
             detail=log_msg
         )
 
+    max_timeout = query_cfg.get('max_timeout', 300)
+    timeout = min(query_request.timeout or max_timeout, max_timeout)
+
     try:
-        sparql_server = FusekiWrapper(
-            fuseki_exec_path,
-            [topio_kg_file_path, user_kg_file_path]
+        limit = query_request.limit
+
+        if query_request.cursor is not None:
+            offset, cursor_limit = \
+                decode_cursor(query_request.query, query_request.cursor)
+            limit = limit or cursor_limit
+        else:
+            offset = query_request.offset
+
+        max_limit = query_cfg.get('max_limit', 10000)
+        limit = min(limit or max_limit, max_limit)
+
+        paged_query = get_paged_query(query_request.query, limit, offset)
+
+    except InvalidQuery as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
 
+    try:
+        with contextlib.ExitStack() as stack:
+            sparql_server = stack.enter_context(
+                fuseki_pool.acquire([topio_kg_file_path, user_kg_file_path]))
+            rows = stack.enter_context(
+                sparql_server.query_rows(paged_query, timeout=timeout))
+
+            # The server is held until the whole page was streamed
+            server_context = stack.pop_all()
+
     except WrongExecutablePath as e:
-        # In case the Fuseki executable path is mis-configured this will
-        # cause an unrecoverable error
         logger.error(str(e))
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            # TODO: Rather not let the users know this internal message?
             detail='The SPARQL server could not be started since the '
                    'Fuseki executable path could not be found'
         )
@@ -470,46 +1011,56 @@ def get_classes(kg_info: KnowledgeGraphInfo) -> List[str]:
             detail='One of the input files could not be found'
         )
 
-    sparql_server.run()
-    res = sparql_server.query(
-        """
-        SELECT DISTINCT ?cls
-        WHERE {
-          ?s a ?cls
-        }
-        """)
-
-    # res looks like this:
-    # {
-    #   'head':
-    #     {
-    #       'vars': ['cls']
-    #     },
-    #   'results':
-    #     {
-    #       'bindings':
-    #         [
-    #           {
-    #             'cls':
-    #               {
-    #                 'type': 'uri',
-    #                 'value': 'http://www.opengis.net/ont/sf#POINT'
-    #               }
-    #           },
-    #           {
-    #             'cls':
-    #               {
-    #                 'type': 'uri',
-    #                 'value': 'http://www.opengis.net/ont/geosparql#Feature'
-    #               }
-    #           }
-    #         ]
-    #     }
-    # }
-    iris = list(map(lambda b: b['cls']['value'], res['results']['bindings']))
-    mappings = _get_normalization_mapping(iris)
-    logger.info(f'Found mappings for these classes: {str(mappings)}')
-    sparql_server.stop()
+    except (SPARQLServerPoolExhausted, SPARQLServerNotReady) as e:
+        logger.warning(str(e))
 
-    return [k for k in mappings.keys()]
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='No SPARQL server available. Please try again later.'
+        )
+
+    except SPARQLQueryTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f'The query did not finish within {timeout} seconds'
+        )
+
+    except SPARQLQueryFailed as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    def stream_rows():
+        try:
+            if query_request.format == SPARQLResultFormat.CSV:
+                yield format_csv_row(rows.variables)
+
+                for row in rows:
+                    yield format_csv_row(get_csv_values(row, rows.variables))
+            else:
+                for row in rows:
+                    yield format_ndjson_row(row)
+
+        except SPARQLQueryFailed as e:
+            # The response status was already sent, so the response is
+            # aborted s.t. the client does not take it as complete page
+            logger.error(f'Streaming SPARQL query result failed: {e}')
+            raise
+
+        finally:
+            server_context.close()
+
+    if query_request.format == SPARQLResultFormat.CSV:
+        media_type = 'text/csv'
+    else:
+        media_type = 'application/x-ndjson'
+
+    headers = {}
+
+    if is_ordered(query_request.query):
+        headers['X-Next-Cursor'] = \
+            encode_cursor(query_request.query, offset + limit, limit)
 
+    return StreamingResponse(
+        stream_rows(), media_type=media_type, headers=headers)
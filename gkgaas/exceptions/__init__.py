@@ -6,6 +6,14 @@ class RunnerExecutionFailed(Exception):
     pass
 
 
+class RunnerTimeout(RunnerExecutionFailed):
+    pass
+
+
+class RunnerCancelled(RunnerExecutionFailed):
+    pass
+
+
 class ProtocolNotSupportedException(Exception):
     """
     This is exception is thrown when a Tpio ID is translated to a local ID
@@ -16,3 +24,15 @@ class ProtocolNotSupportedException(Exception):
 
     def __init__(self, msg):
         self.msg = msg
+
+
+class SPARQLServerNotReady(Exception):
+    pass
+
+
+class SPARQLQueryFailed(Exception):
+    pass
+
+
+class SPARQLQueryTimeout(SPARQLQueryFailed):
+    pass
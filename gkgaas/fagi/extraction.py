@@ -0,0 +1,198 @@
+from contextlib import ExitStack
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Union
+
+from rdflib import URIRef
+
+from gkgaas.fagi.action import DatasetAction
+from gkgaas.fagi.rule import FAGIRule, FAGIRulesSpec
+from gkgaas.utils.ntriples import format_iri, iter_triples, rdf_type_iri
+
+_rdf_type_term = f'<{rdf_type_iri}>'
+
+
+def _is_node(term: str) -> bool:
+    """
+    Returns whether a term is an IRI or a blank node, i.e. can be the
+    subject of further triples
+    """
+    return term.startswith('<') or term.startswith('_:')
+
+
+def _get_path(prop: Union[URIRef, List[URIRef]]) -> List[str]:
+    if isinstance(prop, URIRef):
+        return [str(prop)]
+
+    return [str(p) for p in prop]
+
+
+def get_fused_paths(rules: FAGIRulesSpec, left: bool) \
+        -> Optional[List[List[str]]]:
+    """
+    Returns the property paths FAGI reads from the left or the right input
+    dataset when fusing linked entities, i.e. the paths of the fusion rules
+    (including their external properties) and of the ensembles, or None if
+    FAGI keeps all properties of the dataset's entities. The latter is the
+    case if the default dataset action keeps the dataset's values of the
+    properties no rule covers.
+    """
+    kept_action = DatasetAction.KEEP_LEFT if left else DatasetAction.KEEP_RIGHT
+
+    if rules.default_dataset_action in (kept_action, DatasetAction.KEEP_BOTH):
+        return None
+
+    paths = []
+
+    for rule in rules.rules:
+        if isinstance(rule, FAGIRule):
+            paths.append(
+                _get_path(rule.property_a if left else rule.property_b))
+
+        for external_property in rule.external_properties or []:
+            paths.append(_get_path(external_property.uri))
+
+    paths.extend([
+        _get_path(prop)
+        for prop in rules.ensembles.functional_properties +
+        rules.ensembles.non_functional_properties])
+
+    return paths
+
+
+def get_entity_nodes(
+        file_path: str,
+        entity_parts: Dict[str, int],
+        depth: int = 2,
+        predicates: Set[str] = None) -> Dict[str, FrozenSet[int]]:
+    """
+    Returns the nodes of the given entities, i.e. the entities themselves and
+    the nodes they point to up to depth hops away (e.g. the geometry and name
+    nodes of SLIPO POIs), together with the parts (e.g. shards) of the
+    entities they belong to. Entities and nodes are given as N-Triples terms,
+    i.e. IRIs in angle brackets.
+
+    Classes are not followed, i.e. objects of rdf:type statements. If
+    predicates (N-Triples terms) are given, only these are followed. Every hop
+    beyond the entities themselves costs one pass over the file.
+    """
+    nodes = {
+        entity: frozenset([part]) for entity, part in entity_parts.items()}
+
+    for _ in range(depth - 1):
+        # nodes found in this pass are followed in the next one
+        known_nodes = dict(nodes)
+        changed = False
+
+        for subj, pred, obj in iter_triples(file_path):
+            parts = known_nodes.get(subj)
+
+            if parts is None or pred == _rdf_type_term or not _is_node(obj):
+                continue
+
+            if predicates is not None and pred not in predicates:
+                continue
+
+            obj_parts = nodes.get(obj)
+
+            if obj_parts is None:
+                nodes[obj] = parts
+                changed = True
+            elif not parts <= obj_parts:
+                nodes[obj] = obj_parts | parts
+                changed = True
+
+        if not changed:
+            break
+
+    return nodes
+
+
+def extract_entities(
+        file_path: str,
+        nodes: Dict[str, FrozenSet[int]],
+        out_file_paths: List[str],
+        rest_file_path: str = None,
+        predicates: Set[str] = None) -> List[int]:
+    """
+    Streams an N-Triples file and writes the triples of the given nodes (see
+    get_entity_nodes()) into the output file of each of the nodes' parts,
+    only those with the given predicates (N-Triples terms) if any. The
+    triples of all other subjects are written to rest_file_path if given.
+    Returns the number of triples written per part.
+    """
+    num_triples = [0] * len(out_file_paths)
+
+    with ExitStack() as stack:
+        out_files = [
+            stack.enter_context(open(out_file_path, 'w', encoding='utf-8'))
+            for out_file_path in out_file_paths]
+        rest_file = None if rest_file_path is None else \
+            stack.enter_context(open(rest_file_path, 'w', encoding='utf-8'))
+
+        for subj, pred, obj in iter_triples(file_path):
+            parts = nodes.get(subj)
+            line = f'{subj} {pred} {obj} .\n'
+
+            if parts is None:
+                if rest_file is not None:
+                    rest_file.write(line)
+
+                continue
+
+            if predicates is not None and pred not in predicates:
+                continue
+
+            for part in parts:
+                out_files[part].write(line)
+                num_triples[part] += 1
+
+    return num_triples
+
+
+def _get_depth_and_predicates(paths: Optional[List[List[str]]]) \
+        -> Tuple[int, Optional[Set[str]]]:
+    """
+    Returns how many hops to follow from linked entities and which predicates
+    (N-Triples terms) for the given property paths, if any
+    """
+    if paths is None:
+        return 2, None
+
+    return \
+        max([len(path) for path in paths], default=1), \
+        set([format_iri(p) for path in paths for p in path])
+
+
+def get_linked_entity_nodes(
+        file_path: str,
+        entity_parts: Dict[str, int],
+        paths: List[List[str]] = None) -> Dict[str, FrozenSet[int]]:
+    """
+    Returns the nodes of the given entities (see get_entity_nodes()) written
+    by extract_linked_entities() for the given property paths
+    """
+    return get_entity_nodes(
+        file_path, entity_parts, *_get_depth_and_predicates(paths))
+
+
+def extract_linked_entities(
+        file_path: str,
+        entity_parts: Dict[str, int],
+        out_file_paths: List[str],
+        rest_file_path: str = None,
+        paths: List[List[str]] = None,
+        nodes: Dict[str, FrozenSet[int]] = None) -> List[int]:
+    """
+    Writes the triples of the given entities and the nodes they point to into
+    the output file of their part (see extract_entities()). If property paths
+    are given (see get_fused_paths()), only the triples on these paths are
+    written, otherwise all triples up to two hops away. The entities' triples
+    off the paths are dropped, as FAGI would not read them anyway. The nodes
+    are looked up unless given (see get_linked_entity_nodes()).
+    """
+    depth, predicates = _get_depth_and_predicates(paths)
+
+    if nodes is None:
+        nodes = get_entity_nodes(file_path, entity_parts, depth, predicates)
+
+    return extract_entities(
+        file_path, nodes, out_file_paths, rest_file_path, predicates)
@@ -1,3 +1,4 @@
+import copy
 from dataclasses import dataclass
 
 from gkgaas.fagi.config import FAGIConfig
@@ -8,3 +9,11 @@ from gkgaas.fagi.rule import FAGIRulesSpec
 class FAGIProfile:
     config: FAGIConfig
     rules: FAGIRulesSpec
+
+    def copy(self) -> 'FAGIProfile':
+        """
+        Returns a copy of the profile with a copied config, which gets
+        modified during runs, and the same rules, which are treated as
+        immutable (see gkgaas.fagi.optimizer.order_conditions())
+        """
+        return FAGIProfile(copy.deepcopy(self.config), self.rules)
@@ -0,0 +1,161 @@
+import copy
+from typing import Dict, List, Type
+
+from gkgaas.fagi.condition import FAGIRuleConditionExpression, \
+    SimpleFAGIRuleConditionExpression, And, Or, Not
+from gkgaas.fagi.function import FAGIEvaluationFunction, IsDateKnownFormat, \
+    IsDatePrimaryFormat, IsValidDate, DatesAreSame, IsGeometryMoreComplex, \
+    GeometriesCloserThan, GeometriesHaveSameArea, IsSameCentroid, \
+    IsPointGeometry, GeometriesIntersect, IsGeometryCoveredBy, \
+    IsLiteralAbbreviation, IsSameNormalized, IsSameSimpleNormalize, \
+    IsSameCustomNormalize, IsLiteralLonger, IsLiteralNumeric, \
+    IsNameValueOfficial, LiteralContains, LiteralContainsTheOther, \
+    LiteralHasLanguageAnnotation, LiteralsHaveSameLanguageAnnotation, \
+    IsPhoneNumberParsable, IsSamePhoneNumber, \
+    IsSamePhoneNumberCustomNormalize, IsSamePhoneNumberUsingExitCode, \
+    PhoneHasMoreDigits, Exists, NotExists
+from gkgaas.fagi.rule import FAGIRulesSpec
+
+# Relative evaluation costs of FAGI's evaluation functions: property lookups
+# are cheapest, followed by literal checks, date and phone number parsing,
+# string normalization and similarity, and geometry operations, which parse
+# WKT and (mostly) transform the geometries into another CRS. The costs are
+# estimated from what the functions do and were not measured.
+function_costs: Dict[Type[FAGIEvaluationFunction], float] = {
+    Exists: 1,
+    NotExists: 1,
+    IsLiteralNumeric: 2,
+    IsLiteralLonger: 2,
+    LiteralHasLanguageAnnotation: 2,
+    LiteralsHaveSameLanguageAnnotation: 2,
+    IsNameValueOfficial: 2,
+    LiteralContains: 3,
+    LiteralContainsTheOther: 3,
+    IsLiteralAbbreviation: 3,
+    IsDateKnownFormat: 5,
+    IsDatePrimaryFormat: 5,
+    IsValidDate: 5,
+    DatesAreSame: 8,
+    PhoneHasMoreDigits: 5,
+    IsPhoneNumberParsable: 10,
+    IsSamePhoneNumber: 10,
+    IsSamePhoneNumberCustomNormalize: 15,
+    IsSamePhoneNumberUsingExitCode: 15,
+    IsSameNormalized: 20,
+    IsSameSimpleNormalize: 20,
+    IsSameCustomNormalize: 30,
+    IsPointGeometry: 10,
+    IsGeometryMoreComplex: 20,
+    GeometriesIntersect: 40,
+    IsGeometryCoveredBy: 40,
+    GeometriesHaveSameArea: 40,
+    IsSameCentroid: 40,
+    GeometriesCloserThan: 50,
+}
+
+# Cost of evaluation functions missing in function_costs
+default_function_cost = 10
+
+
+def get_cost(expression: FAGIRuleConditionExpression) -> float:
+    """
+    Returns the cost of evaluating all functions of an expression, i.e. an
+    upper bound of the cost of evaluating the expression
+    """
+    if isinstance(expression, SimpleFAGIRuleConditionExpression):
+        return function_costs.get(
+            type(expression.evaluation_function), default_function_cost)
+
+    if isinstance(expression, (And, Or)):
+        return get_cost(expression.first_expression) + \
+            get_cost(expression.second_expression)
+
+    if isinstance(expression, Not):
+        return get_cost(expression.expression)
+
+    return default_function_cost
+
+
+def _get_operands(expression: FAGIRuleConditionExpression, connective: type) \
+        -> List[FAGIRuleConditionExpression]:
+    """
+    Returns the operands of nested conjunctions or disjunctions, e.g. a, b
+    and c for And(a, And(b, c)) and And(And(a, b), c)
+    """
+    if type(expression) is not connective:
+        return [expression]
+
+    return \
+        _get_operands(expression.first_expression, connective) + \
+        _get_operands(expression.second_expression, connective)
+
+
+def order_expression(
+        expression: FAGIRuleConditionExpression,
+        nesting_level: int = 0) -> FAGIRuleConditionExpression:
+    """
+    Returns an equivalent expression with the operands of conjunctions and
+    disjunctions ordered cheapest first, s.t. FAGI evaluates the expensive
+    functions last, if at all. Nested conjunctions (disjunctions) are
+    flattened before ordering their operands and rendered as a chain
+    And(a, And(b, c)) afterwards, as FAGI evaluates operands in document
+    order. Evaluation functions have no side effects, so the order does not
+    change the result.
+    """
+    if isinstance(expression, (And, Or)):
+        connective = type(expression)
+        operands = sorted(
+            [order_expression(operand)
+             for operand in _get_operands(expression, connective)],
+            key=get_cost)
+
+        ordered = operands[-1]
+        for operand in reversed(operands[:-1]):
+            ordered = connective(operand, ordered)
+
+        _set_nesting_level(ordered, nesting_level)
+
+        return ordered
+
+    if isinstance(expression, Not):
+        return Not(
+            order_expression(expression.expression, nesting_level + 1),
+            nesting_level)
+
+    return expression
+
+
+def _set_nesting_level(
+        expression: FAGIRuleConditionExpression, nesting_level: int):
+
+    if isinstance(expression, (And, Or)):
+        expression.nesting_level = nesting_level
+        _set_nesting_level(expression.first_expression, nesting_level + 1)
+        _set_nesting_level(expression.second_expression, nesting_level + 1)
+
+    elif isinstance(expression, Not):
+        expression.nesting_level = nesting_level
+        _set_nesting_level(expression.expression, nesting_level + 1)
+
+
+def order_conditions(rules: FAGIRulesSpec) -> FAGIRulesSpec:
+    """
+    Returns a copy of the rules with all action rule conditions ordered by
+    order_expression(). The copy is made once per rules object, e.g. per
+    preconfigured profile, and kept in its ordered attribute, so neither the
+    rules nor the returned copy must be modified.
+    """
+    if rules.ordered is not None:
+        return rules.ordered
+
+    ordered_rules = copy.deepcopy(rules)
+
+    for rule in ordered_rules.rules:
+        for action_rule in rule.action_rule_set:
+            action_rule.condition.expression = \
+                order_expression(action_rule.condition.expression)
+
+    # concurrent callers may both order the rules, the results are equal
+    rules.ordered = ordered_rules
+
+    return ordered_rules
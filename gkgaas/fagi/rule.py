@@ -1,6 +1,6 @@
 import os
-from dataclasses import dataclass
-from typing import List, Union
+from dataclasses import dataclass, field
+from typing import List, Optional, Union
 
 from rdflib import URIRef
 
@@ -194,6 +194,9 @@ class FAGIRulesSpec:
     rules: List[Union[FAGIRule, FAGIValidationRule]]
     default_dataset_action: DatasetAction
     ensembles: Ensembles
+    # copy with ordered conditions (see gkgaas.fagi.optimizer), set lazily
+    ordered: Optional['FAGIRulesSpec'] = field(
+        default=None, init=False, repr=False, compare=False)
 
     def to_file(self, file_path: str):
         with open(file_path, 'w') as out_file:
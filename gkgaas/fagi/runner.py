@@ -1,20 +1,33 @@
 import logging
 import os
 import shutil
-import subprocess
 import tempfile
 
-from gkgaas.exceptions import WrongExecutablePath, RunnerExecutionFailed
+from gkgaas.fagi import FusionMode
+from gkgaas.fagi.extraction import extract_linked_entities, get_fused_paths
 from gkgaas.fagi.fagiprofile import FAGIProfile
+from gkgaas.fagi.optimizer import order_conditions
+from gkgaas.limes.links import iter_links
+from gkgaas.toolrunner import ToolRunner
+from gkgaas.utils.ntriples import format_iri
 
 logger = logging.getLogger(__name__)
 
+# Fusion modes which only output (fused) triples of linked entities
+link_only_modes = [FusionMode.AA, FusionMode.BB, FusionMode.L]
 
-class FAGIRunner(object):
+
+class FAGIRunner(ToolRunner):
     """
     Executes the FAGI data fusion tool.
+
+    If extract_linked_entities is set and the fusion mode only handles linked
+    entities, FAGI only gets the triples of the linked entities it fuses (see
+    gkgaas.fagi.extraction) instead of the whole input datasets.
     """
 
+    tool_name = 'FAGI'
+
     def __init__(
             self,
             fagi_executable_path: str,
@@ -22,29 +35,79 @@ class FAGIRunner(object):
             left_input_file_path: str,
             right_input_file_path: str,
             links_file_path: str,
-            output_dir_path: str):
-
-        if not os.path.exists(fagi_executable_path):
-            raise WrongExecutablePath(
-                f'FAGI executable path {fagi_executable_path} does not exist'
-            )
-
-        self.exec_path = fagi_executable_path
-        self.profile: FAGIProfile = profile
+            output_dir_path: str,
+            timeout: float = None,
+            memory_limit: int = None,
+            output_logger: logging.Logger = None,
+            extract_linked_entities: bool = False):
+
+        super().__init__(
+            fagi_executable_path, timeout, memory_limit, output_logger)
+
+        # Profiles get modified during the run and preconfigured profiles are
+        # shared between concurrent runs, so we work on a copy
+        self.profile: FAGIProfile = profile.copy()
         self.profile.config.left.file_path = left_input_file_path
         self.profile.config.right.file_path = right_input_file_path
         self.profile.config.links.file_path = links_file_path
         self.profile.config.target.output_dir = output_dir_path
+        self.extract_linked_entities = extract_linked_entities
+
+    def _extract_linked_entities(self, tmp_dir: str):
+        """
+        Points the input dataset settings to files in tmp_dir holding only the
+        triples of the linked entities
+        """
+        config = self.profile.config
+        left_entities = {}
+        right_entities = {}
+
+        for left_iri, right_iri in iter_links(
+                config.links.file_path, config.links.links_format):
+            left_entities[format_iri(left_iri)] = 0
+            right_entities[format_iri(right_iri)] = 0
+
+        for settings, entities, left in [
+                (config.left, left_entities, True),
+                (config.right, right_entities, False)]:
+            out_file_path = os.path.join(tmp_dir, f'{settings.id}.nt')
+            num_triples = extract_linked_entities(
+                settings.file_path,
+                entities,
+                [out_file_path],
+                paths=get_fused_paths(self.profile.rules, left))[0]
+
+            logger.debug(
+                f'Extracted {num_triples} triples of {len(entities)} linked '
+                f'entities from {settings.file_path}')
+            settings.file_path = out_file_path
 
     def run(self):
         tmp_dir = tempfile.mkdtemp()
+        config = self.profile.config
+        input_file_paths = config.left.file_path, config.right.file_path
+
+        try:
+            self._run(tmp_dir)
+        finally:
+            config.left.file_path, config.right.file_path = input_file_paths
+            shutil.rmtree(tmp_dir)
 
+        logger.debug(f'{self.exec_path} succeeded')
+
+    def _run(self, tmp_dir: str):
+        if self.extract_linked_entities and \
+                self.profile.config.target.mode in link_only_modes:
+            self._extract_linked_entities(tmp_dir)
+
+        # FAGI evaluates conditions in document order, so cheap functions
+        # are put first
         rules_file_path = os.path.join(tmp_dir, 'rules.xml')
-        self.profile.rules.to_file(rules_file_path)
+        order_conditions(self.profile.rules).to_file(rules_file_path)
 
         self.profile.config.rules = rules_file_path
         config_file_path = os.path.join(tmp_dir, 'fagi_config.xml')
-        wd = self.exec_path.rsplit(os.sep, 1)[0]
+        wd = self._get_working_dir()
 
         self.profile.config.target.statistics = \
             os.path.join(wd, self.profile.config.target.statistics)
@@ -56,22 +119,4 @@ class FAGIRunner(object):
 
         self.profile.config.to_file(config_file_path)
 
-        try:
-            output = subprocess.check_output(
-                f'{self.exec_path} {config_file_path}',
-                stderr=subprocess.STDOUT,
-                shell=True,
-                universal_newlines=True,
-                cwd=wd)
-        except subprocess.CalledProcessError as e:
-            log_msg = \
-                f'{self.exec_path} failed with return code {e.returncode}:' \
-                f'\n{e.output}'
-            logger.error(log_msg)
-
-            shutil.rmtree(tmp_dir)
-            raise RunnerExecutionFailed(log_msg)
-
-        else:
-            logger.debug(f'{self.exec_path} succeeded:\n{output}')
-            shutil.rmtree(tmp_dir)
+        self._execute([self.exec_path, config_file_path])
@@ -0,0 +1,308 @@
+import hashlib
+import heapq
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from gkgaas.fagi import FusionMode
+from gkgaas.fagi.extraction import extract_linked_entities, \
+    get_fused_paths, get_linked_entity_nodes
+from gkgaas.fagi.fagiprofile import FAGIProfile
+from gkgaas.fagi.runner import FAGIRunner
+from gkgaas.limes.links import iter_links, write_links
+from gkgaas.toolrunner import run_in_parallel
+from gkgaas.utils.ntriples import format_iri
+from gkgaas.utils.unionfind import UnionFind
+
+logger = logging.getLogger(__name__)
+
+# The input datasets whose unlinked triples go into the fused and the
+# remaining output of each fusion mode. The modes only handling linked
+# triples output no unlinked triples.
+_unlinked_outputs: Dict[FusionMode, Tuple[List[str], List[str]]] = {
+    FusionMode.AA: ([], []),
+    FusionMode.BB: ([], []),
+    FusionMode.AB: (['left', 'right'], []),
+    FusionMode.BA: (['left', 'right'], []),
+    FusionMode.A: (['left'], ['right']),
+    FusionMode.B: (['right'], ['left']),
+    FusionMode.L: ([], []),
+}
+
+
+def _create_shard_runner(
+        fagi_executable_path: str,
+        profile: FAGIProfile,
+        shard_dir: str,
+        timeout: float,
+        memory_limit: int,
+        output_logger: logging.Logger) -> FAGIRunner:
+
+    # all outputs go to the shard directory
+    profile = profile.copy()
+    target = profile.config.target
+    target.fused = os.path.basename(target.fused)
+    target.remaining = os.path.basename(target.remaining)
+    target.ambiguous = os.path.basename(target.ambiguous)
+    target.statistics = \
+        os.path.join(shard_dir, os.path.basename(target.statistics))
+
+    return FAGIRunner(
+        fagi_executable_path=fagi_executable_path,
+        profile=profile,
+        left_input_file_path=os.path.join(shard_dir, 'left.nt'),
+        right_input_file_path=os.path.join(shard_dir, 'right.nt'),
+        links_file_path=os.path.join(shard_dir, 'links'),
+        output_dir_path=shard_dir,
+        timeout=timeout,
+        memory_limit=memory_limit,
+        output_logger=output_logger)
+
+
+def get_shards(
+        links: List[Tuple[str, str]], num_shards: int) -> List[List[int]]:
+    """
+    Groups the links into at most num_shards shards s.t. linked entities are
+    in the same shard, i.e. every connected component of the link graph is in
+    one shard. The components are assigned largest first to the shard with
+    the fewest links so far. Returns the link indexes of the non-empty
+    shards.
+    """
+    left_ids: Dict[str, int] = {}
+    right_ids: Dict[str, int] = {}
+
+    for left_iri, right_iri in links:
+        left_ids.setdefault(left_iri, len(left_ids))
+        right_ids.setdefault(right_iri, len(right_ids))
+
+    # left entities are nodes 0, ..., len(left_ids) - 1, right ones follow
+    lefts = np.array(
+        [left_ids[left_iri] for left_iri, _ in links], dtype=np.int64)
+    rights = np.array(
+        [len(left_ids) + right_ids[right_iri] for _, right_iri in links],
+        dtype=np.int64)
+
+    components = UnionFind(len(left_ids) + len(right_ids))
+    components.union_all(lefts, rights)
+
+    component_links = defaultdict(list)
+    for i, root in enumerate(components.get_roots()[lefts].tolist()):
+        component_links[root].append(i)
+
+    # (number of links, shard index)
+    shard_loads = [(0, shard) for shard in range(num_shards)]
+    shards = [[] for _ in range(num_shards)]
+
+    for link_indexes in sorted(
+            component_links.values(), key=len, reverse=True):
+        num_links, shard = heapq.heappop(shard_loads)
+        shards[shard].extend(link_indexes)
+        heapq.heappush(shard_loads, (num_links + len(link_indexes), shard))
+
+    return [sorted(shard) for shard in shards if shard]
+
+
+class ShardedFAGIRunner(FAGIRunner):
+    """
+    Runs FAGI on shards of the linked entities instead of on the whole input
+    datasets at once.
+
+    The links are grouped into num_shards shards along the connected
+    components of the link graph (see get_shards()), s.t. all entities one
+    entity can be fused with are in the same shard. For every shard, the
+    triples of its linked entities and of the nodes they point to (e.g. their
+    geometry and name nodes, see extract_linked_entities()) are extracted
+    from both input datasets in one streaming pass per dataset and hop, and
+    FAGI fuses the shards with up to max_workers processes at a time, each
+    with the given timeout and memory limit and holding one of the given
+    slots (see run_in_parallel()), s.t. the shard runs count towards the
+    service-wide number of FAGI processes. Only the triples FAGI reads are
+    extracted if the fusion rules restrict them (see get_fused_paths()).
+
+    The unlinked triples, which no FAGI run saw, are written to the outputs
+    the fusion mode writes them to, followed by the shards' fused, remaining
+    and ambiguous outputs, streamed without duplicates of the triples of
+    nodes shared by several shards (see _merge_output()). Per-shard
+    statistics are kept in the shard directories only and not merged.
+    """
+
+    def __init__(
+            self,
+            fagi_executable_path: str,
+            profile: FAGIProfile,
+            left_input_file_path: str,
+            right_input_file_path: str,
+            links_file_path: str,
+            output_dir_path: str,
+            timeout: float = None,
+            memory_limit: int = None,
+            output_logger: logging.Logger = None,
+            num_shards: int = 4,
+            max_workers: int = 2,
+            slots: threading.BoundedSemaphore = None):
+
+        super().__init__(
+            fagi_executable_path,
+            profile,
+            left_input_file_path,
+            right_input_file_path,
+            links_file_path,
+            output_dir_path,
+            timeout,
+            memory_limit,
+            output_logger)
+
+        self.num_shards = num_shards
+        self.max_workers = max_workers
+        self.slots = slots
+
+    def _write_shards(self, shards_dir: str) -> Tuple[List[str], Set[str]]:
+        """
+        Writes the links and the left and right dataset of every shard into
+        a directory of its own and the unlinked triples of the datasets the
+        fusion mode outputs them of into shards_dir. Returns the shard
+        directories and the nodes extracted into several shards, e.g.
+        category resources.
+        """
+        config = self.profile.config
+        links = list(iter_links(config.links.file_path,
+                                config.links.links_format))
+        shards = get_shards(links, self.num_shards)
+        shard_dirs = [
+            os.path.join(shards_dir, str(shard))
+            for shard in range(len(shards))]
+
+        entities = {'left': {}, 'right': {}}
+
+        for shard, (shard_dir, link_indexes) in \
+                enumerate(zip(shard_dirs, shards)):
+            os.mkdir(shard_dir)
+
+            for i in link_indexes:
+                left_iri, right_iri = links[i]
+                entities['left'][format_iri(left_iri)] = shard
+                entities['right'][format_iri(right_iri)] = shard
+
+            write_links(
+                [links[i] + (1.0,) for i in link_indexes],
+                os.path.join(shard_dir, 'links'),
+                config.links.links_format)
+
+        unlinked_datasets = set(sum(_unlinked_outputs[config.target.mode], []))
+        shared_nodes = set()
+
+        for dataset, file_path in [
+                ('left', config.left.file_path),
+                ('right', config.right.file_path)]:
+            paths = get_fused_paths(self.profile.rules, dataset == 'left')
+            nodes = get_linked_entity_nodes(
+                file_path, entities[dataset], paths)
+            shared_nodes.update(
+                [node for node, shards in nodes.items() if len(shards) > 1])
+
+            extract_linked_entities(
+                file_path,
+                entities[dataset],
+                [os.path.join(shard_dir, f'{dataset}.nt')
+                 for shard_dir in shard_dirs],
+                os.path.join(shards_dir, f'{dataset}_unlinked.nt')
+                if dataset in unlinked_datasets else None,
+                paths,
+                nodes)
+
+        logger.info(
+            f'Fusing {len(links)} links in {len(shard_dirs)} shards')
+
+        return shard_dirs, shared_nodes
+
+    def _fuse_shards(self, shard_dirs: List[str]):
+        run_in_parallel(
+            [_create_shard_runner(
+                self.exec_path,
+                self.profile,
+                shard_dir,
+                self.timeout,
+                self.memory_limit,
+                self.output_logger)
+             for shard_dir in shard_dirs],
+            self.max_workers,
+            self.slots)
+
+    @staticmethod
+    def _merge_output(
+            shard_dirs: List[str],
+            file_name: str,
+            unlinked_file_paths: List[str],
+            shared_nodes: Set[str],
+            out_file_path: str):
+        """
+        Streams the unlinked triples and the shards' output triples into the
+        out file. The triples of nodes shared by several shards, e.g.
+        category resources, are in the output of each of these shards and
+        are written once only. Just the hashes of these triples are held in
+        memory. The unlinked triples are never in a shard, as the extraction
+        puts all triples of the shards' nodes into the shards.
+        """
+        shared_line_hashes = set()
+
+        with open(out_file_path, 'w', encoding='utf-8') as out_file:
+            for file_path in unlinked_file_paths:
+                with open(file_path, encoding='utf-8') as in_file:
+                    shutil.copyfileobj(in_file, out_file)
+
+            for shard_dir in shard_dirs:
+                file_path = os.path.join(shard_dir, file_name)
+
+                if not os.path.exists(file_path):
+                    continue
+
+                with open(file_path, encoding='utf-8') as in_file:
+                    for line in in_file:
+                        if not line.strip():
+                            continue
+
+                        if line.split(maxsplit=1)[0] in shared_nodes:
+                            line_hash = hashlib.blake2b(
+                                line.encode('utf-8'), digest_size=16).digest()
+
+                            if line_hash in shared_line_hashes:
+                                continue
+
+                            shared_line_hashes.add(line_hash)
+
+                        out_file.write(line)
+
+    def run(self):
+        target = self.profile.config.target
+        shards_dir = tempfile.mkdtemp()
+
+        try:
+            shard_dirs, shared_nodes = self._write_shards(shards_dir)
+            self._fuse_shards(shard_dirs)
+
+            fused_datasets, remaining_datasets = \
+                _unlinked_outputs[target.mode]
+
+            for file_name, datasets in [
+                    (target.fused, fused_datasets),
+                    (target.remaining, remaining_datasets),
+                    (target.ambiguous, [])]:
+
+                self._merge_output(
+                    shard_dirs,
+                    os.path.basename(file_name),
+                    [os.path.join(shards_dir, f'{dataset}_unlinked.nt')
+                     for dataset in datasets],
+                    shared_nodes,
+                    os.path.join(target.output_dir, file_name))
+
+        finally:
+            shutil.rmtree(shards_dir)
+
+        logger.debug(f'{self.exec_path} succeeded on all shards')
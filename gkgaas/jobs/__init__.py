@@ -0,0 +1,190 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Dict, Optional
+
+from gkgaas.toolrunner import get_output_logger, close_output_logger
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+
+class JobStage(Enum):
+    QUEUED = 'queued'
+    CONVERSION = 'conversion'
+    LINKING = 'linking'
+    FUSION = 'fusion'
+    REGISTRATION = 'registration'
+    DONE = 'done'
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job(object):
+    """
+    Bookkeeping for one background pipeline run. The pipeline function moves
+    the job from stage to stage via enter_stage() which also records how long
+    each stage took (in seconds).
+    """
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = JobStatus.PENDING
+        self.stage = JobStage.QUEUED
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.stage_durations: Dict[str, float] = {}
+        self.result = None
+        self.error: Optional[str] = None
+        # Receives the output of the external tools run for this job
+        self.output_logger: Optional[logging.Logger] = None
+
+        self._stage_start = time.monotonic()
+
+    def _close_stage(self):
+        now = time.monotonic()
+        self.stage_durations[self.stage.value] = now - self._stage_start
+        self._stage_start = now
+
+    def enter_stage(self, stage: JobStage):
+        self._close_stage()
+        self.stage = stage
+        logger.debug(f'Job {self.id} entered stage {stage.value}')
+
+    def _start(self):
+        self.status = JobStatus.RUNNING
+        self.started_at = datetime.utcnow()
+
+    def _finish(self, status: JobStatus):
+        self._close_stage()
+
+        if status == JobStatus.SUCCEEDED:
+            self.stage = JobStage.DONE
+
+        self.status = status
+        self.finished_at = datetime.utcnow()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+class JobManager(object):
+    """
+    Runs pipeline functions on a bounded pool of background threads.
+
+    The external tools run as subprocesses, so threads are sufficient here.
+    At most max_workers jobs run at the same time and at most
+    max_pending_jobs further jobs may wait for a free worker; submitting more
+    raises JobQueueFull. Only the max_retained_jobs most recent finished jobs
+    are kept for status lookups.
+
+    If a log directory is given, the output of the external tools run by a job
+    goes to a rotating log file <log_dir>/<job_id>.log.
+    """
+
+    def __init__(
+            self,
+            max_workers: int = 2,
+            max_pending_jobs: int = 32,
+            max_retained_jobs: int = 1000,
+            log_dir: str = None,
+            log_max_bytes: int = 100 * 1024 ** 2,
+            log_backup_count: int = 3):
+
+        self.max_workers = max_workers
+        self.max_pending_jobs = max_pending_jobs
+        self.max_retained_jobs = max_retained_jobs
+        self.log_dir = log_dir
+        self.log_max_bytes = log_max_bytes
+        self.log_backup_count = log_backup_count
+
+        if log_dir is not None:
+            os.makedirs(log_dir, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='gkgaas-job')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _num_unfinished(self) -> int:
+        return len([j for j in self._jobs.values() if not j.finished])
+
+    def _prune(self):
+        finished_ids = [j.id for j in self._jobs.values() if j.finished]
+
+        for job_id in finished_ids[:max(
+                0, len(finished_ids) - self.max_retained_jobs)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job, fn: Callable, *args, **kwargs):
+        job._start()
+
+        if self.log_dir is not None:
+            job.output_logger = get_output_logger(
+                os.path.join(self.log_dir, f'{job.id}.log'),
+                self.log_max_bytes,
+                self.log_backup_count)
+
+        try:
+            job.result = fn(job, *args, **kwargs)
+
+        except Exception as e:
+            # HTTP exceptions raised by the pipeline carry their message in
+            # the detail attribute
+            job.error = getattr(e, 'detail', None) or str(e)
+            logger.error(f'Job {job.id} failed in stage {job.stage.value}: '
+                         f'{job.error}')
+            job._finish(JobStatus.FAILED)
+
+        else:
+            job._finish(JobStatus.SUCCEEDED)
+
+        finally:
+            if job.output_logger is not None:
+                close_output_logger(job.output_logger)
+
+        with self._lock:
+            self._prune()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Job:
+        """
+        Schedules fn(job, *args, **kwargs) for background execution and
+        returns the corresponding job right away. The return value of fn is
+        stored as the job result.
+        """
+        with self._lock:
+            if self._num_unfinished() >= \
+                    self.max_workers + self.max_pending_jobs:
+                raise JobQueueFull(
+                    f'{self.max_pending_jobs} jobs are already waiting for '
+                    f'execution')
+
+            job = Job(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, fn, *args, **kwargs)
+
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,271 @@
+import hashlib
+from array import array
+from typing import Iterable, List
+
+import numpy as np
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.links import iter_links, owl_same_as_iri
+from gkgaas.utils.ntriples import format_iri, get_iri, is_iri
+from gkgaas.utils.unionfind import UnionFind
+
+
+def _hash_iri(iri: str) -> int:
+    """
+    Returns a 64 bit hash of an IRI as signed integer
+    """
+    return int.from_bytes(
+        hashlib.blake2b(iri.encode('utf-8'), digest_size=8).digest(),
+        'little',
+        signed=True)
+
+
+def _hash_iris(iris: List[str]) -> np.ndarray:
+    return np.array([_hash_iri(iri) for iri in iris], dtype=np.int64)
+
+
+def _iter_chunks(items: Iterable, chunk_size: int) -> Iterable[list]:
+    chunk = []
+
+    for item in items:
+        chunk.append(item)
+
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+class SameAsClusters(object):
+    """
+    The clusters of resources linked by owl:sameAs, i.e. the connected
+    components of a link graph, with one canonical IRI per cluster.
+
+    To scale to tens of millions of links, IRIs are interned by 64 bit hashes
+    instead of by their strings: the clusters are kept as the sorted hashes
+    of all linked IRIs and the cluster index of each, only the canonical IRIs
+    are kept as strings (in one UTF-8 byte array with the IRIs' offsets).
+    Hash collisions are unlikely, but not impossible.
+
+    The canonical IRI of a cluster is the IRI read first from the link files,
+    reading the right (target) IRI of a link before the left one. Passing the
+    link files oldest first hence keeps the IRIs already in the topio KG
+    canonical.
+    """
+
+    def __init__(
+            self,
+            node_hashes: np.ndarray,
+            node_clusters: np.ndarray,
+            iri_bytes: np.ndarray,
+            iri_offsets: np.ndarray):
+
+        self.node_hashes = node_hashes
+        self.node_clusters = node_clusters
+        self.iri_bytes = iri_bytes
+        self.iri_offsets = iri_offsets
+
+    @classmethod
+    def from_link_files(
+            cls,
+            links_file_paths: List[str],
+            links_format: LinksFormat = LinksFormat.NT,
+            chunk_size: int = 100000) -> 'SameAsClusters':
+        """
+        Builds the clusters in one pass over the link files, keeping 16 bytes
+        per link. A second pass reads the strings of the canonical IRIs.
+        """
+        def iter_iris():
+            for file_path in links_file_paths:
+                for left_iri, right_iri in iter_links(file_path, links_format):
+                    yield right_iri
+                    yield left_iri
+
+        # the IRIs' hashes in reading order, right and left IRIs alternating
+        hashes = array('q')
+        for iris in _iter_chunks(iter_iris(), chunk_size):
+            hashes.extend([_hash_iri(iri) for iri in iris])
+        hashes = np.frombuffer(hashes, dtype=np.int64)
+
+        node_hashes, nodes = np.unique(hashes, return_inverse=True)
+        sets = UnionFind(len(node_hashes))
+        sets.union_all(nodes[0::2], nodes[1::2])
+        roots = sets.get_roots()
+
+        # the canonical IRI of a cluster is the IRI read first
+        first_reads = np.full(len(node_hashes), len(hashes), dtype=np.int64)
+        np.minimum.at(first_reads, nodes, np.arange(len(hashes)))
+        cluster_first_reads = np.full(len(node_hashes), len(hashes))
+        np.minimum.at(cluster_first_reads, roots, first_reads)
+
+        # clusters are numbered in the order their canonical IRIs are read
+        root_nodes = np.flatnonzero(sets.sizes)
+        cluster_order = np.argsort(cluster_first_reads[root_nodes])
+        root_clusters = np.empty(len(node_hashes), dtype=np.int64)
+        root_clusters[root_nodes[cluster_order]] = \
+            np.arange(len(root_nodes))
+        node_clusters = root_clusters[roots]
+
+        canonical_hashes = \
+            hashes[cluster_first_reads[root_nodes[cluster_order]]]
+
+        return cls(
+            node_hashes,
+            node_clusters,
+            *cls._read_canonical_iris(
+                canonical_hashes, iter_iris(), chunk_size))
+
+    @staticmethod
+    def _read_canonical_iris(
+            canonical_hashes: np.ndarray,
+            iris: Iterable[str],
+            chunk_size: int):
+
+        hash_order = np.argsort(canonical_hashes)
+        sorted_hashes = canonical_hashes[hash_order]
+        canonical_iris = [''] * len(canonical_hashes)
+
+        for chunk in _iter_chunks(iris, chunk_size):
+            chunk_hashes = _hash_iris(chunk)
+            positions = np.searchsorted(sorted_hashes, chunk_hashes)
+            positions[positions == len(sorted_hashes)] = 0
+            found = sorted_hashes[positions] == chunk_hashes
+
+            for i in np.flatnonzero(found).tolist():
+                canonical_iris[hash_order[positions[i]]] = chunk[i]
+
+        iri_bytes = [iri.encode('utf-8') for iri in canonical_iris]
+        iri_offsets = np.cumsum(
+            [0] + [len(iri) for iri in iri_bytes], dtype=np.int64)
+
+        return \
+            np.frombuffer(b''.join(iri_bytes), dtype=np.uint8), iri_offsets
+
+    @classmethod
+    def load(cls, file_path: str) -> 'SameAsClusters':
+        with np.load(file_path, allow_pickle=False) as npz:
+            return cls(
+                npz['node_hashes'],
+                npz['node_clusters'],
+                npz['iri_bytes'],
+                npz['iri_offsets'])
+
+    def save(self, file_path: str):
+        # file objects keep NumPy from appending the .npz suffix
+        with open(file_path, 'wb') as out_file:
+            np.savez(
+                out_file,
+                node_hashes=self.node_hashes,
+                node_clusters=self.node_clusters,
+                iri_bytes=self.iri_bytes,
+                iri_offsets=self.iri_offsets)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of clusters
+        """
+        return len(self.iri_offsets) - 1
+
+    def get_canonical_iri_of_cluster(self, cluster: int) -> str:
+        start, end = self.iri_offsets[cluster], self.iri_offsets[cluster + 1]
+
+        return self.iri_bytes[start:end].tobytes().decode('utf-8')
+
+    def _get_clusters(self, iris: List[str]) -> np.ndarray:
+        """
+        Returns the cluster indexes of the IRIs, -1 for IRIs of no cluster
+        """
+        if len(self.node_hashes) == 0:
+            return np.full(len(iris), -1, dtype=np.int64)
+
+        hashes = _hash_iris(iris)
+        positions = np.searchsorted(self.node_hashes, hashes)
+        positions[positions == len(self.node_hashes)] = 0
+
+        return np.where(
+            self.node_hashes[positions] == hashes,
+            self.node_clusters[positions],
+            -1)
+
+    def get_canonical_iri(self, iri: str) -> str:
+        """
+        Returns the canonical IRI of the IRI's cluster or the IRI itself if it
+        is not linked
+        """
+        cluster = int(self._get_clusters([iri])[0])
+
+        if cluster < 0:
+            return iri
+
+        return self.get_canonical_iri_of_cluster(cluster)
+
+    def smush(
+            self,
+            nt_file_path: str,
+            out_file_path: str,
+            chunk_size: int = 100000) -> int:
+        """
+        Streams an N-Triples file, rewriting subject and object IRIs onto the
+        canonical IRIs of their clusters, and returns the number of rewritten
+        triples. owl:sameAs statements which became reflexive are dropped.
+        Duplicate triples are not removed.
+        """
+        same_as_term = format_iri(owl_same_as_iri)
+        num_rewritten = 0
+
+        with open(nt_file_path, encoding='utf-8') as in_file, \
+                open(out_file_path, 'w', encoding='utf-8') as out_file:
+
+            for lines in _iter_chunks(in_file, chunk_size):
+                triples = []
+                iris = []
+
+                for line in lines:
+                    stripped = line.strip()
+
+                    if not stripped or stripped.startswith('#'):
+                        triples.append(None)
+                        continue
+
+                    subj, pred, obj = stripped.split(maxsplit=2)
+                    triples.append((subj, pred, obj))
+                    iris.extend([
+                        get_iri(subj) if is_iri(subj) else '',
+                        get_iri(obj[:obj.index('>') + 1])
+                        if is_iri(obj) else ''])
+
+                clusters = iter(self._get_clusters(iris).tolist())
+
+                for line, triple in zip(lines, triples):
+                    if triple is None:
+                        out_file.write(line)
+                        continue
+
+                    subj, pred, obj = triple
+                    subj_cluster, obj_cluster = next(clusters), next(clusters)
+
+                    if pred == same_as_term and subj_cluster >= 0 and \
+                            subj_cluster == obj_cluster:
+                        num_rewritten += 1
+                        continue
+
+                    new_subj, new_obj = subj, obj
+
+                    if subj_cluster >= 0:
+                        new_subj = format_iri(
+                            self.get_canonical_iri_of_cluster(subj_cluster))
+
+                    if obj_cluster >= 0:
+                        new_obj = format_iri(
+                            self.get_canonical_iri_of_cluster(obj_cluster)) \
+                            + obj[obj.index('>') + 1:]
+
+                    if new_subj == subj and new_obj == obj:
+                        out_file.write(line)
+                    else:
+                        num_rewritten += 1
+                        out_file.write(f'{new_subj} {pred} {new_obj}\n')
+
+        return num_rewritten
@@ -1,8 +1,11 @@
+import copy
 import os
 from dataclasses import dataclass
 from enum import Enum
 from typing import List
 
+from gkgaas.utils.filecache import get_fingerprint
+
 
 class DatasetType(Enum):
     SPARQL = 'SPARQL'
@@ -43,6 +46,15 @@ class LIMESMLAlgorithmType(Enum):
     UNSUPERVISED = 'unsupervised'
 
 
+class LinkerType(Enum):
+    """
+    Whether a profile is run by LIMES or by the in-process linker (see
+    gkgaas.limes.native.NativeLinker)
+    """
+    LIMES = 'LIMES'
+    NATIVE = 'native'
+
+
 class LIMESOutputFormat(Enum):
     TAB = 'TAB'
     CSV = 'CSV'
@@ -290,35 +302,54 @@ class LIMESProfile:
     execution: LIMESExecution = LIMESExecution()
     ml_algorithm: LIMESMLAlgorithm = None
     granularity: int = None
+    # not part of the LIMES config
+    linker: LinkerType = LinkerType.LIMES
 
-    def to_config_file(self, config_file_path):
-        with open(config_file_path, 'w') as config_file:
-            config_file.write(self._metadata + os.linesep)
+    def to_config_str(self) -> str:
+        config_str = self._metadata + os.linesep
 
-            if self.prefixes is not None:
-                for prefix in self.prefixes:
-                    config_file.write(str(prefix) + os.linesep)
+        if self.prefixes is not None:
+            for prefix in self.prefixes:
+                config_str += str(prefix) + os.linesep
 
-            config_file.write(str(self.source) + os.linesep)
-            config_file.write(str(self.target) + os.linesep)
+        config_str += str(self.source) + os.linesep
+        config_str += str(self.target) + os.linesep
 
-            config_file.write(
-                f'    <METRIC>{self.metric}</METRIC>' + os.linesep)
+        config_str += f'    <METRIC>{self.metric}</METRIC>' + os.linesep
 
-            if self.ml_algorithm is not None:
-                config_file.write(str(self.ml_algorithm) + os.linesep)
+        if self.ml_algorithm is not None:
+            config_str += str(self.ml_algorithm) + os.linesep
 
-            config_file.write(str(self.acceptance_condition) + os.linesep)
-            config_file.write(str(self.review_condition) + os.linesep)
+        config_str += str(self.acceptance_condition) + os.linesep
+        config_str += str(self.review_condition) + os.linesep
 
-            config_file.write(str(self.execution) + os.linesep)
+        config_str += str(self.execution) + os.linesep
 
-            if self.granularity is not None:
-                config_file.write(
-                    f'    <GRANULARITY>{self.granularity}</GRANULARITY>' +
-                    os.linesep)
+        if self.granularity is not None:
+            config_str += \
+                f'    <GRANULARITY>{self.granularity}</GRANULARITY>' + \
+                os.linesep
 
-            config_file.write(
-                f'    <OUTPUT>{self.output_format.value}</OUTPUT>' + os.linesep)
+        config_str += \
+            f'    <OUTPUT>{self.output_format.value}</OUTPUT>' + os.linesep
 
-            config_file.write(self._closing)
+        config_str += self._closing
+
+        return config_str
+
+    def to_config_file(self, config_file_path):
+        with open(config_file_path, 'w') as config_file:
+            config_file.write(self.to_config_str())
+
+    def get_fingerprint(self) -> str:
+        """
+        Returns a hash of the rendered config which does not depend on the
+        input datasets and the output file locations of a particular run
+        """
+        profile = copy.deepcopy(self)
+        profile.source.endpoint = ''
+        profile.target.endpoint = ''
+        profile.acceptance_condition.file_path = ''
+        profile.review_condition.file_path = ''
+
+        return get_fingerprint(profile.to_config_str())
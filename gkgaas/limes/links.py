@@ -0,0 +1,117 @@
+from typing import Iterable, Iterator, Tuple
+
+from gkgaas.fagi import LinksFormat
+
+owl_same_as_iri = 'http://www.w3.org/2002/07/owl#sameAs'
+
+# (source IRI, target IRI, confidence score)
+Link = Tuple[str, str, float]
+
+
+def _strip_angle_brackets(iri_str: str) -> str:
+    if iri_str.startswith('<') and iri_str.endswith('>'):
+        return iri_str[1:-1]
+
+    return iri_str
+
+
+def iter_limes_links(limes_links_file_path: str) -> Iterator[Link]:
+    """
+    Reads the links of a LIMES output file in TAB format one by one. The file
+    content looks like this:
+
+    <http://slipo.eu/id/poi/5f8cc6e3-bf91-3f7b-ad1a-23e480cd74d1>	<https://sws.geonames.org/9294554/>	0.9321554652991914
+    <http://slipo.eu/id/poi/5f8cc6e3-bf91-3f7b-ad1a-23e480cd74d1>	<https://sws.geonames.org/9300183/>	0.9985261319810942
+
+    The IRIs are returned without angle brackets.
+    """
+    with open(limes_links_file_path, 'r') as links_file:
+        for line in links_file:
+            if line.strip() == '':
+                continue
+
+            left_iri_str, right_iri_str, confidence_score_str = line.split()
+
+            yield \
+                _strip_angle_brackets(left_iri_str), \
+                _strip_angle_brackets(right_iri_str), \
+                float(confidence_score_str)
+
+
+def write_links(
+        links: Iterable[Link],
+        out_file_path: str,
+        links_format: LinksFormat = LinksFormat.NT,
+        keep_confidence: bool = False,
+        append: bool = False):
+    """
+    Writes (or appends) links line by line in one of the links formats FAGI
+    can read, i.e.
+
+    - LinksFormat.NT: N-Triples owl:sameAs statements, e.g.
+        <http://ex.com/a> <http://www.w3.org/2002/07/owl#sameAs> <http://ex.com/b> .
+    - LinksFormat.CSV, .CSV_UNIQUE_LINKS and .CSV_ENSEMBLES: comma-separated
+      IRI pairs, e.g.
+        http://ex.com/a,http://ex.com/b
+      If keep_confidence is set the confidence score is written as third
+      column. Whether the links are unique or form ensembles is up to the
+      caller.
+
+    N-Triples cannot hold a confidence score, so keep_confidence is only
+    supported for the CSV formats.
+    """
+    if links_format == LinksFormat.NT:
+        if keep_confidence:
+            raise ValueError(
+                'Confidence scores can only be kept in CSV links formats')
+
+        line_template = '<{}> <' + owl_same_as_iri + '> <{}> .\n'
+    elif keep_confidence:
+        line_template = '{},{},{}\n'
+    else:
+        line_template = '{},{}\n'
+
+    with open(out_file_path, 'a' if append else 'w') as out_file:
+        for left_iri, right_iri, confidence in links:
+            out_file.write(line_template.format(left_iri, right_iri, confidence))
+
+
+def convert_limes_links(
+        limes_links_file_path: str,
+        out_file_path: str,
+        links_format: LinksFormat = LinksFormat.NT,
+        keep_confidence: bool = False):
+    """
+    Converts a LIMES TAB output file into one of FAGI's links formats (see
+    write_links()) at constant memory
+    """
+    write_links(
+        iter_limes_links(limes_links_file_path),
+        out_file_path,
+        links_format,
+        keep_confidence)
+
+
+def iter_links(
+        links_file_path: str,
+        links_format: LinksFormat = LinksFormat.NT) \
+        -> Iterator[Tuple[str, str]]:
+    """
+    Reads the (left IRI, right IRI) pairs of a links file in one of the links
+    formats write_links() writes. Confidence score columns are ignored.
+    """
+    with open(links_file_path, 'r', encoding='utf-8') as links_file:
+        for line in links_file:
+            line = line.strip()
+
+            if not line or line.startswith('#'):
+                continue
+
+            if links_format == LinksFormat.NT:
+                left_iri_str, _, right_iri_str = line.split(maxsplit=3)[:3]
+            else:
+                left_iri_str, right_iri_str = line.split(',', 2)[:2]
+
+            yield \
+                _strip_angle_brackets(left_iri_str), \
+                _strip_angle_brackets(right_iri_str)
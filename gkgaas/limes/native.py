@@ -0,0 +1,732 @@
+import copy
+import logging
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.limesprofile import LIMESProfile
+from gkgaas.limes.links import write_links
+from gkgaas.limes.scores import ScoredLinks
+from gkgaas.limes.properties import parse_property, parse_restriction, \
+    load_property_values, UnsupportedPropertyDefinition
+
+logger = logging.getLogger(__name__)
+
+earth_radius_km = 6371.0
+
+_measure_pattern = re.compile(
+    r'^(?P<name>\w+)\((?P<source>[^,]+),(?P<target>[^,]+)\)'
+    r'(?:\|(?P<threshold>[0-9.]+))?$')
+
+_wkt_point_pattern = re.compile(
+    r'POINT\s*\(\s*(?P<lon>[-+0-9.eE]+)\s+(?P<lat>[-+0-9.eE]+)\s*\)',
+    re.IGNORECASE)
+
+# Point set distances which are all the orthodromic distance for points
+_geo_measures = {
+    'geo_hausdorff', 'geo_naive_hausdorff', 'geo_indexed_hausdorff',
+    'geo_fast_hausdorff', 'geo_centroid_indexed_hausdorff',
+    'geo_scan_indexed_hausdorff', 'geo_min', 'geo_max', 'geo_mean',
+    'geo_avg', 'geo_sum_of_min', 'geo_link', 'geo_frechet',
+    'geo_surjection', 'geo_fairsurjection', 'geo_orthodromic'}
+_euclidean_measure = 'euclidean'
+_trigram_measure = 'trigrams'
+
+
+class UnsupportedLinkingProfile(Exception):
+    pass
+
+
+@dataclass
+class _Measure:
+    name: str
+    source_properties: List[str]
+    target_properties: List[str]
+    threshold: Optional[float]
+
+
+def _get_properties(arg: str) -> List[str]:
+    """
+    'x.lat|x.long' or 'x.lat|long' --> ['lat', 'long']
+    """
+    return [p.split('.')[-1] for p in arg.split('|')]
+
+
+def parse_metric(metric: str, strict: bool = True) -> List[_Measure]:
+    """
+    Parses a LIMES metric which is a single measure or an AND combination of
+    measures, e.g. 'AND(trigrams(x.label,y.label)|0.8,
+    Geo_Hausdorff(x.wkt,y.wkt)|0.8)'. Other metrics raise
+    UnsupportedLinkingProfile, as do measures the NativeLinker does not
+    implement unless strict is False.
+    """
+    metric = re.sub(r'\s+', '', metric)
+
+    if metric.upper().startswith('AND(') and metric.endswith(')'):
+        measure_strs = []
+        depth = 0
+        start = 4
+
+        for i, char in enumerate(metric[4:-1], 4):
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif char == ',' and depth == 0:
+                measure_strs.append(metric[start:i])
+                start = i + 1
+
+        measure_strs.append(metric[start:-1])
+    else:
+        measure_strs = [metric]
+
+    measures = []
+
+    for measure_str in measure_strs:
+        match = _measure_pattern.match(measure_str)
+
+        if match is None:
+            raise UnsupportedLinkingProfile(
+                f'Measure {measure_str} is not supported')
+
+        name = match.group('name').lower()
+
+        if strict and name not in _geo_measures and \
+                name not in [_euclidean_measure, _trigram_measure]:
+            raise UnsupportedLinkingProfile(
+                f'Measure {match.group("name")} is not supported')
+
+        threshold = match.group('threshold')
+        measures.append(_Measure(
+            name=name,
+            source_properties=_get_properties(match.group('source')),
+            target_properties=_get_properties(match.group('target')),
+            threshold=None if threshold is None else float(threshold)))
+
+    return measures
+
+
+def is_distance_measure(measure: _Measure) -> bool:
+    return is_geo_measure(measure) or measure.name == _euclidean_measure
+
+
+def is_geo_measure(measure: _Measure) -> bool:
+    return measure.name in _geo_measures
+
+
+def get_max_distance(measure: _Measure, profile: LIMESProfile) -> float:
+    """
+    Returns the maximal distance (in km for the Geo measures) a link found
+    with the given distance measure of the profile's metric can span, i.e.
+    the distance at which the similarity 1 / (1 + d) still reaches the
+    measure's threshold and the review threshold
+    """
+    min_similarity = max(
+        measure.threshold or 0,
+        min(profile.review_condition.threshold,
+            profile.acceptance_condition.threshold))
+
+    if min_similarity <= 0:
+        raise UnsupportedLinkingProfile(
+            'The distance measure needs a threshold above 0')
+
+    return 1 / min_similarity - 1
+
+
+def get_distance_measure(profile: LIMESProfile) -> _Measure:
+    """
+    Returns the distance measure (a Geo_* measure on WKT or euclidean on
+    lat|long) of a metric which bounds the distance of links, i.e. a metric
+    being this measure (with a threshold) or an AND combination with it.
+    Other metrics raise UnsupportedLinkingProfile.
+    """
+    distance_measures = [
+        m for m in parse_metric(profile.metric, strict=False)
+        if is_distance_measure(m)]
+
+    if len(distance_measures) != 1:
+        raise UnsupportedLinkingProfile(
+            'The metric needs exactly one distance measure')
+
+    distance_measure = distance_measures[0]
+    num_properties = 1 if is_geo_measure(distance_measure) else 2
+
+    if len(distance_measure.source_properties) != num_properties or \
+            len(distance_measure.target_properties) != num_properties:
+        raise UnsupportedLinkingProfile(
+            'Distance measures are only supported on WKT or lat|long '
+            'properties')
+
+    # validates the threshold
+    get_max_distance(distance_measure, profile)
+
+    return distance_measure
+
+
+def get_buffer(max_distance: float, is_geo: bool, lat: float) \
+        -> Tuple[float, float]:
+    """
+    Returns the latitude and longitude degrees covering the maximal link
+    distance (see get_max_distance()) around points at the given latitude.
+    The euclidean measure works on degrees anyway.
+    """
+    if not is_geo:
+        return max_distance, max_distance
+
+    lat_buffer = math.degrees(max_distance / earth_radius_km)
+
+    # Longitude degrees get shorter towards the poles
+    max_abs_lat = min(abs(lat) + lat_buffer, 89.0)
+
+    return lat_buffer, lat_buffer / math.cos(math.radians(max_abs_lat))
+
+
+def get_point(
+        entity_values: Dict[str, List[str]],
+        coordinate_properties: List[str],
+        is_geo: bool) -> Optional[Tuple[float, float]]:
+    """
+    Returns the (lat, long) pair of an entity, taken from the first WKT point
+    (is_geo) or the first lat and long values
+    """
+    try:
+        if is_geo:
+            for wkt in entity_values.get(coordinate_properties[0], []):
+                match = _wkt_point_pattern.search(wkt)
+
+                if match is not None:
+                    return float(match.group('lat')), \
+                        float(match.group('lon'))
+
+            return None
+
+        lat_values = entity_values.get(coordinate_properties[0])
+        long_values = entity_values.get(coordinate_properties[1])
+
+        if not lat_values or not long_values:
+            return None
+
+        return float(lat_values[0]), float(long_values[0])
+
+    except ValueError:
+        return None
+
+
+def _get_wkt_coordinates(wkt: str) -> List[Tuple[float, float]]:
+    """
+    Returns the (lat, long) pairs of all vertices of a WKT geometry of any
+    type, optionally preceded by a CRS IRI
+    """
+    coordinates = []
+    start = wkt.find('(')
+
+    if start < 0:
+        # EMPTY geometries
+        return coordinates
+
+    for part in re.split(r'[(),]', wkt[start:]):
+        values = part.split()
+
+        if len(values) < 2:
+            continue
+
+        try:
+            coordinates.append((float(values[1]), float(values[0])))
+        except ValueError:
+            # geometry type of a geometry collection member, e.g. 'POINT'
+            continue
+
+    return coordinates
+
+
+def get_bbox(
+        entity_values: Dict[str, List[str]],
+        coordinate_properties: List[str],
+        is_geo: bool) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Returns the bounding box (min lat, min long, max lat, max long) of all
+    WKT geometries of an entity (is_geo) or the point of its first lat and
+    long values
+    """
+    if not is_geo:
+        point = get_point(entity_values, coordinate_properties, is_geo)
+
+        return None if point is None else point + point
+
+    coordinates = [
+        c for wkt in entity_values.get(coordinate_properties[0], [])
+        for c in _get_wkt_coordinates(wkt)]
+
+    if not coordinates:
+        return None
+
+    lats, lons = zip(*coordinates)
+
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+def get_trigrams(label: str) -> List[str]:
+    """
+    Returns the distinct trigrams of a label padded with two spaces on both
+    sides
+    """
+    padded = '  ' + label + '  '
+
+    return sorted(set([padded[i:i + 3] for i in range(len(padded) - 2)]))
+
+
+def haversine_distance(
+        lat_1: np.ndarray,
+        lon_1: np.ndarray,
+        lat_2: np.ndarray,
+        lon_2: np.ndarray) -> np.ndarray:
+    """
+    Orthodromic distances in km between points given in degrees
+    """
+    lat_1, lon_1, lat_2, lon_2 = \
+        map(np.radians, [lat_1, lon_1, lat_2, lon_2])
+
+    a = np.sin((lat_2 - lat_1) / 2) ** 2 + \
+        np.cos(lat_1) * np.cos(lat_2) * np.sin((lon_2 - lon_1) / 2) ** 2
+
+    return 2 * earth_radius_km * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _expand_ranges(starts: np.ndarray, counts: np.ndarray) \
+        -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For ranges [start, start + count) returns the index of the range and the
+    position for every element of all ranges
+    """
+    owners = np.repeat(np.arange(len(counts)), counts)
+    range_offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    positions = np.repeat(starts, counts) + \
+        (np.arange(counts.sum()) - range_offsets)
+
+    return owners, positions
+
+
+class _Dataset(object):
+    """
+    Coordinates and labels of the entities of a source or target dataset.
+    Labels are kept in CSR layout: the labels of entity i are
+    label_offsets[i]:label_offsets[i + 1], the trigram IDs of label j are
+    trigram_ids[trigram_offsets[j]:trigram_offsets[j + 1]].
+    """
+
+    def __init__(
+            self,
+            iris: List[str],
+            lats: List[float],
+            lons: List[float],
+            labels: List[List[str]],
+            trigram_index: Dict[str, int]):
+
+        self.iris = iris
+        self.lats = np.array(lats, dtype=np.float64)
+        self.lons = np.array(lons, dtype=np.float64)
+
+        label_counts = [len(entity_labels) for entity_labels in labels]
+        self.label_counts = np.array(label_counts, dtype=np.int64)
+        self.label_starts = np.cumsum(self.label_counts) - self.label_counts
+
+        trigram_ids = []
+        trigram_counts = []
+
+        for entity_labels in labels:
+            for label in entity_labels:
+                trigrams = get_trigrams(label)
+                trigram_counts.append(len(trigrams))
+                trigram_ids.extend(
+                    [trigram_index.setdefault(t, len(trigram_index))
+                     for t in trigrams])
+
+        self.trigram_ids = np.array(trigram_ids, dtype=np.int64)
+        self.trigram_counts = np.array(trigram_counts, dtype=np.int64)
+        self.trigram_starts = np.cumsum(self.trigram_counts) - \
+            self.trigram_counts
+
+
+class NativeLinker(object):
+    """
+    In-process replacement of LIMESRunner for profiles linking point POIs by
+    a geographic distance measure (Geo_* measures on WKT points or euclidean
+    on lat/long), optionally combined (AND) with trigram similarity of labels.
+    This avoids starting a JVM for small and medium datasets.
+
+    Candidate pairs are found via a uniform grid over the target points with
+    cells as large as the maximal distance still reaching the review
+    threshold. Similarities are computed vectorized with NumPy like in LIMES:
+    1 / (1 + distance) for distances (orthodromic distance in km for the Geo
+    measures), the Dice coefficient of the label trigram sets for trigrams,
+    the minimum over all measures for AND, and the maximum over all value
+    pairs of multi-valued properties.
+
+    Accepted and review links (and scores) are written like LIMESRunner
+    does, i.e. links with a similarity of at least the acceptance threshold
+    are accepted, links with a similarity of at least the review threshold
+    (but below the acceptance threshold) need review.
+    """
+
+    def __init__(
+            self,
+            profile: LIMESProfile,
+            source_input_file_path: str,
+            target_input_file_path: str,
+            result_links_kg_file_path: str,
+            output_dir: str = None,
+            result_review_links_kg_file_path: str = None,
+            links_format: LinksFormat = LinksFormat.NT,
+            keep_confidence: bool = False,
+            scores_file_path: str = None,
+            chunk_size: int = 100000):
+
+        self.profile = copy.deepcopy(profile)
+        self.source_input_file_path = source_input_file_path
+        self.target_input_file_path = target_input_file_path
+        self.result_links_kg_file_path = result_links_kg_file_path
+        self.result_review_links_kg_file_path = \
+            result_review_links_kg_file_path
+        self.output_dir = output_dir
+        self.links_format = links_format
+        self.keep_confidence = keep_confidence
+        self.scores_file_path = scores_file_path
+        self.chunk_size = chunk_size
+
+        self._init_measures()
+
+    @staticmethod
+    def supports_profile(profile: LIMESProfile) -> bool:
+        try:
+            NativeLinker(profile, '', '', '')
+            return True
+
+        except (UnsupportedLinkingProfile, UnsupportedPropertyDefinition):
+            return False
+
+    def _init_measures(self):
+        measures = parse_metric(self.profile.metric)
+
+        distance_measures = \
+            [m for m in measures if m.name != _trigram_measure]
+        trigram_measures = \
+            [m for m in measures if m.name == _trigram_measure]
+
+        if len(distance_measures) != 1 or len(trigram_measures) > 1:
+            raise UnsupportedLinkingProfile(
+                'Exactly one distance measure and at most one trigrams '
+                'measure are supported')
+
+        self.distance_measure = distance_measures[0]
+        self.trigram_measure = \
+            trigram_measures[0] if trigram_measures else None
+        self.is_geo = is_geo_measure(self.distance_measure)
+
+        if self.is_geo and (
+                len(self.distance_measure.source_properties) != 1 or
+                len(self.distance_measure.target_properties) != 1):
+            raise UnsupportedLinkingProfile(
+                'Geo measures are only supported on WKT properties')
+
+        if not self.is_geo and (
+                len(self.distance_measure.source_properties) != 2 or
+                len(self.distance_measure.target_properties) != 2):
+            raise UnsupportedLinkingProfile(
+                'euclidean is only supported on lat|long properties')
+
+        self.review_threshold = min(
+            self.profile.review_condition.threshold,
+            self.profile.acceptance_condition.threshold)
+        self.max_distance = get_max_distance(
+            self.distance_measure, self.profile)
+
+        # validate the property definitions
+        for is_source in [True, False]:
+            self._get_properties(is_source)
+
+    def _get_properties(self, is_source: bool):
+        definition = self.profile.source if is_source else self.profile.target
+        properties = [
+            parse_property(p, self.profile.prefixes)
+            for p in definition.properties]
+        restriction_classes = [
+            parse_restriction(r, self.profile.prefixes)
+            for r in definition.restrictions or []]
+
+        name_to_property = {p.name: p for p in properties}
+
+        if is_source:
+            needed = list(self.distance_measure.source_properties)
+            if self.trigram_measure is not None:
+                needed += self.trigram_measure.source_properties
+        else:
+            needed = list(self.distance_measure.target_properties)
+            if self.trigram_measure is not None:
+                needed += self.trigram_measure.target_properties
+
+        for name in needed:
+            if name not in name_to_property:
+                raise UnsupportedLinkingProfile(
+                    f'Property {name} is not defined')
+
+        return [name_to_property[n] for n in set(needed)], restriction_classes
+
+    def _load(self, is_source: bool, trigram_index: Dict[str, int]) \
+            -> _Dataset:
+
+        file_path = self.source_input_file_path if is_source \
+            else self.target_input_file_path
+        properties, restriction_classes = self._get_properties(is_source)
+
+        if is_source:
+            coordinate_properties = self.distance_measure.source_properties
+            label_property = None if self.trigram_measure is None \
+                else self.trigram_measure.source_properties[0]
+        else:
+            coordinate_properties = self.distance_measure.target_properties
+            label_property = None if self.trigram_measure is None \
+                else self.trigram_measure.target_properties[0]
+
+        values = load_property_values(
+            file_path, properties, restriction_classes)
+
+        iris, lats, lons, labels = [], [], [], []
+        num_skipped = 0
+
+        for iri, entity_values in values.items():
+            coordinates = get_point(
+                entity_values, coordinate_properties, self.is_geo)
+            entity_labels = [] if label_property is None \
+                else entity_values.get(label_property, [])
+
+            if coordinates is None or \
+                    (label_property is not None and not entity_labels):
+                num_skipped += 1
+                continue
+
+            iris.append(iri)
+            lats.append(coordinates[0])
+            lons.append(coordinates[1])
+            labels.append(entity_labels)
+
+        if num_skipped:
+            logger.info(
+                f'Skipped {num_skipped} resources of {file_path} without '
+                f'point geometry or label')
+
+        return _Dataset(iris, lats, lons, labels, trigram_index)
+
+    def _get_cell_sizes(self, source: _Dataset, target: _Dataset) \
+            -> Tuple[float, float]:
+
+        if not self.is_geo:
+            return self.max_distance, self.max_distance
+
+        lat_cell_size = math.degrees(self.max_distance / earth_radius_km)
+
+        # Longitude degrees get shorter towards the poles, so the cells are
+        # sized for the most extreme latitude
+        max_abs_lat = max(
+            np.abs(source.lats).max(), np.abs(target.lats).max())
+        max_abs_lat = min(max_abs_lat + lat_cell_size, 89.0)
+        lon_cell_size = lat_cell_size / math.cos(math.radians(max_abs_lat))
+
+        return max(lat_cell_size, 1e-9), max(lon_cell_size, 1e-9)
+
+    def _get_distances(
+            self,
+            source: _Dataset,
+            target: _Dataset,
+            source_idxs: np.ndarray,
+            target_idxs: np.ndarray) -> np.ndarray:
+
+        if self.is_geo:
+            return haversine_distance(
+                source.lats[source_idxs], source.lons[source_idxs],
+                target.lats[target_idxs], target.lons[target_idxs])
+
+        return np.hypot(
+            source.lats[source_idxs] - target.lats[target_idxs],
+            source.lons[source_idxs] - target.lons[target_idxs])
+
+    def _get_candidates(
+            self,
+            source: _Dataset,
+            target: _Dataset,
+            source_chunk: np.ndarray) -> Tuple[np.ndarray, np.ndarray,
+                                               np.ndarray]:
+        """
+        Returns source indexes, target indexes and distance similarities of all
+        pairs of the given source entities and the target entities within the
+        maximal distance
+        """
+        lat_cell_size, lon_cell_size = self._cell_sizes
+        key_factor = np.int64(2 ** 31)
+
+        source_cell_ys = \
+            np.floor(source.lats[source_chunk] / lat_cell_size).astype(np.int64)
+        source_cell_xs = \
+            np.floor(source.lons[source_chunk] / lon_cell_size).astype(np.int64)
+
+        source_idxs = []
+        target_idxs = []
+
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                keys = (source_cell_xs + dx) * key_factor + source_cell_ys + dy
+
+                starts = np.searchsorted(self._target_cell_keys, keys, 'left')
+                ends = np.searchsorted(self._target_cell_keys, keys, 'right')
+
+                owners, positions = _expand_ranges(starts, ends - starts)
+                source_idxs.append(source_chunk[owners])
+                target_idxs.append(self._target_order[positions])
+
+        source_idxs = np.concatenate(source_idxs)
+        target_idxs = np.concatenate(target_idxs)
+
+        distances = self._get_distances(
+            source, target, source_idxs, target_idxs)
+        within_distance = distances <= self.max_distance
+
+        return source_idxs[within_distance], target_idxs[within_distance], \
+            1 / (1 + distances[within_distance])
+
+    @staticmethod
+    def _get_trigram_similarities(
+            source: _Dataset,
+            target: _Dataset,
+            source_idxs: np.ndarray,
+            target_idxs: np.ndarray) -> np.ndarray:
+        """
+        Returns the maximal trigram similarity of the labels of the given
+        entity pairs
+        """
+        # all label pairs of all entity pairs
+        source_label_counts = source.label_counts[source_idxs]
+        target_label_counts = target.label_counts[target_idxs]
+        pair_counts = source_label_counts * target_label_counts
+
+        entity_pairs, positions = _expand_ranges(
+            np.zeros(len(pair_counts), dtype=np.int64), pair_counts)
+        source_labels = source.label_starts[source_idxs][entity_pairs] + \
+            positions // target_label_counts[entity_pairs]
+        target_labels = target.label_starts[target_idxs][entity_pairs] + \
+            positions % target_label_counts[entity_pairs]
+
+        # The trigrams of both labels of a label pair are tagged with the
+        # label pair's index. The number of common trigrams is the number of
+        # target trigram tags also among the source trigram tags.
+        num_trigrams = np.int64(
+            max(source.trigram_ids.max(initial=0),
+                target.trigram_ids.max(initial=0)) + 1)
+
+        source_pairs, source_positions = _expand_ranges(
+            source.trigram_starts[source_labels],
+            source.trigram_counts[source_labels])
+        target_pairs, target_positions = _expand_ranges(
+            target.trigram_starts[target_labels],
+            target.trigram_counts[target_labels])
+
+        source_tags = source_pairs * num_trigrams + \
+            source.trigram_ids[source_positions]
+        target_tags = target_pairs * num_trigrams + \
+            target.trigram_ids[target_positions]
+
+        common = np.bincount(
+            target_pairs[np.isin(target_tags, source_tags)],
+            minlength=len(entity_pairs))
+        total = source.trigram_counts[source_labels] + \
+            target.trigram_counts[target_labels]
+        label_similarities = 2 * common / np.maximum(total, 1)
+
+        similarities = np.zeros(len(source_idxs))
+        np.maximum.at(similarities, entity_pairs, label_similarities)
+
+        return similarities
+
+    def _get_links(self) -> Tuple[List, List]:
+        trigram_index = {}
+        source = self._load(True, trigram_index)
+        target = self._load(False, trigram_index)
+
+        accepted, review = [], []
+
+        if len(source.iris) == 0 or len(target.iris) == 0:
+            return accepted, review
+
+        self._cell_sizes = self._get_cell_sizes(source, target)
+        lat_cell_size, lon_cell_size = self._cell_sizes
+
+        target_keys = \
+            np.floor(target.lons / lon_cell_size).astype(np.int64) * \
+            np.int64(2 ** 31) + \
+            np.floor(target.lats / lat_cell_size).astype(np.int64)
+        self._target_order = np.argsort(target_keys, kind='stable')
+        self._target_cell_keys = target_keys[self._target_order]
+
+        acceptance_threshold = self.profile.acceptance_condition.threshold
+        distance_threshold = self.distance_measure.threshold or 0
+
+        for chunk_start in range(0, len(source.iris), self.chunk_size):
+            source_chunk = np.arange(
+                chunk_start, min(chunk_start + self.chunk_size, len(source.iris)))
+
+            source_idxs, target_idxs, similarities = \
+                self._get_candidates(source, target, source_chunk)
+
+            keep = similarities >= distance_threshold
+
+            if self.trigram_measure is not None:
+                source_idxs = source_idxs[keep]
+                target_idxs = target_idxs[keep]
+                similarities = similarities[keep]
+
+                trigram_similarities = self._get_trigram_similarities(
+                    source, target, source_idxs, target_idxs)
+
+                keep = \
+                    trigram_similarities >= (self.trigram_measure.threshold or 0)
+                similarities = np.minimum(similarities, trigram_similarities)
+
+            keep &= similarities >= self.review_threshold
+
+            for source_idx, target_idx, similarity in zip(
+                    source_idxs[keep], target_idxs[keep], similarities[keep]):
+                link = source.iris[source_idx], target.iris[target_idx], \
+                    float(similarity)
+
+                if similarity >= acceptance_threshold:
+                    accepted.append(link)
+                else:
+                    review.append(link)
+
+        return accepted, review
+
+    def run(self):
+        accepted, review = self._get_links()
+
+        logger.info(
+            f'Found {len(accepted)} accepted and {len(review)} review links '
+            f'for {self.source_input_file_path}')
+
+        write_links(
+            accepted,
+            self.result_links_kg_file_path,
+            self.links_format,
+            self.keep_confidence)
+
+        if self.result_review_links_kg_file_path is not None:
+            write_links(
+                review,
+                self.result_review_links_kg_file_path,
+                self.links_format,
+                self.keep_confidence)
+
+        if self.scores_file_path is not None:
+            ScoredLinks.from_links(accepted + review, self.review_threshold) \
+                .save(self.scores_file_path)
@@ -1,6 +1,9 @@
+import dataclasses
+
 from gkgaas.limes.limesprofile import LIMESProfile, Prefix, LIMESSource, \
     DatasetType, LIMESTarget, LIMESAcceptanceCondition, LIMESReviewCondition, \
-    LIMESExecution, LIMESEngine, LIMESPlanner, LIMESRewriter, LIMESOutputFormat
+    LIMESExecution, LIMESEngine, LIMESPlanner, LIMESRewriter, \
+    LIMESOutputFormat, LinkerType
 
 slipo_default_match = LIMESProfile(
     prefixes=[
@@ -384,6 +387,10 @@ slipo_equi_match_by_name_and_distance = LIMESProfile(
         rewriter=LIMESRewriter.DEFAULT),
     output_format=LIMESOutputFormat.TAB)
 
+# Same profile, but run in-process (see gkgaas.limes.native.NativeLinker)
+slipo_equi_match_by_name_and_distance_native = dataclasses.replace(
+    slipo_equi_match_by_name_and_distance, linker=LinkerType.NATIVE)
+
 slipo_match_by_geometry = LIMESProfile(
     execution=LIMESExecution(
         engine=LIMESEngine.DEFAULT,
@@ -652,6 +659,8 @@ name_to_profile = {
     'slipo dinuc c1': slipo_dinuc_c1,
     'slipo equi match by name and distance':
         slipo_equi_match_by_name_and_distance,
+    'slipo equi match by name and distance native':
+        slipo_equi_match_by_name_and_distance_native,
     'slipo match by geometry': slipo_match_by_geometry,
     'slipo match by name': slipo_match_by_name,
     'slipo osm generic': slipo_osm_generic,
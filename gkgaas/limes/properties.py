@@ -0,0 +1,315 @@
+import html
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from gkgaas.limes.limesprofile import Prefix
+from gkgaas.utils.ntriples import iter_triples, rdf_type_iri, is_iri, \
+    get_iri, get_literal_value, format_iri
+
+_property_pattern = re.compile(
+    r'^\s*(?P<path>\S+)'
+    r'(?:\s+AS\s+(?P<preprocessing>.+?))?'
+    r'(?:\s+RENAME\s+(?P<name>\S+))?\s*$')
+
+_restriction_pattern = re.compile(
+    r'^\s*\?\w+\s+(?:a|rdf:type|<' + re.escape(rdf_type_iri) + r'>)\s+'
+    r'(?P<cls>\S+?)\s*\.?\s*$')
+
+_regex_replace_pattern = re.compile(
+    r'^regexreplace\((?P<regex>.*),(?P<replacement>[^,]*)\)$')
+
+_supported_preprocessing_functions = {
+    'nolang': lambda v: v,
+    'lowercase': lambda v: v.lower(),
+    'uppercase': lambda v: v.upper()}
+
+
+def _get_preprocessing_function(function_str: str):
+    function = _supported_preprocessing_functions.get(function_str)
+
+    if function is not None:
+        return function
+
+    # e.g. regexreplace(&lt;http:\/\/www\.opengis\.net\/def\/crs(\/.+)*&gt;, )
+    match = _regex_replace_pattern.match(function_str)
+
+    if match is not None:
+        regex = re.compile(html.unescape(match.group('regex')))
+        replacement = html.unescape(match.group('replacement').strip())
+
+        return lambda v: regex.sub(replacement, v)
+
+    raise UnsupportedPropertyDefinition(
+        f'Preprocessing function {function_str} is not supported')
+
+
+class UnsupportedPropertyDefinition(Exception):
+    pass
+
+
+@dataclass
+class LIMESProperty:
+    """
+    A property (path) of a LIMES source or target definition like
+    'slipo:name/slipo:nameValue AS nolang->lowercase RENAME label', with the
+    path steps expanded to full IRIs
+    """
+    path: List[str]
+    name: str
+    preprocessing: List[str]
+
+    def __post_init__(self):
+        self._functions = [
+            _get_preprocessing_function(f) for f in self.preprocessing]
+
+    def preprocess(self, value: str) -> str:
+        for function in self._functions:
+            value = function(value)
+
+        return value
+
+
+def expand_prefixed_name(name: str, prefixes: Optional[List[Prefix]]) -> str:
+    if name.startswith('<') and name.endswith('>'):
+        return name[1:-1]
+
+    label, _, local_name = name.partition(':')
+
+    for prefix in prefixes or []:
+        if prefix.label == label:
+            return prefix.namespace + local_name
+
+    raise UnsupportedPropertyDefinition(f'Unknown prefix in {name}')
+
+
+def parse_property(
+        property_str: str, prefixes: Optional[List[Prefix]]) -> LIMESProperty:
+
+    match = _property_pattern.match(property_str)
+
+    if match is None:
+        raise UnsupportedPropertyDefinition(
+            f'Cannot parse property {property_str}')
+
+    path_str = match.group('path')
+    preprocessing = []
+
+    if match.group('preprocessing'):
+        preprocessing = [
+            f.strip() for f in match.group('preprocessing').split('->')]
+
+    return LIMESProperty(
+        path=[expand_prefixed_name(step, prefixes)
+              for step in path_str.split('/')],
+        name=match.group('name') or path_str,
+        preprocessing=preprocessing)
+
+
+def strip_preprocessing(property_str: str) -> str:
+    """
+    Removes the preprocessing functions from a property definition, e.g.
+    'slipo:name/slipo:nameValue AS nolang->lowercase RENAME label' -->
+    'slipo:name/slipo:nameValue RENAME label'
+    """
+    match = _property_pattern.match(property_str)
+
+    if match is None:
+        raise UnsupportedPropertyDefinition(
+            f'Cannot parse property {property_str}')
+
+    if match.group('name'):
+        return f'{match.group("path")} RENAME {match.group("name")}'
+
+    return match.group('path')
+
+
+def parse_restriction(
+        restriction_str: str, prefixes: Optional[List[Prefix]]) -> str:
+    """
+    Returns the class IRI of a restriction like '?x a geonames:Feature'.
+    Other restrictions are not supported.
+    """
+    match = _restriction_pattern.match(restriction_str)
+
+    if match is None:
+        raise UnsupportedPropertyDefinition(
+            f'Only class restrictions are supported: {restriction_str}')
+
+    return expand_prefixed_name(match.group('cls'), prefixes)
+
+
+def get_path_predicates(
+        properties: List[LIMESProperty],
+        restriction_classes: List[str] = None) -> Set[str]:
+    """
+    Returns the predicates (as N-Triples IRI terms) of all triples a
+    PropertyGraph of the given properties and restriction classes reads
+    """
+    predicates = set(
+        [format_iri(step) for prop in properties for step in prop.path])
+
+    if restriction_classes:
+        predicates.add(format_iri(rdf_type_iri))
+
+    return predicates
+
+
+class PropertyGraph(object):
+    """
+    The triples of an N-Triples file on the given property paths (and, if
+    restriction classes are given, the rdf:type statements), read in one
+    streaming pass. Other triples are not kept in memory.
+
+    Resources are the IRI subjects having a value for at least one of the
+    properties and, if restriction classes are given, being an instance of all
+    of them.
+    """
+
+    def __init__(
+            self,
+            file_path: str,
+            properties: List[LIMESProperty],
+            restriction_classes: List[str] = None):
+
+        self.properties = properties
+        self.restriction_classes = restriction_classes or []
+
+        self._rdf_type = format_iri(rdf_type_iri)
+        self._paths = [
+            [format_iri(step) for step in prop.path] for prop in properties]
+
+        predicates = get_path_predicates(properties)
+
+        # predicate --> subject --> objects
+        self._edges = defaultdict(lambda: defaultdict(list))
+        self._types = defaultdict(list)
+
+        for subj, pred, obj in iter_triples(file_path):
+            if pred in predicates:
+                self._edges[pred][subj].append(obj)
+
+            if pred == self._rdf_type and self.restriction_classes:
+                self._types[subj].append(obj)
+
+    def _get_path_triples(self, subj: str, path: List[str]) -> List[Tuple]:
+        triples = []
+        nodes = [subj]
+
+        for pred in path:
+            step_edges = self._edges[pred]
+            next_nodes = []
+
+            for node in nodes:
+                for obj in step_edges.get(node, []):
+                    triples.append((node, pred, obj))
+                    next_nodes.append(obj)
+
+            nodes = next_nodes
+
+        # only complete paths count
+        return triples if nodes else []
+
+    def _fulfills_restrictions(self, subj: str) -> bool:
+        types = set(self._types.get(subj, []))
+
+        return all([format_iri(cls) in types
+                    for cls in self.restriction_classes])
+
+    def get_resources(self) -> List[str]:
+        """
+        Returns the resources as N-Triples IRI terms (e.g. '<http://ex.com/s>')
+        in the order they are first seen, s.t. files written from them are
+        the same on every run
+        """
+        subjects = {}
+
+        for path in self._paths:
+            subjects.update(dict.fromkeys([
+                subj for subj in self._edges[path[0]].keys()
+                if is_iri(subj) and self._get_path_triples(subj, path)]))
+
+        return [subj for subj in subjects if self._fulfills_restrictions(subj)]
+
+    def get_triples(self, subj: str) -> List[Tuple[str, str, str]]:
+        """
+        Returns all triples on the property paths starting at the given
+        resource, and its rdf:type statements if restriction classes are
+        given
+        """
+        triples = []
+
+        for path in self._paths:
+            triples.extend(self._get_path_triples(subj, path))
+
+        for cls in self._types.get(subj, []):
+            triples.append((subj, self._rdf_type, cls))
+
+        # paths may share prefixes
+        return list(dict.fromkeys(triples))
+
+    def write_triples(self, resources: List[str], out_file_path: str):
+        """
+        Writes the triples (see get_triples()) of the given resources as
+        N-Triples
+        """
+        with open(out_file_path, 'w', encoding='utf-8') as out_file:
+            for subj in resources:
+                for triple in self.get_triples(subj):
+                    out_file.write(' '.join(triple) + ' .\n')
+
+    def get_values(self, subj: str) -> Dict[str, List[str]]:
+        """
+        Returns the values of the resource's properties, i.e. the (unescaped
+        and preprocessed) literal values or the IRIs without angle brackets
+        at the end of the property paths
+        """
+        values = {}
+
+        for prop, path in zip(self.properties, self._paths):
+            objs = [o for _, p, o in self._get_path_triples(subj, path)
+                    if p == path[-1]]
+
+            if objs:
+                values[prop.name] = [
+                    get_iri(o) if is_iri(o) else prop.preprocess(
+                        get_literal_value(o))
+                    for o in objs]
+
+        return values
+
+
+def load_property_values(
+        file_path: str,
+        properties: List[LIMESProperty],
+        restriction_classes: List[str] = None
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Reads the values of the given properties of all resources (see
+    PropertyGraph) of an N-Triples file. Returns a dict
+
+        subject IRI --> property name --> list of (preprocessed) values
+    """
+    graph = PropertyGraph(file_path, properties, restriction_classes)
+
+    return {get_iri(subj): graph.get_values(subj)
+            for subj in graph.get_resources()}
+
+
+def write_projection(
+        file_path: str,
+        properties: List[LIMESProperty],
+        restriction_classes: List[str],
+        out_file_path: str) -> int:
+    """
+    Writes the triples of the resources (see PropertyGraph) of an N-Triples
+    file on the given property paths, i.e. all a LIMES source or target
+    definition with these properties and class restrictions reads from the
+    file. Returns the number of resources written.
+    """
+    graph = PropertyGraph(file_path, properties, restriction_classes)
+    resources = graph.get_resources()
+    graph.write_triples(resources, out_file_path)
+
+    return len(resources)
@@ -0,0 +1,254 @@
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from gkgaas.limes.limesprofile import LIMESProfile
+from gkgaas.limes.native import UnsupportedLinkingProfile, \
+    get_distance_measure, is_geo_measure, get_max_distance, get_buffer
+from gkgaas.utils.filecache import get_fingerprint
+from gkgaas.utils.ntriples import iter_triples, is_iri, format_iri, \
+    get_literal_value
+
+logger = logging.getLogger(__name__)
+
+geo_has_geometry_iri = 'http://www.opengis.net/ont/geosparql#hasGeometry'
+geo_as_wkt_iri = 'http://www.opengis.net/ont/geosparql#asWKT'
+slipo_category_iri = 'http://slipo.eu/def#category'
+
+# e.g. '<http://www.opengis.net/def/crs/EPSG/0/4326> '
+_crs_pattern = re.compile(r'^\s*<[^>]*>\s*')
+_parentheses_pattern = re.compile(r'[()]')
+
+# (min. long, min. lat, max. long, max. lat)
+BoundingBox = Tuple[float, float, float, float]
+
+
+def get_wkt_bbox(wkt: str) -> Optional[BoundingBox]:
+    """
+    Returns the bounding box of all coordinates of a WKT geometry (optionally
+    prefixed by a CRS IRI like GeoSPARQL wktLiterals), or None if there are no
+    coordinates
+    """
+    wkt = _crs_pattern.sub('', wkt)
+    coordinates_str = _parentheses_pattern.sub(',', wkt.partition('(')[2])
+    lons, lats = [], []
+
+    for coordinate_str in coordinates_str.split(','):
+        coordinate = coordinate_str.split()
+
+        if len(coordinate) < 2:
+            continue
+
+        try:
+            lons.append(float(coordinate[0]))
+            lats.append(float(coordinate[1]))
+        except ValueError:
+            return None
+
+    if not lons:
+        return None
+
+    return min(lons), min(lats), max(lons), max(lats)
+
+
+def union_bboxes(
+        bbox_1: Optional[BoundingBox],
+        bbox_2: Optional[BoundingBox]) -> Optional[BoundingBox]:
+
+    if bbox_1 is None:
+        return bbox_2
+
+    if bbox_2 is None:
+        return bbox_1
+
+    return \
+        min(bbox_1[0], bbox_2[0]), min(bbox_1[1], bbox_2[1]), \
+        max(bbox_1[2], bbox_2[2]), max(bbox_1[3], bbox_2[3])
+
+
+def intersects(bbox_1: BoundingBox, bbox_2: BoundingBox) -> bool:
+    return bbox_1[0] <= bbox_2[2] and bbox_2[0] <= bbox_1[2] and \
+        bbox_1[1] <= bbox_2[3] and bbox_2[1] <= bbox_1[3]
+
+
+@dataclass
+class Extent:
+    bbox: Optional[BoundingBox] = None
+    categories: Set[str] = field(default_factory=set)
+
+
+def read_extents(
+        file_path: str,
+        geometry_path: List[str],
+        category_property: str) -> Dict[str, Extent]:
+    """
+    Reads the bounding box of the WKT geometries at the end of the geometry
+    path and the categories (objects of the category property, as N-Triples
+    terms) of every IRI subject in one streaming pass. Only the geometries'
+    bounding boxes are kept in memory, not the WKT literals.
+    """
+    steps = [format_iri(step) for step in geometry_path]
+    category_property = format_iri(category_property)
+
+    # intermediate step predicate --> subject --> objects
+    edges = {step: defaultdict(list) for step in steps[:-1]}
+    node_bboxes = {}
+    categories = defaultdict(set)
+
+    for subj, pred, obj in iter_triples(file_path):
+        if pred == category_property and is_iri(subj):
+            categories[subj].add(obj)
+
+        if pred == steps[-1] and not is_iri(obj):
+            node_bboxes[subj] = union_bboxes(
+                node_bboxes.get(subj), get_wkt_bbox(get_literal_value(obj)))
+
+        elif pred in edges:
+            edges[pred][subj].append(obj)
+
+    roots = edges[steps[0]] if len(steps) > 1 else node_bboxes
+    extents = {}
+
+    for subj in set(roots.keys()) | set(categories.keys()):
+        if not is_iri(subj):
+            continue
+
+        nodes = [subj]
+
+        for step in steps[:-1]:
+            nodes = [o for node in nodes for o in edges[step].get(node, [])]
+
+        bbox = None
+
+        for node in nodes:
+            bbox = union_bboxes(bbox, node_bboxes.get(node))
+
+        extents[subj] = Extent(bbox, categories.get(subj, set()))
+
+    return extents
+
+
+@dataclass
+class TargetPruning:
+    """
+    Reduces the target dataset of a linking run to the resources which can be
+    linked to the source dataset at all, i.e. the resources whose geometry
+    overlaps the bounding box of all source geometries enlarged by a margin
+    and, if match_categories is set and the source resources have categories,
+    which share a category with a source resource.
+
+    The margin is the maximal link distance of the profile's metric (see
+    gkgaas.limes.native.get_max_distance()) if it has one, plus margin
+    degrees. Note that profiles not bounding the link distance may link
+    resources further apart than the margin.
+
+    Resources are kept with all their triples and the triples of the nodes
+    they refer to (like their geometry or name nodes).
+    """
+    margin: float = 0.0
+    match_categories: bool = True
+    geometry_path: List[str] = field(
+        default_factory=lambda: [geo_has_geometry_iri, geo_as_wkt_iri])
+    category_property: str = slipo_category_iri
+
+    def get_fingerprint(self) -> str:
+        return get_fingerprint(
+            str(self.margin),
+            str(self.match_categories),
+            *self.geometry_path,
+            self.category_property)
+
+    def get_source_extent(
+            self, profile: LIMESProfile, source_file_path: str) -> Extent:
+        """
+        Returns the bounding box of the source geometries enlarged by the
+        margin and the source categories
+        """
+        source_extent = Extent()
+
+        for extent in read_extents(
+                source_file_path,
+                self.geometry_path,
+                self.category_property).values():
+            source_extent.bbox = \
+                union_bboxes(source_extent.bbox, extent.bbox)
+            source_extent.categories.update(extent.categories)
+
+        if source_extent.bbox is None:
+            return source_extent
+
+        min_lon, min_lat, max_lon, max_lat = source_extent.bbox
+        lat_buffer, lon_buffer = 0, 0
+
+        try:
+            distance_measure = get_distance_measure(profile)
+            lat_buffer, lon_buffer = get_buffer(
+                get_max_distance(distance_measure, profile),
+                is_geo_measure(distance_measure),
+                max(abs(min_lat), abs(max_lat)))
+
+        except UnsupportedLinkingProfile:
+            pass
+
+        lat_buffer += self.margin
+        lon_buffer += self.margin
+        source_extent.bbox = \
+            min_lon - lon_buffer, min_lat - lat_buffer, \
+            max_lon + lon_buffer, max_lat + lat_buffer
+
+        return source_extent
+
+    def prune(
+            self,
+            profile: LIMESProfile,
+            source_file_path: str,
+            target_file_path: str,
+            out_file_path: str) -> int:
+        """
+        Writes the pruned target dataset and returns the number of resources
+        kept
+        """
+        source_extent = self.get_source_extent(profile, source_file_path)
+        match_categories = \
+            self.match_categories and len(source_extent.categories) > 0
+        kept = set()
+
+        if source_extent.bbox is not None:
+            for subj, extent in read_extents(
+                    target_file_path,
+                    self.geometry_path,
+                    self.category_property).items():
+
+                if extent.bbox is None or \
+                        not intersects(extent.bbox, source_extent.bbox):
+                    continue
+
+                if match_categories and \
+                        extent.categories.isdisjoint(source_extent.categories):
+                    continue
+
+                kept.add(subj)
+
+        # The nodes the kept resources refer to may be described before the
+        # resources in the file, so they are collected in a pass of their own
+        nodes = set()
+
+        for subj, _, obj in iter_triples(target_file_path):
+            if subj in kept and not obj.startswith('"'):
+                nodes.add(obj)
+
+        with open(target_file_path) as in_file, \
+                open(out_file_path, 'w') as out_file:
+            for line in in_file:
+                subj = line.split(maxsplit=1)[0] if line.strip() else None
+
+                if subj in kept or subj in nodes:
+                    out_file.write(line)
+
+        logger.info(
+            f'Kept {len(kept)} resources of {target_file_path} to link '
+            f'{source_file_path}')
+
+        return len(kept)
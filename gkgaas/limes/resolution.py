@@ -0,0 +1,254 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.links import Link, write_links
+from gkgaas.utils.unionfind import UnionFind
+
+
+def _intern(links: Iterable[Link]) \
+        -> Tuple[List[str], List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Interns the source and the target IRIs of the links separately and keeps
+    the highest score of duplicate links. Returns the source IRIs, the target
+    IRIs and the source IRI indexes, target IRI indexes and scores of the
+    links in input order.
+    """
+    source_ids: Dict[str, int] = {}
+    target_ids: Dict[str, int] = {}
+    pair_scores: Dict[Tuple[int, int], float] = {}
+
+    for source_iri, target_iri, score in links:
+        pair = \
+            source_ids.setdefault(source_iri, len(source_ids)), \
+            target_ids.setdefault(target_iri, len(target_ids))
+        pair_scores[pair] = max(score, pair_scores.get(pair, score))
+
+    pairs = np.array(list(pair_scores.keys()), dtype=np.int64)
+    pairs = pairs.reshape((len(pair_scores), 2))
+
+    return \
+        list(source_ids.keys()), \
+        list(target_ids.keys()), \
+        pairs[:, 0], \
+        pairs[:, 1], \
+        np.array(list(pair_scores.values()), dtype=np.float64)
+
+
+def _match_greedily(
+        source_ids: np.ndarray,
+        target_ids: np.ndarray,
+        scores: np.ndarray) -> List[int]:
+    """
+    Returns the indexes of the links picked by descending score as long as
+    neither their source nor their target was picked before. Ties are broken
+    by input order.
+    """
+    used_sources = set()
+    used_targets = set()
+    picked = []
+
+    for i in np.argsort(-scores, kind='stable').tolist():
+        source_id = int(source_ids[i])
+        target_id = int(target_ids[i])
+
+        if source_id in used_sources or target_id in used_targets:
+            continue
+
+        used_sources.add(source_id)
+        used_targets.add(target_id)
+        picked.append(i)
+
+    return picked
+
+
+def _solve_assignment(costs: np.ndarray) -> np.ndarray:
+    """
+    Solves the assignment problem for an n x m cost matrix with n <= m by the
+    Hungarian method in O(n^2 m) and returns the column assigned to each row
+    """
+    num_rows, num_cols = costs.shape
+    # potentials and matching, 1-based with 0 as virtual column
+    row_potentials = np.zeros(num_rows + 1)
+    col_potentials = np.zeros(num_cols + 1)
+    col_rows = np.zeros(num_cols + 1, dtype=np.int64)
+    prev_cols = np.zeros(num_cols + 1, dtype=np.int64)
+
+    for row in range(1, num_rows + 1):
+        col_rows[0] = row
+        col = 0
+        min_slacks = np.full(num_cols + 1, np.inf)
+        used = np.zeros(num_cols + 1, dtype=bool)
+
+        while col_rows[col] != 0:
+            used[col] = True
+            current_row = col_rows[col]
+
+            slacks = costs[current_row - 1] \
+                - row_potentials[current_row] - col_potentials[1:]
+            improved = ~used[1:] & (slacks < min_slacks[1:])
+            min_slacks[1:][improved] = slacks[improved]
+            prev_cols[1:][improved] = col
+
+            free_slacks = np.where(used[1:], np.inf, min_slacks[1:])
+            next_col = int(np.argmin(free_slacks)) + 1
+            delta = free_slacks[next_col - 1]
+
+            row_potentials[col_rows[used]] += delta
+            col_potentials[used] -= delta
+            min_slacks[~used] -= delta
+
+            col = next_col
+
+        # augment along the alternating path
+        while col != 0:
+            prev_col = prev_cols[col]
+            col_rows[col] = col_rows[prev_col]
+            col = prev_col
+
+    row_cols = np.zeros(num_rows, dtype=np.int64)
+    assigned_cols = np.flatnonzero(col_rows[1:])
+    row_cols[col_rows[1:][assigned_cols] - 1] = assigned_cols
+
+    return row_cols
+
+
+def _match_exactly(
+        source_ids: np.ndarray,
+        target_ids: np.ndarray,
+        scores: np.ndarray) -> List[int]:
+    """
+    Returns the indexes of the links of a maximum weight matching
+    """
+    sources, source_rows = np.unique(source_ids, return_inverse=True)
+    targets, target_cols = np.unique(target_ids, return_inverse=True)
+
+    # links have positive scores, s.t. a maximum weight assignment with
+    # weight 0 for missing links is a maximum weight matching
+    weights = np.zeros((len(sources), len(targets)))
+    weights[source_rows, target_cols] = scores
+    link_indexes = np.full(weights.shape, -1, dtype=np.int64)
+    link_indexes[source_rows, target_cols] = np.arange(len(scores))
+
+    if len(sources) <= len(targets):
+        rows = np.arange(len(sources))
+        cols = _solve_assignment(-weights)
+    else:
+        cols = np.arange(len(targets))
+        rows = _solve_assignment(-weights.T)
+
+    picked = link_indexes[rows, cols]
+
+    return sorted(picked[picked >= 0].tolist())
+
+
+@dataclass
+class OneToOneResolution:
+    """
+    Resolves the many-to-many link candidates of a linking run into
+    one-to-one links, i.e. links whose source and target occur in no other
+    link, s.t. FAGI gets unique links to fuse.
+
+    The links are picked greedily by descending confidence score. If exact
+    is set, the links of each connected component of the link graph with at
+    most max_exact_component_size sources and targets are rather picked by
+    a maximum weight matching, which maximizes the components' sum of
+    scores.
+    """
+    exact: bool = False
+    max_exact_component_size: int = 100
+
+    def resolve(self, links: Iterable[Link]) -> List[Link]:
+        """
+        Returns the one-to-one links sorted by descending score
+        """
+        source_iris, target_iris, source_ids, target_ids, scores = \
+            _intern(links)
+
+        if self.exact:
+            picked = self._match_components(source_ids, target_ids, scores)
+        else:
+            picked = _match_greedily(source_ids, target_ids, scores)
+
+        picked = np.array(picked, dtype=np.int64)
+        picked = picked[np.argsort(-scores[picked], kind='stable')]
+
+        return [
+            (source_iris[source_id], target_iris[target_id], score)
+            for source_id, target_id, score in zip(
+                source_ids[picked].tolist(),
+                target_ids[picked].tolist(),
+                scores[picked].tolist())]
+
+    def _match_components(
+            self,
+            source_ids: np.ndarray,
+            target_ids: np.ndarray,
+            scores: np.ndarray) -> List[int]:
+
+        num_sources = int(source_ids.max(initial=-1)) + 1
+        num_targets = int(target_ids.max(initial=-1)) + 1
+
+        # sources are nodes 0, ..., num_sources - 1, targets follow
+        components = UnionFind(num_sources + num_targets)
+        for source_id, target_id in zip(
+                source_ids.tolist(), target_ids.tolist()):
+            components.union(source_id, num_sources + target_id)
+
+        roots = components.get_roots()[source_ids]
+        picked = []
+
+        for link_indexes in _group_by(roots).values():
+            component_source_ids = source_ids[link_indexes]
+            component_target_ids = target_ids[link_indexes]
+            num_component_sources = len(np.unique(component_source_ids))
+            num_component_targets = len(np.unique(component_target_ids))
+
+            # greedy matching is optimal on stars
+            if num_component_sources == 1 or num_component_targets == 1 or \
+                    num_component_sources + num_component_targets > \
+                    self.max_exact_component_size:
+                match = _match_greedily
+            else:
+                match = _match_exactly
+
+            picked.extend(link_indexes[match(
+                component_source_ids,
+                component_target_ids,
+                scores[link_indexes])].tolist())
+
+        return picked
+
+    def write(
+            self,
+            links: Iterable[Link],
+            out_file_path: str,
+            keep_confidence: bool = False) -> int:
+        """
+        Writes the one-to-one links in FAGI's CSV_UNIQUE_LINKS links format
+        and returns their number
+        """
+        unique_links = self.resolve(links)
+
+        write_links(
+            unique_links,
+            out_file_path,
+            LinksFormat.CSV_UNIQUE_LINKS,
+            keep_confidence)
+
+        return len(unique_links)
+
+
+def _group_by(keys: np.ndarray) -> Dict[int, np.ndarray]:
+    """
+    Returns the indexes of the equal keys by key
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+
+    return {int(sorted_keys[start]): order[start:end]
+            for start, end in zip(starts, ends) if start < end}
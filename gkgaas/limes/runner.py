@@ -1,22 +1,68 @@
+import copy
 import logging
 import os
 import shutil
-import subprocess
 import tempfile
 
-from rdflib import Graph, OWL, URIRef
-
-from gkgaas.exceptions import WrongExecutablePath, RunnerExecutionFailed
+from gkgaas.exceptions import RunnerExecutionFailed
+from gkgaas.fagi import LinksFormat
 from gkgaas.limes.limesprofile import LIMESProfile
+from gkgaas.limes.links import convert_limes_links
+from gkgaas.limes.properties import parse_property, parse_restriction, \
+    write_projection, UnsupportedPropertyDefinition
+from gkgaas.limes.pruning import TargetPruning
+from gkgaas.limes.scores import ScoredLinks
+from gkgaas.limes.snapshot import LinkingSnapshotStore
+from gkgaas.toolrunner import ToolRunner
+from gkgaas.utils.filecache import FileCache, get_file_hash, \
+    get_file_version, get_fingerprint
 
 logger = logging.getLogger(__name__)
 
 
-class LIMESRunner(object):
+class LIMESRunner(ToolRunner):
     """
     Executes the LIMES linking tool to link a set of input datasets.
+
+    The accepted links are written to result_links_kg_file_path and, if
+    result_review_links_kg_file_path is given, the links to review are written
+    there. Links are written as N-Triples owl:sameAs statements by default, or
+    in one of FAGI's CSV links formats, optionally with confidence scores (see
+    gkgaas.limes.links.write_links()).
+
+    If scores_file_path is given, all links found (accepted and to review)
+    are additionally written there with their confidence scores (see
+    gkgaas.limes.scores.ScoredLinks), s.t. they can be re-thresholded without
+    running LIMES again.
+
+    If a link set cache is provided, the link sets are cached under a key made
+    from the source file content, the target file version and the profile. If
+    neither of those changed, LIMES is not started again but the cached link
+    sets are re-used.
+
+    If a target pruning is provided, LIMES gets only the part of the target
+    dataset which can be linked to the source dataset at all (see
+    gkgaas.limes.pruning.TargetPruning).
+
+    If project_inputs is set, LIMES gets the input datasets reduced to the
+    triples on the property paths of the profile's source and target
+    definitions (and the rdf:type statements for class restrictions), which
+    is all LIMES reads from them. This saves LIMES parsing and holding the
+    remaining triples. Definitions with restrictions other than class
+    restrictions are not projected.
+
+    If a snapshot store is provided, LIMES reads a linking-ready snapshot of
+    the target dataset instead (see
+    gkgaas.limes.snapshot.LinkingSnapshotStore), which is projected and
+    preprocessed already, and pruning only reads the snapshot's spatial
+    partitions overlapping the source dataset. The snapshots of the target
+    dataset's versions are kept under target_id (e.g. the topio ID of the
+    topio KG), or under the target file path if not given.
     """
 
+    tool_name = 'LIMES'
+    _fatal_error_log_snippet = 'Exception in thread "main"'
+
     def __init__(
             self,
             limes_executable_path: str,
@@ -24,89 +70,256 @@ class LIMESRunner(object):
             source_input_file_path: str,
             target_input_file_path: str,
             result_links_kg_file_path: str,
-            output_dir: str):
+            output_dir: str,
+            result_review_links_kg_file_path: str = None,
+            links_format: LinksFormat = LinksFormat.NT,
+            keep_confidence: bool = False,
+            cache: FileCache = None,
+            timeout: float = None,
+            memory_limit: int = None,
+            output_logger: logging.Logger = None,
+            target_pruning: TargetPruning = None,
+            project_inputs: bool = False,
+            target_snapshots: LinkingSnapshotStore = None,
+            scores_file_path: str = None,
+            target_id: str = None):
 
-        if not os.path.exists(limes_executable_path):
-            raise WrongExecutablePath(
-                f'LIMES executable path {limes_executable_path} does not exist'
-            )
+        super().__init__(
+            limes_executable_path, timeout, memory_limit, output_logger)
 
-        self.limes_executable_path = limes_executable_path
-        self.profile = profile
+        # Profiles get modified during the run and preconfigured profiles are
+        # shared between concurrent runs, so we work on a copy
+        self.profile = copy.deepcopy(profile)
         self.result_links_kg_file_path = result_links_kg_file_path
+        self.result_review_links_kg_file_path = \
+            result_review_links_kg_file_path
         self.output_dir = output_dir
+        self.links_format = links_format
+        self.keep_confidence = keep_confidence
+        self.cache = cache
+        self.target_pruning = target_pruning
+        self.project_inputs = project_inputs
+        self.target_snapshots = target_snapshots
+        self.scores_file_path = scores_file_path
+        self.target_id = target_id
 
         self.profile.source.endpoint = source_input_file_path
         self.profile.target.endpoint = target_input_file_path
 
-    def _create_links_kg(self, accepted_links_file_path):
-        """
-        File content looks like this:
+    def _create_links_kg(self, links_file_path, links_kg_file_path):
+        convert_limes_links(
+            links_file_path,
+            links_kg_file_path,
+            self.links_format,
+            self.keep_confidence)
+
+    def _handle_output_line(self, line: str):
+        super()._handle_output_line(line)
+
+        # It seems LIMES does not handle return values well, i.e. catch
+        # errors and exit gracefully (with exit code 0) even in fatal cases
+        if self._fatal_error_log_snippet in line:
+            self._fatal_error_detected = True
+
+    def _get_min_score(self) -> float:
+        return min(
+            self.profile.acceptance_condition.threshold,
+            self.profile.review_condition.threshold)
+
+    def _get_cache_key(self) -> str:
+        return get_fingerprint(
+            get_file_hash(self.profile.source.endpoint),
+            get_file_version(self.profile.target.endpoint),
+            self.profile.get_fingerprint(),
+            str(self.links_format),
+            str(self.keep_confidence),
+            '' if self.target_pruning is None
+            else self.target_pruning.get_fingerprint())
 
-        <http://slipo.eu/id/poi/5f8cc6e3-bf91-3f7b-ad1a-23e480cd74d1>	<https://sws.geonames.org/9294554/>	0.9321554652991914
-        <http://slipo.eu/id/poi/5f8cc6e3-bf91-3f7b-ad1a-23e480cd74d1>	<https://sws.geonames.org/9300183/>	0.9985261319810942
-        <http://slipo.eu/id/poi/5f8cc6e3-bf91-3f7b-ad1a-23e480cd74d1>	<https://sws.geonames.org/261198/>	0.9042800408579729
-        <http://slipo.eu/id/poi/5f8cc6e3-bf91-3f7b-ad1a-23e480cd74d1>	<https://sws.geonames.org/253825/>	0.9150961228550154
+    def _get_result_file_paths(self, cache_key: str):
         """
+        Returns pairs of result file paths and their respective cache keys
+        """
+        result_file_paths = \
+            [(self.result_links_kg_file_path, cache_key + '.accepted')]
+
+        if self.result_review_links_kg_file_path is not None:
+            result_file_paths.append(
+                (self.result_review_links_kg_file_path, cache_key + '.review'))
+
+        if self.scores_file_path is not None:
+            result_file_paths.append(
+                (self.scores_file_path, cache_key + '.scores'))
+
+        return result_file_paths
 
-        g = Graph()
+    def _restore_from_cache(self, cache_key: str) -> bool:
+        result_file_paths = self._get_result_file_paths(cache_key)
 
-        with open(accepted_links_file_path, 'r') as links_file:
-            for line in links_file:
-                if line.strip() == '':
-                    continue
-                left_iri_str, right_iri_str, confidence_score_str = line.split()
+        if not all([self.cache.contains(k) for _, k in result_file_paths]):
+            return False
 
-                g.add((URIRef(left_iri_str[1:-1]), OWL.sameAs, URIRef(right_iri_str[1:-1])))
+        for file_path, key in result_file_paths:
+            if not self.cache.get(key, file_path):
+                # evicted in the meantime
+                return False
 
-        g.serialize(
-            open(self.result_links_kg_file_path, 'wb'), format='ntriples')
+        return True
 
     def run(self):
+        cache_key = None
+
+        if self.cache is not None:
+            cache_key = self._get_cache_key()
+
+            if self._restore_from_cache(cache_key):
+                logger.info(
+                    f'Re-using cached link sets for '
+                    f'{self.profile.source.endpoint}')
+                return
+
+        # the input preparation points the profile to other datasets
+        profile = self.profile
+        self.profile = copy.deepcopy(profile)
+        tmp_dir = tempfile.mkdtemp()
+
+        try:
+            self._prepare_inputs(tmp_dir)
+            self._link()
+
+        finally:
+            self.profile = profile
+            shutil.rmtree(tmp_dir)
+
+        if cache_key is not None:
+            for file_path, key in self._get_result_file_paths(cache_key):
+                self.cache.put(key, file_path)
+
+    def _project(self, definition, out_file_path: str) -> bool:
+        try:
+            properties = [
+                parse_property(p, self.profile.prefixes)
+                for p in definition.properties]
+            restriction_classes = [
+                parse_restriction(r, self.profile.prefixes)
+                for r in definition.restrictions or []]
+
+        except UnsupportedPropertyDefinition as e:
+            logger.info(f'Not projecting {definition.endpoint}: {e}')
+            return False
+
+        num_resources = write_projection(
+            definition.endpoint,
+            properties,
+            restriction_classes,
+            out_file_path)
+        logger.debug(
+            f'Projected {num_resources} resources of {definition.endpoint}')
+
+        return True
+
+    def _use_target_snapshot(self, tmp_dir: str) -> bool:
+        try:
+            snapshot = self.target_snapshots.get_snapshot(
+                self.profile, self.profile.target.endpoint, self.target_id)
+
+        except UnsupportedPropertyDefinition as e:
+            logger.info(
+                f'Not using a snapshot of {self.profile.target.endpoint}: {e}')
+            return False
+
+        self.profile.target = snapshot.get_target_definition(
+            self.profile.target, self.profile.prefixes)
+
+        if self.target_pruning is not None:
+            # only the partitions overlapping the source need to be pruned
+            partitions_file_path = os.path.join(tmp_dir, 'snapshot_target.nt')
+            snapshot.write_partitions(
+                self.target_pruning.get_source_extent(
+                    self.profile, self.profile.source.endpoint).bbox,
+                partitions_file_path)
+            self.profile.target.endpoint = partitions_file_path
+
+        return True
+
+    def _prepare_inputs(self, tmp_dir: str):
+        """
+        Replaces the target dataset by its snapshot, prunes the target
+        dataset and projects the input datasets (if configured) into tmp_dir
+        and points the profile to the results
+        """
+        uses_snapshot = self.target_snapshots is not None and \
+            self._use_target_snapshot(tmp_dir)
+
+        if self.target_pruning is not None:
+            pruned_file_path = os.path.join(tmp_dir, 'pruned_target.nt')
+            self.target_pruning.prune(
+                self.profile,
+                self.profile.source.endpoint,
+                self.profile.target.endpoint,
+                pruned_file_path)
+            self.profile.target.endpoint = pruned_file_path
+
+        if self.project_inputs:
+            definitions = [('source', self.profile.source)]
+
+            # snapshots are projected already
+            if not uses_snapshot:
+                definitions.append(('target', self.profile.target))
+
+            for name, definition in definitions:
+                projected_file_path = \
+                    os.path.join(tmp_dir, f'projected_{name}.nt')
+
+                if self._project(definition, projected_file_path):
+                    definition.endpoint = projected_file_path
+
+    def _link(self):
+        """
+        Runs LIMES and writes the result links files
+        """
         tmp_dir = tempfile.mkdtemp()
         config_file_path = os.path.join(
             tmp_dir, 'limes_config_generated.properties')
 
+        # Relative output file paths would be resolved w.r.t. the LIMES
+        # directory and thus clash with concurrent LIMES runs. Hence they are
+        # put into the run's tmp dir.
+        for condition in [
+                self.profile.acceptance_condition,
+                self.profile.review_condition]:
+            if not os.path.isabs(condition.file_path):
+                condition.file_path = \
+                    os.path.join(tmp_dir, condition.file_path)
+
         self.profile.to_config_file(config_file_path)
-        wd = self.limes_executable_path.rsplit(os.sep, 1)[0]
 
         try:
-            output = subprocess.check_output(
-                f'{self.limes_executable_path} {config_file_path}',
-                stderr=subprocess.STDOUT,
-                shell=True,
-                universal_newlines=True,
-                cwd=wd)
-        except subprocess.CalledProcessError as e:
-            log_msg = \
-                f'{self.limes_executable_path} failed with return code ' \
-                f'{e.returncode}:\n{e.output}'
-            logger.error(log_msg)
+            self._fatal_error_detected = False
+            output = self._execute([self.exec_path, config_file_path]).output
 
-            shutil.rmtree(tmp_dir)
-            raise RunnerExecutionFailed(log_msg)
-
-        else:
-            # It seems LIMES does not handle return values well, i.e. catch
-            # errors and exit gracefully (with exit code 0) even in fatal cases
-            fatal_error_log_snippet = 'Exception in thread "main"'
-            if fatal_error_log_snippet in output:
-                log_msg = \
-                    f'{self.limes_executable_path} seemingly failed:\n{output}'
+            if self._fatal_error_detected:
+                log_msg = f'{self.exec_path} seemingly failed:\n{output}'
                 logger.error(log_msg)
 
-                shutil.rmtree(tmp_dir)
                 raise RunnerExecutionFailed(log_msg)
 
-            logger.debug(f'{self.limes_executable_path} succeeded:\n{output}')
+            logger.debug(f'{self.exec_path} succeeded')
 
-        accepted_links_file_name = self.profile.acceptance_condition.file_path
+            self._create_links_kg(
+                self.profile.acceptance_condition.file_path,
+                self.result_links_kg_file_path)
 
-        if not os.path.isabs(accepted_links_file_name):
-            executable_dir = os.path.dirname(self.limes_executable_path)
-            accepted_links_file_name = \
-                os.path.join(executable_dir, accepted_links_file_name)
+            if self.result_review_links_kg_file_path is not None:
+                self._create_links_kg(
+                    self.profile.review_condition.file_path,
+                    self.result_review_links_kg_file_path)
 
-        self._create_links_kg(accepted_links_file_name)
+            if self.scores_file_path is not None:
+                ScoredLinks.from_limes_files(
+                    [self.profile.acceptance_condition.file_path,
+                     self.profile.review_condition.file_path],
+                    self._get_min_score()).save(self.scores_file_path)
 
-        shutil.rmtree(tmp_dir)
+        finally:
+            shutil.rmtree(tmp_dir)
@@ -0,0 +1,181 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.links import Link, iter_limes_links, write_links
+
+
+class ScoredLinks(object):
+    """
+    The scored link candidates of a linking run, kept in columnar form to
+    re-threshold them without running LIMES again.
+
+    IRIs are interned: the IRI table is one UTF-8 byte array with the IRIs
+    separated by newlines (which IRIs cannot contain), links refer to IRIs by
+    their index. Links are stored as int32 source and target IRI indexes and
+    float32 confidence scores, sorted by descending score, s.t. the links
+    with a score of at least some threshold are a prefix found by binary
+    search.
+
+    Only candidates with a score of at least min_score (the lowest threshold
+    of the linking run) are known, so lower thresholds cannot be served.
+    Scores are compared in float32 precision.
+    """
+
+    def __init__(
+            self,
+            iri_bytes: np.ndarray,
+            source_ids: np.ndarray,
+            target_ids: np.ndarray,
+            scores: np.ndarray,
+            min_score: float):
+
+        self.iri_bytes = iri_bytes
+        self.source_ids = source_ids
+        self.target_ids = target_ids
+        self.scores = scores
+        self.min_score = float(min_score)
+
+        self._iris = None
+
+    @classmethod
+    def from_links(cls, links: Iterable[Link], min_score: float) \
+            -> 'ScoredLinks':
+        """
+        Interns the links' IRIs. Links with the same source and target IRI
+        are kept once, with their highest score.
+        """
+        iri_ids: Dict[str, int] = {}
+        pair_scores: Dict[Tuple[int, int], float] = {}
+
+        for source_iri, target_iri, score in links:
+            pair = \
+                iri_ids.setdefault(source_iri, len(iri_ids)), \
+                iri_ids.setdefault(target_iri, len(iri_ids))
+            pair_scores[pair] = max(score, pair_scores.get(pair, score))
+
+        pairs = np.array(list(pair_scores.keys()), dtype=np.int32)
+        pairs = pairs.reshape((len(pair_scores), 2))
+        scores = np.array(list(pair_scores.values()), dtype=np.float32)
+        order = np.argsort(-scores, kind='stable')
+
+        iri_bytes = np.frombuffer(
+            '\n'.join(iri_ids.keys()).encode('utf-8'), dtype=np.uint8)
+
+        return cls(
+            iri_bytes, pairs[order, 0], pairs[order, 1], scores[order],
+            min_score)
+
+    @classmethod
+    def from_limes_files(
+            cls, limes_links_file_paths: List[str], min_score: float) \
+            -> 'ScoredLinks':
+        """
+        Reads the links of LIMES output files in TAB format, e.g. of the
+        acceptance and the review file
+        """
+        def iter_links():
+            for file_path in limes_links_file_paths:
+                yield from iter_limes_links(file_path)
+
+        return cls.from_links(iter_links(), min_score)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'ScoredLinks':
+        with np.load(file_path, allow_pickle=False) as npz:
+            return cls(
+                npz['iri_bytes'],
+                npz['source_ids'],
+                npz['target_ids'],
+                npz['scores'],
+                float(npz['min_score']))
+
+    def save(self, file_path: str):
+        """
+        Writes the links to an uncompressed .npz file. Note that NumPy adds
+        the .npz suffix to file paths without it.
+        """
+        # file objects keep NumPy from appending the .npz suffix
+        with open(file_path, 'wb') as out_file:
+            np.savez(
+                out_file,
+                iri_bytes=self.iri_bytes,
+                source_ids=self.source_ids,
+                target_ids=self.target_ids,
+                scores=self.scores,
+                min_score=np.array(self.min_score))
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    @property
+    def iris(self) -> List[str]:
+        if self._iris is None:
+            iri_str = self.iri_bytes.tobytes().decode('utf-8')
+            self._iris = iri_str.split('\n') if iri_str else []
+
+        return self._iris
+
+    def _get_num_links(self, threshold: float) -> int:
+        """
+        Returns the number of links with a score of at least the threshold
+        """
+        if threshold < self.min_score:
+            raise ValueError(
+                f'Only links with a score of at least {self.min_score} are '
+                f'known')
+
+        # scores are sorted in descending order
+        return int(np.searchsorted(
+            -self.scores, -np.float32(threshold), side='right'))
+
+    def _get_links(self, start: int, end: int) -> List[Link]:
+        iris = self.iris
+
+        return [
+            (iris[source_id], iris[target_id], float(score))
+            for source_id, target_id, score in zip(
+                self.source_ids[start:end].tolist(),
+                self.target_ids[start:end].tolist(),
+                self.scores[start:end].tolist())]
+
+    def get_links(self, threshold: float) -> List[Link]:
+        """
+        Returns the links with a score of at least the threshold
+        """
+        return self._get_links(0, self._get_num_links(threshold))
+
+    def split(self, acceptance_threshold: float, review_threshold: float) \
+            -> Tuple[List[Link], List[Link]]:
+        """
+        Returns the accepted links, i.e. the links with a score of at least
+        the acceptance threshold, and the links to review, i.e. the other
+        links with a score of at least the review threshold
+        """
+        num_accepted = self._get_num_links(acceptance_threshold)
+        num_links = max(self._get_num_links(review_threshold), num_accepted)
+
+        return \
+            self._get_links(0, num_accepted), \
+            self._get_links(num_accepted, num_links)
+
+    def write(
+            self,
+            acceptance_threshold: float,
+            review_threshold: float,
+            links_file_path: str,
+            review_links_file_path: str = None,
+            links_format: LinksFormat = LinksFormat.NT,
+            keep_confidence: bool = False):
+        """
+        Writes the accepted links and the links to review for the given
+        thresholds like a linking run with these thresholds does
+        """
+        accepted, review = self.split(acceptance_threshold, review_threshold)
+
+        write_links(accepted, links_file_path, links_format, keep_confidence)
+
+        if review_links_file_path is not None:
+            write_links(
+                review, review_links_file_path, links_format, keep_confidence)
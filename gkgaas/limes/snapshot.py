@@ -0,0 +1,446 @@
+import copy
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from gkgaas.limes.limesprofile import LIMESProfile, LIMESTarget
+from gkgaas.limes.properties import LIMESProperty, PropertyGraph, \
+    parse_property, parse_restriction, strip_preprocessing, \
+    get_path_predicates
+from gkgaas.limes.pruning import BoundingBox, geo_has_geometry_iri, \
+    geo_as_wkt_iri, slipo_category_iri, get_wkt_bbox, union_bboxes, \
+    intersects
+from gkgaas.utils.filecache import get_file_version, get_fingerprint
+from gkgaas.utils.ntriples import format_iri, get_literal_value, \
+    get_literal_suffix, format_literal
+
+logger = logging.getLogger(__name__)
+
+_chunk_size = 1024 * 1024
+
+_index_file_name = 'index.json'
+_snapshot_file_name = 'snapshot.nt'
+# the input triples read for the snapshot, kept for incremental rebuilds
+_filtered_file_name = 'filtered.nt'
+
+_geometry_property_name = '_snapshot_geometry'
+_category_property_name = '_snapshot_category'
+
+# Changes whenever snapshots are written differently, s.t. snapshots of an
+# older format are rebuilt
+_snapshot_format_version = '2'
+
+
+class LinkingSnapshot(object):
+    """
+    A linking-ready snapshot of one version of a KG for one LIMES target
+    definition (see LinkingSnapshotStore). The snapshot file holds the
+    triples on the definition's property paths, grouped into spatial
+    partitions, which are listed in the index with their byte range in the
+    snapshot file, the bounding box of their resources' geometries and
+    their number of resources. Resources without geometry form a partition
+    without bounding box.
+    """
+
+    def __init__(self, snapshot_dir: str):
+        self.snapshot_dir = snapshot_dir
+        self.file_path = os.path.join(snapshot_dir, _snapshot_file_name)
+
+        with open(os.path.join(snapshot_dir, _index_file_name)) as in_file:
+            self.index = json.load(in_file)
+
+    @property
+    def normalized_predicates(self) -> List[str]:
+        return self.index['normalized_predicates']
+
+    def get_target_definition(self, definition: LIMESTarget, prefixes) \
+            -> LIMESTarget:
+        """
+        Returns a copy of the target definition reading the snapshot, i.e.
+        without the preprocessing functions already applied to the
+        snapshot's literals
+        """
+        normalized_predicates = set(self.normalized_predicates)
+        definition = copy.deepcopy(definition)
+        definition.endpoint = self.file_path
+
+        properties = []
+
+        for property_str in definition.properties:
+            prop = parse_property(property_str, prefixes)
+
+            if prop.preprocessing and \
+                    format_iri(prop.path[-1]) in normalized_predicates:
+                property_str = strip_preprocessing(property_str)
+
+            properties.append(property_str)
+
+        definition.properties = properties
+
+        return definition
+
+    def write_partitions(
+            self, bbox: Optional[BoundingBox], out_file_path: str) -> int:
+        """
+        Writes the partitions overlapping the given bounding box and the
+        partition of resources without geometry. Returns the number of
+        resources written.
+        """
+        num_resources = 0
+
+        with open(self.file_path, 'rb') as in_file, \
+                open(out_file_path, 'wb') as out_file:
+            for partition in self.index['partitions']:
+                if bbox is not None and partition['bbox'] is not None and \
+                        not intersects(partition['bbox'], bbox):
+                    continue
+
+                in_file.seek(partition['offset'])
+                remaining = partition['length']
+
+                while remaining > 0:
+                    chunk = in_file.read(min(remaining, _chunk_size))
+                    out_file.write(chunk)
+                    remaining -= len(chunk)
+
+                num_resources += partition['num_resources']
+
+        return num_resources
+
+
+class LinkingSnapshotStore(object):
+    """
+    Keeps linking-ready snapshots of KGs used as LIMES target, s.t. a large
+    and rarely changing KG like the topio KG is not re-read and
+    re-preprocessed by LIMES in full on every linking run.
+
+    A snapshot holds only the triples on the property paths of a target
+    definition, plus the geometry path and category property used for
+    pruning (see gkgaas.limes.pruning.TargetPruning). The literals at the end
+    of property paths with preprocessing functions (like
+    'nolang->lowercase' for names or a regexreplace stripping the CRS from
+    WKT literals) are stored preprocessed, keeping their datatype and (unless
+    dropped by nolang) language tag, s.t. the target definition reading
+    the snapshot does without them (see
+    LinkingSnapshot.get_target_definition()). Predicates ending paths with
+    different preprocessing functions are not normalized. Resources are
+    grouped into partitions of a grid of partition_size degrees by the
+    center of their geometries' bounding box, s.t. the part of the KG
+    overlapping a region can be read without parsing (see
+    LinkingSnapshot.write_partitions()).
+
+    Snapshots live in <base_dir>/<hash of KG ID>/<definition
+    fingerprint>/<KG version>. The KG ID identifies a KG across its versions,
+    which may be stored at different paths (e.g. the topio ID of the topio
+    KG), and defaults to the KG file path. Snapshots are built on first
+    request of a KG version. If the KG file grew by appending to the
+    previous snapshot's KG version (checked by hashing the previous
+    content), only the appended triples are read; otherwise, e.g. for a KG
+    rewritten by FAGI, the snapshot is built in full. When a new snapshot is
+    built, all but the previous snapshot of the KG and definition are
+    removed.
+    """
+
+    def __init__(
+            self,
+            base_dir: str,
+            partition_size: float = 1.0,
+            geometry_path: List[str] = None,
+            category_property: str = slipo_category_iri):
+
+        os.makedirs(base_dir, exist_ok=True)
+
+        self.base_dir = base_dir
+        self.partition_size = partition_size
+        self.geometry_path = geometry_path or \
+            [geo_has_geometry_iri, geo_as_wkt_iri]
+        self.category_property = category_property
+
+        self._locks = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+
+    def _get_lock(self, definition_dir: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks[definition_dir]
+
+    def _get_pruning_properties(self) -> List[LIMESProperty]:
+        return [
+            LIMESProperty(self.geometry_path, _geometry_property_name, []),
+            LIMESProperty(
+                [self.category_property], _category_property_name, [])]
+
+    def _get_definition_dir(self, profile: LIMESProfile, kg_id: str) -> str:
+        kg_id_hash = hashlib.sha256(kg_id.encode('utf-8')).hexdigest()
+        definition_fingerprint = get_fingerprint(
+            _snapshot_format_version,
+            str(self.partition_size),
+            *self.geometry_path,
+            self.category_property,
+            *profile.target.properties,
+            *(profile.target.restrictions or []),
+            *[f'{p.label} {p.namespace}' for p in profile.prefixes or []])
+
+        return os.path.join(
+            self.base_dir, kg_id_hash, definition_fingerprint)
+
+    @staticmethod
+    def _get_snapshot_dirs(definition_dir: str) -> List[str]:
+        """
+        Returns the complete snapshot directories, oldest first
+        """
+        snapshot_dirs = []
+
+        for dir_entry in os.scandir(definition_dir):
+            if dir_entry.is_dir() and not dir_entry.name.endswith('.tmp'):
+                snapshot_dirs.append(
+                    (LinkingSnapshot(dir_entry.path).index['built_at'],
+                     dir_entry.path))
+
+        return [dir_path for _, dir_path in sorted(snapshot_dirs)]
+
+    @staticmethod
+    def _filter(kg_file, predicates, out_file, hash_obj):
+        """
+        Copies the lines of the given predicates from the rest of the
+        (binary) KG file to the out file and feeds all bytes read into the
+        hash object
+        """
+        predicates = set([p.encode('utf-8') for p in predicates])
+
+        for line in kg_file:
+            hash_obj.update(line)
+            parts = line.split(maxsplit=2)
+
+            if len(parts) == 3 and parts[1] in predicates:
+                out_file.write(line if line.endswith(b'\n') else line + b'\n')
+
+    def _write_filtered(
+            self,
+            kg_file_path: str,
+            predicates,
+            previous_dir: Optional[str],
+            out_file_path: str) -> Tuple[str, int]:
+        """
+        Writes the triples of the given predicates of the KG, re-using the
+        previous snapshot's filtered triples if the KG grew by appending.
+        Returns the hash and size of the KG content read.
+        """
+        kg_size = os.path.getsize(kg_file_path)
+        hash_obj = hashlib.sha256()
+
+        with open(kg_file_path, 'rb') as kg_file, \
+                open(out_file_path, 'wb') as out_file:
+
+            if previous_dir is not None:
+                with open(os.path.join(previous_dir, _index_file_name)) as f:
+                    previous_index = json.load(f)
+
+                previous_size = previous_index['kg_size']
+                prefix_hash_obj = hashlib.sha256()
+
+                if previous_size <= kg_size:
+                    for chunk in iter(lambda: kg_file.read(
+                            min(_chunk_size,
+                                previous_size - kg_file.tell())), b''):
+                        prefix_hash_obj.update(chunk)
+
+                if previous_size <= kg_size and \
+                        prefix_hash_obj.hexdigest() == \
+                        previous_index['kg_hash']:
+                    logger.info(
+                        f'Reading the {kg_size - previous_size} bytes '
+                        f'appended to {kg_file_path} only')
+
+                    with open(os.path.join(
+                            previous_dir, _filtered_file_name), 'rb') as f:
+                        shutil.copyfileobj(f, out_file)
+
+                    hash_obj = prefix_hash_obj
+                else:
+                    kg_file.seek(0)
+
+            self._filter(kg_file, predicates, out_file, hash_obj)
+
+        return hash_obj.hexdigest(), kg_size
+
+    def _get_normalizations(self, properties: List[LIMESProperty]) \
+            -> Dict[str, LIMESProperty]:
+        """
+        Returns the predicates ending property paths with preprocessing
+        functions which can be applied to all their literals, and the
+        respective property
+        """
+        intermediate_predicates = set(
+            [format_iri(step) for p in properties for step in p.path[:-1]])
+        last_step_properties = defaultdict(list)
+
+        for prop in properties:
+            last_step_properties[format_iri(prop.path[-1])].append(prop)
+
+        normalizations = {}
+
+        for predicate, props in last_step_properties.items():
+            preprocessings = set([tuple(p.preprocessing) for p in props])
+
+            if predicate not in intermediate_predicates and \
+                    len(preprocessings) == 1 and props[0].preprocessing:
+                normalizations[predicate] = props[0]
+
+        return normalizations
+
+    @staticmethod
+    def _normalize(prop: LIMESProperty, literal: str) -> str:
+        """
+        Applies the preprocessing functions of a property to a literal,
+        keeping its datatype (e.g. geo:wktLiteral) and its language tag
+        unless the functions drop it (nolang)
+        """
+        suffix = get_literal_suffix(literal)
+
+        if suffix.startswith('@') and 'nolang' in prop.preprocessing:
+            suffix = ''
+
+        return format_literal(
+            prop.preprocess(get_literal_value(literal)), suffix)
+
+    def _get_partition(self, bbox: Optional[BoundingBox]) \
+            -> Optional[Tuple[int, int]]:
+
+        if bbox is None:
+            return None
+
+        return \
+            math.floor((bbox[0] + bbox[2]) / 2 / self.partition_size), \
+            math.floor((bbox[1] + bbox[3]) / 2 / self.partition_size)
+
+    def _write_snapshot(
+            self,
+            properties: List[LIMESProperty],
+            restriction_classes: List[str],
+            snapshot_dir: str) -> dict:
+
+        graph = PropertyGraph(
+            os.path.join(snapshot_dir, _filtered_file_name),
+            properties + self._get_pruning_properties(),
+            restriction_classes)
+        normalizations = self._get_normalizations(properties)
+
+        partition_resources = defaultdict(list)
+        partition_bboxes = {}
+
+        for subj in graph.get_resources():
+            bbox = None
+
+            for wkt in graph.get_values(subj).get(
+                    _geometry_property_name, []):
+                bbox = union_bboxes(bbox, get_wkt_bbox(wkt))
+
+            partition = self._get_partition(bbox)
+            partition_resources[partition].append(subj)
+            partition_bboxes[partition] = \
+                union_bboxes(partition_bboxes.get(partition), bbox)
+
+        partitions = []
+
+        with open(os.path.join(snapshot_dir, _snapshot_file_name), 'wb') \
+                as out_file:
+
+            # resources without geometry last
+            for partition in sorted(
+                    partition_resources.keys(),
+                    key=lambda p: (p is None, p or (0, 0))):
+                offset = out_file.tell()
+
+                for subj in partition_resources[partition]:
+                    for s, p, o in graph.get_triples(subj):
+                        if p in normalizations and o.startswith('"'):
+                            o = self._normalize(normalizations[p], o)
+
+                        out_file.write(f'{s} {p} {o} .\n'.encode('utf-8'))
+
+                partitions.append({
+                    'partition': partition,
+                    'bbox': partition_bboxes[partition],
+                    'offset': offset,
+                    'length': out_file.tell() - offset,
+                    'num_resources': len(partition_resources[partition])})
+
+        return {
+            'partitions': partitions,
+            'normalized_predicates': sorted(normalizations.keys())}
+
+    def get_snapshot(
+            self,
+            profile: LIMESProfile,
+            kg_file_path: str,
+            kg_id: str = None) -> LinkingSnapshot:
+        """
+        Returns the snapshot of the current version of the KG for the
+        profile's target definition, building it first if needed. The KG
+        version is the one stored at kg_file_path, the KG is identified by
+        kg_id or, if not given, by the file path.
+        """
+        properties = [
+            parse_property(p, profile.prefixes)
+            for p in profile.target.properties]
+        restriction_classes = [
+            parse_restriction(r, profile.prefixes)
+            for r in profile.target.restrictions or []]
+
+        definition_dir = self._get_definition_dir(
+            profile, kg_id or os.path.abspath(kg_file_path))
+        version = get_file_version(kg_file_path)
+        snapshot_dir = os.path.join(definition_dir, version)
+
+        with self._get_lock(definition_dir):
+            if os.path.isdir(snapshot_dir):
+                return LinkingSnapshot(snapshot_dir)
+
+            os.makedirs(definition_dir, exist_ok=True)
+            previous_dirs = self._get_snapshot_dirs(definition_dir)
+            tmp_snapshot_dir = \
+                tempfile.mkdtemp(suffix='.tmp', dir=definition_dir)
+
+            logger.info(
+                f'Building linking snapshot {snapshot_dir} of {kg_file_path}')
+
+            try:
+                kg_hash, kg_size = self._write_filtered(
+                    kg_file_path,
+                    get_path_predicates(
+                        properties + self._get_pruning_properties(),
+                        restriction_classes),
+                    previous_dirs[-1] if previous_dirs else None,
+                    os.path.join(tmp_snapshot_dir, _filtered_file_name))
+
+                index = self._write_snapshot(
+                    properties, restriction_classes, tmp_snapshot_dir)
+                index['kg_version'] = version
+                index['kg_hash'] = kg_hash
+                index['kg_size'] = kg_size
+                index['built_at'] = time.time()
+
+                with open(os.path.join(
+                        tmp_snapshot_dir, _index_file_name), 'w') as out_file:
+                    json.dump(index, out_file)
+
+            except Exception:
+                shutil.rmtree(tmp_snapshot_dir)
+                raise
+
+            os.rename(tmp_snapshot_dir, snapshot_dir)
+
+            # keep the previous snapshot which might still be read
+            for dir_path in previous_dirs[:-1]:
+                logger.info(f'Removing outdated linking snapshot {dir_path}')
+                shutil.rmtree(dir_path)
+
+        return LinkingSnapshot(snapshot_dir)
@@ -0,0 +1,319 @@
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.limesprofile import LIMESProfile
+from gkgaas.limes.links import iter_limes_links, write_links
+from gkgaas.limes.native import UnsupportedLinkingProfile, \
+    get_distance_measure, is_geo_measure, get_max_distance, get_buffer, \
+    get_bbox
+from gkgaas.limes.properties import PropertyGraph, parse_property, \
+    parse_restriction, UnsupportedPropertyDefinition
+from gkgaas.limes.pruning import TargetPruning
+from gkgaas.limes.runner import LIMESRunner
+from gkgaas.limes.scores import ScoredLinks
+from gkgaas.limes.snapshot import LinkingSnapshotStore
+from gkgaas.toolrunner import run_in_parallel
+from gkgaas.utils.filecache import FileCache
+
+logger = logging.getLogger(__name__)
+
+# (column, row) of a tile in the grid of tiles
+Tile = Tuple[int, int]
+
+
+class _TileLIMESRunner(LIMESRunner):
+    """
+    Runs LIMES on the datasets of one tile and keeps the LIMES output as is,
+    s.t. the confidence scores are available when merging the tiles' links
+    """
+
+    def _create_links_kg(self, links_file_path, links_kg_file_path):
+        shutil.copyfile(links_file_path, links_kg_file_path)
+
+
+class TiledLIMESRunner(LIMESRunner):
+    """
+    Runs LIMES on spatial tiles of the source and target datasets instead of
+    on the whole datasets at once, for profiles whose metric is a distance
+    measure (Geo_* measures on WKT or euclidean on lat/long) or an AND
+    combination with a distance measure. Such a metric bounds the distance a
+    link can span (see gkgaas.limes.native.get_max_distance()), hence source
+    resources only need to be compared with target resources within this
+    distance.
+
+    The resources are put into a grid of tiles of tile_size degrees by the
+    bounding box of their geometries (points, lines, polygons, ...): every
+    source resource goes into all tiles its bounding box touches, every
+    target resource into all tiles its bounding box extended by the maximal
+    link distance (buffer) touches. Every point set distance is at least the
+    distance of the closest vertices, so a linked pair shares the tile of the
+    source vertex closest to the target. Only the triples on the profile's
+    property paths (and the rdf:type statements if the profile has class
+    restrictions) are written to the tile datasets, as LIMES reads nothing
+    else. Resources without (parsable) coordinates cannot be linked by such
+    a metric and are dropped.
+
+    The tiles are linked by up to max_workers LIMES processes at a time,
+    each with the given timeout and memory limit and holding one of the given
+    slots (see run_in_parallel()), s.t. the tile runs count towards the
+    service-wide number of LIMES processes. The tiles' link sets are
+    merged without duplicates, keeping the highest confidence of pairs found
+    in several tiles, and written like LIMESRunner does. Hence LIMES finds
+    the same links as without tiling but holds much smaller datasets in
+    memory and the runs are parallelized. As the tile datasets are projected
+    anyway, there is no project_inputs option.
+    """
+
+    def __init__(
+            self,
+            limes_executable_path: str,
+            profile: LIMESProfile,
+            source_input_file_path: str,
+            target_input_file_path: str,
+            result_links_kg_file_path: str,
+            output_dir: str,
+            result_review_links_kg_file_path: str = None,
+            links_format: LinksFormat = LinksFormat.NT,
+            keep_confidence: bool = False,
+            cache: FileCache = None,
+            timeout: float = None,
+            memory_limit: int = None,
+            output_logger: logging.Logger = None,
+            target_pruning: TargetPruning = None,
+            target_snapshots: LinkingSnapshotStore = None,
+            scores_file_path: str = None,
+            target_id: str = None,
+            tile_size: float = 1.0,
+            max_workers: int = 2,
+            slots: threading.BoundedSemaphore = None):
+
+        super().__init__(
+            limes_executable_path,
+            profile,
+            source_input_file_path,
+            target_input_file_path,
+            result_links_kg_file_path,
+            output_dir,
+            result_review_links_kg_file_path,
+            links_format,
+            keep_confidence,
+            cache,
+            timeout,
+            memory_limit,
+            output_logger,
+            target_pruning,
+            target_snapshots=target_snapshots,
+            scores_file_path=scores_file_path,
+            target_id=target_id)
+
+        self.tile_size = tile_size
+        self.max_workers = max_workers
+        self.slots = slots
+
+        self._init_tiling()
+
+    @staticmethod
+    def supports_profile(profile: LIMESProfile) -> bool:
+        try:
+            get_distance_measure(profile)
+
+            for definition in [profile.source, profile.target]:
+                for p in definition.properties:
+                    parse_property(p, profile.prefixes)
+
+                for r in definition.restrictions or []:
+                    parse_restriction(r, profile.prefixes)
+
+            return True
+
+        except (UnsupportedLinkingProfile, UnsupportedPropertyDefinition):
+            return False
+
+    def _init_tiling(self):
+        self.distance_measure = get_distance_measure(self.profile)
+        self.is_geo = is_geo_measure(self.distance_measure)
+        self.max_distance = get_max_distance(
+            self.distance_measure, self.profile)
+
+    def _get_tile(self, lat: float, lon: float) -> Tile:
+        return \
+            math.floor(lon / self.tile_size), math.floor(lat / self.tile_size)
+
+    def _get_tiles(
+            self,
+            min_lat: float,
+            min_lon: float,
+            max_lat: float,
+            max_lon: float,
+            buffered: bool) -> List[Tile]:
+        """
+        Returns the tiles a bounding box, optionally extended by the maximal
+        link distance, touches
+        """
+        if buffered:
+            lat_buffer, lon_buffer = get_buffer(
+                self.max_distance,
+                self.is_geo,
+                max(abs(min_lat), abs(max_lat)))
+
+            min_lat, max_lat = min_lat - lat_buffer, max_lat + lat_buffer
+            min_lon, max_lon = min_lon - lon_buffer, max_lon + lon_buffer
+
+        min_col, min_row = self._get_tile(min_lat, min_lon)
+        max_col, max_row = self._get_tile(max_lat, max_lon)
+
+        return [(col, row)
+                for col in range(min_col, max_col + 1)
+                for row in range(min_row, max_row + 1)]
+
+    def _load(self, is_source: bool) -> PropertyGraph:
+        definition = self.profile.source if is_source else self.profile.target
+        properties = [
+            parse_property(p, self.profile.prefixes)
+            for p in definition.properties]
+        restriction_classes = [
+            parse_restriction(r, self.profile.prefixes)
+            for r in definition.restrictions or []]
+
+        return PropertyGraph(
+            definition.endpoint, properties, restriction_classes)
+
+    def _get_tile_resources(
+            self,
+            graph: PropertyGraph,
+            is_source: bool,
+            tiles: Set[Tile] = None) -> Dict[Tile, List[str]]:
+        """
+        Returns the resources per tile. Target resources are only assigned to
+        the given tiles.
+        """
+        coordinate_properties = self.distance_measure.source_properties \
+            if is_source else self.distance_measure.target_properties
+        tile_resources = defaultdict(list)
+        num_skipped = 0
+
+        for subj in graph.get_resources():
+            bbox = get_bbox(
+                graph.get_values(subj), coordinate_properties, self.is_geo)
+
+            if bbox is None:
+                num_skipped += 1
+                continue
+
+            for tile in self._get_tiles(*bbox, buffered=not is_source):
+                if is_source or tile in tiles:
+                    tile_resources[tile].append(subj)
+
+        if num_skipped:
+            file_path = self.profile.source.endpoint if is_source \
+                else self.profile.target.endpoint
+            logger.info(
+                f'Skipped {num_skipped} resources of {file_path} without '
+                f'coordinates')
+
+        return tile_resources
+
+    def _write_tiles(self, tiles_dir: str) -> List[str]:
+        """
+        Writes the source and target dataset of every tile holding source
+        and target resources into a directory of its own. Returns the tile
+        directories.
+        """
+        source_graph = self._load(True)
+        source_tiles = self._get_tile_resources(source_graph, True)
+
+        target_graph = self._load(False)
+        target_tiles = self._get_tile_resources(
+            target_graph, False, set(source_tiles.keys()))
+
+        tile_dirs = []
+
+        for tile, target_resources in target_tiles.items():
+            tile_dir = os.path.join(tiles_dir, f'{tile[0]}_{tile[1]}')
+            os.mkdir(tile_dir)
+
+            source_graph.write_triples(
+                source_tiles[tile], os.path.join(tile_dir, 'source.nt'))
+            target_graph.write_triples(
+                target_resources, os.path.join(tile_dir, 'target.nt'))
+
+            tile_dirs.append(tile_dir)
+
+        logger.info(
+            f'Linking {len(tile_dirs)} tiles of '
+            f'{self.profile.source.endpoint}')
+
+        return tile_dirs
+
+    def _link_tiles(self, tile_dirs: List[str]):
+        run_in_parallel(
+            [_TileLIMESRunner(
+                limes_executable_path=self.exec_path,
+                profile=self.profile,
+                source_input_file_path=os.path.join(tile_dir, 'source.nt'),
+                target_input_file_path=os.path.join(tile_dir, 'target.nt'),
+                result_links_kg_file_path=os.path.join(
+                    tile_dir, 'accepted.tsv'),
+                output_dir=tile_dir,
+                result_review_links_kg_file_path=os.path.join(
+                    tile_dir, 'review.tsv'),
+                timeout=self.timeout,
+                memory_limit=self.memory_limit,
+                output_logger=self.output_logger)
+             for tile_dir in tile_dirs],
+            self.max_workers,
+            self.slots)
+
+    @staticmethod
+    def _merge_links(tile_dirs: List[str], file_name: str) \
+            -> Dict[Tuple[str, str], float]:
+
+        links = {}
+
+        for tile_dir in tile_dirs:
+            for source_iri, target_iri, confidence in \
+                    iter_limes_links(os.path.join(tile_dir, file_name)):
+                key = source_iri, target_iri
+                links[key] = max(confidence, links.get(key, confidence))
+
+        return links
+
+    def _link(self):
+        tiles_dir = tempfile.mkdtemp()
+
+        try:
+            tile_dirs = self._write_tiles(tiles_dir)
+            self._link_tiles(tile_dirs)
+
+            accepted = self._merge_links(tile_dirs, 'accepted.tsv')
+            write_links(
+                [(s, t, c) for (s, t), c in accepted.items()],
+                self.result_links_kg_file_path,
+                self.links_format,
+                self.keep_confidence)
+
+            review = self._merge_links(tile_dirs, 'review.tsv')
+            review = [(s, t, c) for (s, t), c in review.items()
+                      if (s, t) not in accepted]
+
+            if self.result_review_links_kg_file_path is not None:
+                write_links(
+                    review,
+                    self.result_review_links_kg_file_path,
+                    self.links_format,
+                    self.keep_confidence)
+
+            if self.scores_file_path is not None:
+                ScoredLinks.from_links(
+                    [(s, t, c) for (s, t), c in accepted.items()] + review,
+                    self._get_min_score()).save(self.scores_file_path)
+
+        finally:
+            shutil.rmtree(tiles_dir)
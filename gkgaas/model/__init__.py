@@ -1,7 +1,11 @@
-from typing import List, Optional
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
+from gkgaas.jobs import JobStage, JobStatus
+
 
 class ConversionDescription(BaseModel):
     input_file_paths: List[str]
@@ -19,3 +23,34 @@ class KnowledgeGraphConversionInformation(BaseModel):
 class KnowledgeGraphInfo(BaseModel):
     user_kg_topio_id: str
     topio_kg_topio_id: str
+
+
+class JobInfo(BaseModel):
+    job_id: str
+    status: JobStatus
+    stage: JobStage
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    # stage name --> duration in seconds
+    stage_durations: Dict[str, float]
+    result: Optional[KnowledgeGraphInfo]
+    error: Optional[str]
+
+
+class SPARQLResultFormat(Enum):
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+
+class SPARQLQueryRequest(BaseModel):
+    knowledge_graph: KnowledgeGraphInfo
+    query: str
+    # Either offset or cursor (as returned in the X-Next-Cursor header of the
+    # previous page) can be given
+    limit: Optional[int]
+    offset: int = 0
+    cursor: Optional[str]
+    format: SPARQLResultFormat = SPARQLResultFormat.NDJSON
+    # in seconds
+    timeout: Optional[float]
@@ -9,3 +9,10 @@ class SPARQLServer(ABC):
     @abstractmethod
     def stop(self):
         pass
+
+    def wait_until_ready(self, timeout: float = None):
+        """
+        Blocks until the server answers queries. Servers which are ready as
+        soon as run() returns do not need to override this.
+        """
+        pass
@@ -0,0 +1,406 @@
+import asyncio
+import codecs
+import functools
+import http.client
+import json
+import re
+import socket
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Tuple
+
+from gkgaas.exceptions import SPARQLQueryFailed, SPARQLQueryTimeout
+
+JSON = 'json'
+TSV = 'tsv'
+
+_accept_headers = {
+    JSON: 'application/sparql-results+json',
+    TSV: 'text/tab-separated-values'
+}
+
+_bindings_start_pattern = re.compile(r'"bindings"\s*:\s*\[')
+_head_start_pattern = re.compile(r'"head"\s*:\s*')
+
+
+class SPARQLResultRows(object):
+    """
+    Iterator over the rows of a streamed SELECT query result. Rows of JSON
+    results are dicts mapping a variable to its binding (e.g.
+    {'type': 'uri', 'value': 'http://ex.com/s'}), rows of TSV results are
+    dicts mapping a variable to the RDF term (e.g. '<http://ex.com/s>').
+    Variables without a value in a row are missing in the row dict.
+
+    The underlying connection is re-used once all rows were read and closed
+    if the iteration is aborted, so rows should be consumed via
+
+        with client.query_rows(url, query) as rows:
+            for row in rows:
+                ...
+    """
+
+    def __init__(
+            self,
+            head: dict,
+            rows: Iterator[dict],
+            conn: http.client.HTTPConnection,
+            response: http.client.HTTPResponse,
+            client: 'SPARQLClient'):
+
+        self._rows = rows
+        self._conn = conn
+        self._response = response
+        self._client = client
+        self._finished = False
+        self._closed = False
+        self._first_row = None
+
+        # the variables are known as soon as the first row was read
+        self._first_row = next(self, None)
+        self.variables: List[str] = head.get('vars', [])
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        if self._first_row is not None:
+            row, self._first_row = self._first_row, None
+
+            return row
+
+        if self._finished or self._closed:
+            raise StopIteration()
+
+        try:
+            return next(self._rows)
+
+        except StopIteration:
+            self._finished = True
+            self.close()
+            raise
+
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if self._closed:
+            return
+
+        self._closed = True
+        self._rows.close()
+
+        if self._finished and self._response.isclosed() \
+                and not self._response.will_close:
+            self._client._release_connection(self._conn)
+        else:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SPARQLClient(object):
+    """
+    HTTP client for SPARQL endpoints which keeps connections alive and re-uses
+    them across queries (at most max_idle_connections idle connections per
+    endpoint host are kept) and parses results while they are read, s.t.
+    large results do not have to be held in memory.
+
+    The timeout (in seconds) applies to a whole query, including reading the
+    result. It is also sent to the endpoint as timeout parameter, which
+    makes Fuseki abort the query execution. Exceeding it raises
+    SPARQLQueryTimeout.
+
+    The async methods run the blocking queries on a thread pool of
+    max_connections threads to fan out queries to several endpoints.
+    """
+
+    def __init__(
+            self,
+            timeout: float = 60,
+            max_idle_connections: int = 8,
+            max_connections: int = 16,
+            chunk_size: int = 64 * 1024):
+
+        self.timeout = timeout
+        self.max_idle_connections = max_idle_connections
+        self.chunk_size = chunk_size
+
+        self._idle_connections = defaultdict(list)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_connections,
+            thread_name_prefix='gkgaas-sparql-client')
+
+    def _get_connection(self, host: str, port: int) -> http.client.HTTPConnection:
+        with self._lock:
+            connections = self._idle_connections[(host, port)]
+
+            if connections:
+                return connections.pop()
+
+        return http.client.HTTPConnection(host, port)
+
+    def _release_connection(self, conn: http.client.HTTPConnection):
+        with self._lock:
+            connections = self._idle_connections[(conn.host, conn.port)]
+
+            if len(connections) < self.max_idle_connections:
+                connections.append(conn)
+
+                return
+
+        conn.close()
+
+    def _send(
+            self,
+            endpoint_url: str,
+            sparql_query: str,
+            result_format: str,
+            timeout: float
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+
+        url = urllib.parse.urlsplit(endpoint_url)
+        params = {'query': sparql_query}
+
+        if timeout is not None:
+            params['timeout'] = str(int(timeout * 1000))
+
+        body = urllib.parse.urlencode(params)
+        headers = {
+            'Accept': _accept_headers[result_format],
+            'Content-Type': 'application/x-www-form-urlencoded'}
+
+        # A re-used connection might have been closed by the server meanwhile,
+        # so the request is retried once on a fresh connection
+        for attempt in range(2):
+            conn = self._get_connection(url.hostname, url.port or 80)
+            conn.timeout = timeout
+
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+
+            try:
+                conn.request('POST', url.path or '/', body, headers)
+                response = conn.getresponse()
+                break
+
+            except socket.timeout:
+                conn.close()
+                raise SPARQLQueryTimeout(
+                    f'SPARQL query did not finish within {timeout} seconds')
+
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+
+                if attempt == 1:
+                    raise
+
+        if response.status != 200:
+            message = response.read(4096).decode('utf-8', errors='replace')
+            conn.close()
+
+            if response.status == 503 and timeout is not None:
+                raise SPARQLQueryTimeout(
+                    f'SPARQL query did not finish within {timeout} seconds')
+
+            raise SPARQLQueryFailed(
+                f'SPARQL endpoint returned {response.status}: {message}')
+
+        return conn, response
+
+    def _read_chunks(
+            self,
+            response: http.client.HTTPResponse,
+            deadline: float,
+            timeout: float) -> Iterator[str]:
+
+        decoder = codecs.getincrementaldecoder('utf-8')()
+
+        while True:
+            try:
+                chunk = response.read1(self.chunk_size)
+            except socket.timeout:
+                chunk = None
+
+            if chunk is None or \
+                    (deadline is not None and time.monotonic() > deadline):
+                raise SPARQLQueryTimeout(
+                    f'SPARQL query did not finish within {timeout} seconds')
+
+            if not chunk:
+                # marks the connection as ready for the next request
+                response.close()
+
+                return
+
+            yield decoder.decode(chunk)
+
+    def _iter_json_rows(self, chunks: Iterator[str], head: dict):
+        """
+        Incrementally decodes the binding objects of a SPARQL JSON result.
+        The variables (from the result head, which Fuseki writes first) are
+        put into the given head dict as soon as they were read.
+        """
+        json_decoder = json.JSONDecoder()
+        buffer = ''
+        pos = None
+
+        for chunk in chunks:
+            buffer += chunk
+
+            if pos is None:
+                match = _bindings_start_pattern.search(buffer)
+
+                if match is None:
+                    continue
+
+                head_match = _head_start_pattern.search(buffer, 0, match.start())
+                if head_match is not None:
+                    head.update(
+                        json_decoder.raw_decode(buffer, head_match.end())[0])
+
+                pos = match.end()
+
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                    pos += 1
+
+                if pos == len(buffer) or buffer[pos] == ']':
+                    break
+
+                try:
+                    row, pos = json_decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # the binding object is not complete, yet
+                    break
+
+                yield row
+
+            if pos < len(buffer) and buffer[pos] == ']':
+                # consume the rest of the response
+                for _ in chunks:
+                    pass
+
+                return
+
+            buffer = buffer[pos:]
+            pos = 0
+
+        # ASK query results have no bindings
+        if pos is not None or '"boolean"' not in buffer:
+            raise SPARQLQueryFailed('Incomplete SPARQL query result')
+
+    @staticmethod
+    def _iter_lines(chunks: Iterator[str]) -> Iterator[str]:
+        rest = ''
+
+        for chunk in chunks:
+            lines = (rest + chunk).split('\n')
+            rest = lines.pop()
+
+            yield from lines
+
+        if rest:
+            yield rest
+
+    def _iter_tsv_rows(self, chunks: Iterator[str], head: dict):
+        lines = self._iter_lines(chunks)
+        header = next(lines, None)
+
+        if header is None:
+            raise SPARQLQueryFailed('Incomplete SPARQL query result')
+
+        variables = [v.lstrip('?$') for v in header.rstrip('\r').split('\t')]
+        head['vars'] = variables
+
+        for line in lines:
+            line = line.rstrip('\r')
+
+            if not line:
+                continue
+
+            yield {var: term for var, term in zip(variables, line.split('\t'))
+                   if term}
+
+    def query_rows(
+            self,
+            endpoint_url: str,
+            sparql_query: str,
+            result_format: str = JSON,
+            timeout: float = None) -> SPARQLResultRows:
+        """
+        Runs a SELECT query and returns an iterator over the result rows which
+        are parsed while the result is read
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        conn, response = self._send(
+            endpoint_url, sparql_query, result_format, timeout)
+        chunks = self._read_chunks(response, deadline, timeout)
+
+        head = {}
+        if result_format == JSON:
+            rows = self._iter_json_rows(chunks, head)
+        else:
+            rows = self._iter_tsv_rows(chunks, head)
+
+        return SPARQLResultRows(head, rows, conn, response, self)
+
+    def query(
+            self,
+            endpoint_url: str,
+            sparql_query: str,
+            timeout: float = None) -> dict:
+        """
+        Runs a SELECT query and returns the whole result in the SPARQL JSON
+        result format, e.g. {'head': {'vars': [...]}, 'results': {'bindings':
+        [...]}}
+        """
+        with self.query_rows(
+                endpoint_url, sparql_query, timeout=timeout) as rows:
+            bindings = list(rows)
+
+        return {'head': {'vars': rows.variables},
+                'results': {'bindings': bindings}}
+
+    async def aquery(
+            self,
+            endpoint_url: str,
+            sparql_query: str,
+            timeout: float = None) -> dict:
+
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(self.query, endpoint_url, sparql_query, timeout))
+
+    async def aquery_all(
+            self,
+            queries: List[Tuple[str, str]],
+            timeout: float = None) -> List[dict]:
+        """
+        Runs the given (endpoint URL, query) pairs concurrently and returns
+        their results in the same order
+        """
+        return await asyncio.gather(
+            *[self.aquery(url, q, timeout) for url, q in queries])
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+        with self._lock:
+            for connections in self._idle_connections.values():
+                for conn in connections:
+                    conn.close()
+
+            self._idle_connections.clear()
@@ -1,76 +1,278 @@
 import logging
 import os
-import subprocess
+import shutil
+import tempfile
 import time
+import urllib.error
+import urllib.request
 from typing import List
 
-from SPARQLWrapper import SPARQLWrapper, JSON
-
-from gkgaas.exceptions import WrongExecutablePath
+from gkgaas.exceptions import RunnerExecutionFailed, SPARQLServerNotReady
 from gkgaas.sparqlserver import SPARQLServer
+from gkgaas.sparqlserver.client import SPARQLClient, JSON
+from gkgaas.sparqlserver.resultcache import SPARQLResultCache, \
+    CachedResultRows, CachingResultRows
+from gkgaas.sparqlserver.tdb2 import TDB2DatasetStore
+from gkgaas.toolrunner import ToolRunner
+from gkgaas.utils.filecache import get_file_version
+from gkgaas.utils.metrics import metrics
+from gkgaas.utils.ports import get_free_port
 
 logger = logging.getLogger(__name__)
 
+_assembler_config_template = """@prefix fuseki: <http://jena.apache.org/fuseki#> .
+@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ja: <http://jena.hpl.hp.com/2005/11/Assembler#> .
+@prefix tdb2: <http://jena.apache.org/2016/tdb#> .
+
+[] ja:loadClass "org.apache.jena.tdb2.TDB2" .
+tdb2:DatasetTDB2 rdfs:subClassOf ja:RDFDataset .
+tdb2:GraphTDB2 rdfs:subClassOf ja:Model .
+
+<#service> rdf:type fuseki:Service ;
+    fuseki:name "kg" ;
+    fuseki:serviceQuery "sparql" ;
+    fuseki:serviceReadGraphStore "get" ;
+    fuseki:dataset <#dataset> .
+
+<#dataset> rdf:type ja:RDFDataset ;
+    ja:defaultGraph <#union> .
+
+<#union> rdf:type ja:UnionModel ;
+    ja:subModel {sub_models} .
+{graphs}"""
+
+_assembler_graph_template = """
+<#graph{i}> rdf:type tdb2:GraphTDB2 ;
+    tdb2:dataset <#tdb{i}> .
+
+<#tdb{i}> rdf:type tdb2:DatasetTDB2 ;
+    tdb2:location "{location}" .
+"""
+
+
+class FusekiWrapper(SPARQLServer, ToolRunner):
+    """
+    Serves the given RDF files via a Fuseki SPARQL server. If no port is
+    given, a free port is chosen, s.t. several servers can run at the same
+    time.
+
+    By default the RDF files are loaded into memory on server start. If a
+    TDB2 dataset store is given instead, the files' TDB2 databases are served
+    (as union graph) via a generated assembler config.
+
+    If a result cache is given, query results are cached for the versions of
+    the RDF files the server was started with. Queries are sent via the given
+    SPARQL client (or an own one), which keeps the HTTP connections to the
+    server alive.
+    """
+
+    tool_name = 'Fuseki'
 
-class FusekiWrapper(SPARQLServer):
     def __init__(
             self,
             path_to_fuseki_executable: str,
             rdf_file_paths: List[str],
-            port: int = 8080):
+            port: int = None,
+            memory_limit: int = None,
+            output_logger: logging.Logger = None,
+            tdb2_store: TDB2DatasetStore = None,
+            result_cache: SPARQLResultCache = None,
+            client: SPARQLClient = None):
 
-        if not os.path.exists(path_to_fuseki_executable):
-            raise WrongExecutablePath(
-                f'Fuseki executable path {path_to_fuseki_executable} does '
-                f'not exist'
-            )
+        ToolRunner.__init__(
+            self,
+            path_to_fuseki_executable,
+            memory_limit=memory_limit,
+            output_logger=output_logger)
 
         for rdf_file_path in rdf_file_paths:
             if not os.path.exists(rdf_file_path):
                 raise FileNotFoundError()
 
-        self.path_to_fuseki_executable = path_to_fuseki_executable
         self.rdf_file_paths = rdf_file_paths
-        self.port = port
-        self.server_process = None
+        self.port = port if port is not None else get_free_port()
+        self.tdb2_store = tdb2_store
+        self.result_cache = result_cache
+        self._owns_client = client is None
+        self.client = SPARQLClient() if self._owns_client else client
+        self._config_dir = None
+        self._dataset_versions = None
 
-    def _get_query_url(self):
+    def _get_base_url(self):
         hostname = os.uname().nodename
 
-        return f'http://{hostname}:{self.port}/kg/sparql'
+        return f'http://{hostname}:{self.port}'
+
+    def _get_query_url(self):
+        return f'{self._get_base_url()}/kg/sparql'
+
+    def _ping(self) -> bool:
+        try:
+            with urllib.request.urlopen(
+                    f'{self._get_base_url()}/$/ping', timeout=5) as response:
+                return response.status == 200
+
+        except (urllib.error.URLError, ConnectionError, OSError):
+            return False
+
+    def _get_dataset_size(self) -> int:
+        return sum([os.path.getsize(p) for p in self.rdf_file_paths])
 
     def run(self):
-        if self.server_process is not None:
+        if self.process is not None and self.process.returncode is None:
             raise Exception('Service already running')
 
-        args = [self.path_to_fuseki_executable]
+        self._dataset_versions = [
+            get_file_version(file_path) for file_path in self.rdf_file_paths]
+
+        args = [self.exec_path]
+
+        if self.tdb2_store is None:
+            for file_path in self.rdf_file_paths:
+                args.append(f'--file={file_path}')
+
+            args.append(f'--port={self.port}')
+            args.append('/kg')
 
-        for file_path in self.rdf_file_paths:
-            args.append(f'--file={file_path}')
+            # /path/to/fuseki-server \
+            #     --file=/tmp/file1.nt --file=/gkaas/file2.nt \
+            #     /
+        else:
+            dataset_dirs = [
+                self.tdb2_store.get_dataset_dir(file_path)
+                for file_path in self.rdf_file_paths]
 
-        args.append(f'--port={self.port}')
-        args.append('/kg')
+            self._config_dir = tempfile.mkdtemp()
+            config_file_path = os.path.join(self._config_dir, 'config.ttl')
+            self._write_assembler_config(dataset_dirs, config_file_path)
 
-        # /path/to/fuseki-server \
-        #     --file=/tmp/file1.nt --file=/gkaas/file2.nt \
-        #     /
+            args.append(f'--config={config_file_path}')
+            args.append(f'--port={self.port}')
 
-        # Working directory is set s.t. Fuseki temp files won't mess up the
-        # Git repo
-        fuseki_dir = os.path.dirname(self.path_to_fuseki_executable)
-        self.server_process = subprocess.Popen(args, cwd=fuseki_dir)
+        # Working directory is the Fuseki dir s.t. Fuseki temp files won't
+        # mess up the Git repo
+        self._start_in_background(args)
 
         logger.info(f'SPARQL server started at {self._get_query_url()}')
 
+    def wait_until_ready(
+            self,
+            timeout: float = 300,
+            initial_delay: float = 0.05,
+            max_delay: float = 2):
+        """
+        Polls Fuseki's /$/ping endpoint with exponentially growing delays until
+        it answers, i.e. the datasets are loaded. Raises SPARQLServerNotReady
+        if this takes longer than timeout seconds and RunnerExecutionFailed if
+        the server process died meanwhile. The time to ready is recorded
+        together with the dataset size as fuseki_time_to_ready_seconds metric.
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        delay = initial_delay
+
+        while not self._ping():
+            if self.process.poll() is not None:
+                raise RunnerExecutionFailed(
+                    f'Fuseki exited with code {self.process.returncode} '
+                    f'before being ready: {self._get_output_tail()}')
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SPARQLServerNotReady(
+                    f'Fuseki was not ready after {timeout} seconds')
+
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+        time_to_ready = time.monotonic() - start
+        dataset_size = self._get_dataset_size()
+
+        metrics.observe(
+            'fuseki_time_to_ready_seconds',
+            time_to_ready,
+            dataset_size_bytes=dataset_size,
+            num_files=len(self.rdf_file_paths),
+            tdb2=self.tdb2_store is not None)
+
+        logger.info(
+            f'SPARQL server ready after {time_to_ready:.2f}s '
+            f'({dataset_size} bytes)')
+
+    @staticmethod
+    def _write_assembler_config(dataset_dirs: List[str], file_path: str):
+        graphs = ''
+        for i, dataset_dir in enumerate(dataset_dirs):
+            graphs += _assembler_graph_template.format(
+                i=i, location=dataset_dir)
+
+        sub_models = ', '.join([f'<#graph{i}>' for i in range(len(dataset_dirs))])
+
+        with open(file_path, 'w') as out_file:
+            out_file.write(
+                _assembler_config_template.format(
+                    sub_models=sub_models, graphs=graphs))
+
     def stop(self):
         logger.info('Stopping SPARQL server')
-        if self.server_process is not None:
-            self.server_process.kill()
+        self._terminate()
+
+        if self._config_dir is not None:
+            shutil.rmtree(self._config_dir)
+            self._config_dir = None
+
+        if self._owns_client:
+            self.client.close()
+
+    def query(self, sparql_query: str, timeout: float = None) -> dict:
+        cache_key = None
+
+        if self.result_cache is not None:
+            cache_key = self.result_cache.get_key(
+                sparql_query, self._dataset_versions)
+            result = self.result_cache.get(cache_key)
+
+            if result is not None:
+                return result
+
+        result = self.client.query(
+            self._get_query_url(), sparql_query, timeout=timeout)
+
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result, self.rdf_file_paths)
+
+        return result
+
+    def query_rows(
+            self,
+            sparql_query: str,
+            result_format: str = JSON,
+            timeout: float = None):
+        """
+        Runs a SELECT query and streams the result rows (see
+        SPARQLResultRows). JSON results are served from and put into the
+        result cache, if any.
+        """
+        if self.result_cache is None or result_format != JSON:
+            return self.client.query_rows(
+                self._get_query_url(),
+                sparql_query,
+                result_format=result_format,
+                timeout=timeout)
+
+        cache_key = self.result_cache.get_key(
+            sparql_query, self._dataset_versions)
+        result = self.result_cache.get(cache_key)
 
-    def query(self, sparql_query: str):
-        url = self._get_query_url()
-        sparql_endpoint = SPARQLWrapper(url)
-        sparql_endpoint.setReturnFormat(JSON)
-        sparql_endpoint.setQuery(sparql_query)
+        if result is not None:
+            return CachedResultRows(
+                result['head']['vars'], result['results']['bindings'])
 
-        return sparql_endpoint.queryAndConvert()
+        return CachingResultRows(
+            self.client.query_rows(
+                self._get_query_url(), sparql_query, timeout=timeout),
+            self.result_cache,
+            cache_key,
+            self.rdf_file_paths)
@@ -0,0 +1,169 @@
+import base64
+import csv
+import hashlib
+import io
+import json
+import re
+from typing import List, Tuple
+
+from gkgaas.sparqlserver.resultcache import normalize_query
+
+_prologue_pattern = re.compile(
+    r'\s*(?:(?:PREFIX\s+[^\s:]*:\s*<[^>]*>|BASE\s*<[^>]*>)\s*)*',
+    re.IGNORECASE)
+_select_pattern = re.compile(r'\s*SELECT\b', re.IGNORECASE)
+# String literals, IRIs and comments, which are skipped when looking for
+# keywords, and braces
+_query_part_pattern = re.compile(
+    r'"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:[^"\\\n]|\\.)*"|'
+    r'\'(?:[^\'\\\n]|\\.)*\'|<[^<>\s]*>|#[^\n]*|[{}]')
+# Keywords, but not variables or prefixed names like ?order or ex:from
+_order_by_pattern = re.compile(r'(?<![\w?$:])ORDER\s+BY\b', re.IGNORECASE)
+_dataset_clause_pattern = re.compile(r'(?<![\w?$:])FROM\b', re.IGNORECASE)
+
+
+class InvalidQuery(Exception):
+    pass
+
+
+def split_prologue(sparql_query: str) -> Tuple[str, str]:
+    """
+    Splits a query into its PREFIX/BASE declarations and the rest
+    """
+    match = _prologue_pattern.match(sparql_query)
+
+    return sparql_query[:match.end()].strip(), sparql_query[match.end():]
+
+
+def _get_top_level_text(query_body: str) -> str:
+    """
+    Returns the text of a query outside of braces, i.e. its SELECT, dataset
+    and solution modifier clauses, without literals, IRIs and comments
+    """
+    parts = []
+    depth = 0
+    position = 0
+
+    for match in _query_part_pattern.finditer(query_body):
+        if depth == 0:
+            parts.append(query_body[position:match.start()])
+
+        if match.group() == '{':
+            depth += 1
+        elif match.group() == '}':
+            depth -= 1
+
+        position = match.end()
+
+    if depth == 0:
+        parts.append(query_body[position:])
+
+    return ' '.join(parts)
+
+
+def is_ordered(sparql_query: str) -> bool:
+    """
+    Returns whether a query has a top-level ORDER BY clause, i.e. whether
+    its rows are in the same order on every execution (given the ORDER BY
+    keys are unique)
+    """
+    return _order_by_pattern.search(
+        _get_top_level_text(split_prologue(sparql_query)[1])) is not None
+
+
+def get_paged_query(sparql_query: str, limit: int, offset: int) -> str:
+    """
+    Wraps a SELECT query into a sub-query s.t. the server returns at most
+    limit rows starting at offset, regardless of the LIMIT/OFFSET of the
+    given query. Raises InvalidQuery on negative limits or offsets and on
+    queries with dataset clauses (FROM, FROM NAMED), which are not allowed in
+    sub-queries.
+    """
+    if limit < 0 or offset < 0:
+        raise InvalidQuery('Limit and offset must not be negative')
+
+    prologue, query_body = split_prologue(sparql_query)
+
+    if not _select_pattern.match(query_body):
+        raise InvalidQuery('Only SELECT queries are supported')
+
+    if _dataset_clause_pattern.search(_get_top_level_text(query_body)):
+        raise InvalidQuery(
+            'Dataset clauses (FROM, FROM NAMED) are not supported')
+
+    return f'{prologue}\nSELECT * WHERE {{\n{query_body}\n}}\n' \
+           f'LIMIT {limit} OFFSET {offset}'
+
+
+def _get_query_hash(sparql_query: str) -> str:
+    return hashlib.sha256(
+        normalize_query(sparql_query).encode('utf-8')).hexdigest()[:16]
+
+
+def encode_cursor(sparql_query: str, offset: int, limit: int) -> str:
+    """
+    Returns an opaque cursor pointing to the page of the given size starting
+    at the given offset in the result of the given query
+    """
+    cursor = json.dumps(
+        {'q': _get_query_hash(sparql_query), 'o': offset, 'l': limit})
+
+    return base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(sparql_query: str, cursor: str) -> Tuple[int, int]:
+    """
+    Returns the offset and the page size of a cursor. Raises InvalidQuery if
+    the cursor is malformed, was issued for another query or the query has
+    no ORDER BY clause, as pages of unordered results may overlap or miss
+    rows.
+    """
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        query_hash = decoded['q']
+        offset, limit = int(decoded['o']), int(decoded['l'])
+
+    except (ValueError, KeyError, TypeError):
+        raise InvalidQuery('Malformed cursor')
+
+    if query_hash != _get_query_hash(sparql_query):
+        raise InvalidQuery('The cursor does not belong to the given query')
+
+    if not is_ordered(sparql_query):
+        raise InvalidQuery('Cursors require a query with ORDER BY clause')
+
+    return offset, limit
+
+
+def format_ndjson_row(row: dict) -> str:
+    """
+    Renders a SPARQL JSON result row as one line of newline-delimited JSON
+    """
+    return json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def format_csv_row(values: List[str]) -> str:
+    out = io.StringIO()
+    csv.writer(out, lineterminator='\n').writerow(values)
+
+    return out.getvalue()
+
+
+def get_csv_values(row: dict, variables: List[str]) -> List[str]:
+    """
+    Returns the plain values of a SPARQL JSON result row in the order of the
+    given variables as in the SPARQL 1.1 CSV result format
+    """
+    values = []
+
+    for var in variables:
+        binding = row.get(var)
+
+        if binding is None:
+            values.append('')
+        elif binding['type'] == 'bnode':
+            values.append('_:' + binding['value'])
+        else:
+            values.append(binding['value'])
+
+    return values
@@ -0,0 +1,198 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from gkgaas.sparqlserver import SPARQLServer
+from gkgaas.utils.filecache import get_file_version
+
+logger = logging.getLogger(__name__)
+
+
+class SPARQLServerPoolExhausted(Exception):
+    pass
+
+
+class _PoolEntry(object):
+    def __init__(self, server: SPARQLServer):
+        self.server = server
+        self.ref_count = 0
+        self.last_used = time.monotonic()
+        # False while the server is starting
+        self.ready = False
+
+
+class SPARQLServerPool(object):
+    """
+    Keeps SPARQL servers (e.g. FusekiWrapper instances) running and re-uses
+    them for requests on the same set of RDF files, instead of starting and
+    loading a new server for every request.
+
+    Servers are keyed by the RDF files they serve (and the files' versions,
+    s.t. a replaced file is not served from a stale server). Users acquire a
+    server via
+
+        with pool.acquire(rdf_file_paths) as server:
+            server.query(...)
+
+    which counts the references to it. Servers which were not used for
+    idle_timeout seconds are stopped. At most max_instances servers run at the
+    same time; if the limit is reached, the least recently used idle server is
+    stopped, or, if all servers are in use, acquire() waits up to
+    acquire_timeout seconds for one to become idle before raising
+    SPARQLServerPoolExhausted. New servers are only handed out once they are
+    ready to answer queries (waiting at most ready_timeout seconds). Servers
+    are started without holding the pool's lock, s.t. a cold start only
+    blocks the users of the same set of RDF files.
+    """
+
+    def __init__(
+            self,
+            server_factory: Callable[[List[str]], SPARQLServer],
+            max_instances: int = 4,
+            idle_timeout: float = 600,
+            acquire_timeout: float = 60,
+            ready_timeout: float = 300):
+
+        self.server_factory = server_factory
+        self.max_instances = max_instances
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.ready_timeout = ready_timeout
+
+        self._entries: Dict[Tuple, _PoolEntry] = {}
+        self._condition = threading.Condition()
+        self._closed = threading.Event()
+
+        self._reaper = threading.Thread(target=self._reap, daemon=True)
+        self._reaper.start()
+
+    @staticmethod
+    def _get_key(rdf_file_paths: List[str]) -> Tuple:
+        return tuple(sorted(
+            (os.path.abspath(file_path), get_file_version(file_path))
+            for file_path in rdf_file_paths))
+
+    def _stop(self, key: Tuple):
+        entry = self._entries.pop(key)
+        logger.info(f'Stopping pooled SPARQL server for {key}')
+
+        try:
+            entry.server.stop()
+        except Exception as e:
+            logger.error(f'Failed to stop SPARQL server: {e}')
+
+    def _evict_idle(self, all_expired_only: bool = True) -> bool:
+        """
+        Stops idle servers exceeding the idle timeout, or, if all_expired_only
+        is False, the least recently used idle server. Returns whether a server
+        was stopped. Has to be called with the lock held.
+        """
+        idle_entries = sorted(
+            [(e.last_used, k) for k, e in self._entries.items()
+             if e.ref_count == 0])
+
+        now = time.monotonic()
+        expired = [k for last_used, k in idle_entries
+                   if now - last_used > self.idle_timeout]
+
+        if not all_expired_only and not expired and idle_entries:
+            expired = [idle_entries[0][1]]
+
+        for key in expired:
+            self._stop(key)
+
+        return len(expired) > 0
+
+    def _reap(self):
+        while not self._closed.wait(min(self.idle_timeout, 60)):
+            with self._condition:
+                self._evict_idle()
+
+    def _acquire(self, rdf_file_paths: List[str]) -> Tuple[Tuple, SPARQLServer]:
+        key = self._get_key(rdf_file_paths)
+        deadline = time.monotonic() + self.acquire_timeout
+
+        with self._condition:
+            self._evict_idle()
+
+            while True:
+                entry = self._entries.get(key)
+
+                if entry is not None and entry.ready:
+                    entry.ref_count += 1
+
+                    return key, entry.server
+
+                if entry is not None:
+                    # started by another user, wait for it to become ready
+                    # (or to fail and be removed)
+                    self._condition.wait(self.ready_timeout)
+                    continue
+
+                if len(self._entries) < self.max_instances or \
+                        self._evict_idle(all_expired_only=False):
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise SPARQLServerPoolExhausted(
+                        f'All {self.max_instances} SPARQL servers are in use')
+
+            # reserve the entry, s.t. the server counts towards max_instances
+            # and is not started twice
+            logger.info(f'Starting pooled SPARQL server for {key}')
+            entry = _PoolEntry(self.server_factory(rdf_file_paths))
+            entry.ref_count = 1
+            self._entries[key] = entry
+
+        try:
+            entry.server.run()
+            entry.server.wait_until_ready(self.ready_timeout)
+
+        except BaseException:
+            with self._condition:
+                if self._entries.get(key) is entry:
+                    self._stop(key)
+
+                self._condition.notify_all()
+
+            raise
+
+        with self._condition:
+            entry.ready = True
+            self._condition.notify_all()
+
+        return key, entry.server
+
+    def _release(self, key: Tuple):
+        with self._condition:
+            entry = self._entries.get(key)
+
+            # stopped by close() meanwhile
+            if entry is not None:
+                entry.ref_count -= 1
+                entry.last_used = time.monotonic()
+
+            self._condition.notify_all()
+
+    @contextmanager
+    def acquire(self, rdf_file_paths: List[str]):
+        key, server = self._acquire(rdf_file_paths)
+
+        try:
+            yield server
+        finally:
+            self._release(key)
+
+    def close(self):
+        """
+        Stops all servers, regardless of whether they are still in use
+        """
+        self._closed.set()
+
+        with self._condition:
+            for key in list(self._entries.keys()):
+                self._stop(key)
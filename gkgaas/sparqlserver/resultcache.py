@@ -0,0 +1,204 @@
+import copy
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+from gkgaas.utils.metrics import metrics
+
+# String literals and IRIs are kept as they are, comments are dropped and any
+# other whitespace is collapsed
+_query_token_pattern = re.compile(
+    r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|<[^<>\s]*>)|(?:\s|#[^\n]*)+')
+
+
+def _normalize_token(match) -> str:
+    literal_or_iri = match.group(1)
+
+    if literal_or_iri is not None:
+        return literal_or_iri
+
+    return ' '
+
+
+def normalize_query(sparql_query: str) -> str:
+    """
+    Normalizes the formatting of a SPARQL query s.t. queries only differing
+    in whitespace, indentation or comments are cached under the same key
+    """
+    return _query_token_pattern.sub(_normalize_token, sparql_query).strip()
+
+
+class _CacheEntry(object):
+    def __init__(self, result, dataset_file_paths: List[str], expires: float):
+        self.result = result
+        self.dataset_file_paths = dataset_file_paths
+        self.expires = expires
+
+
+class CachedResultRows(object):
+    """
+    Rows of a cached SELECT query result, which can be used like the streamed
+    rows of a SPARQL client (see SPARQLResultRows)
+    """
+
+    def __init__(self, variables: List[str], rows: List[dict]):
+        self.variables = variables
+        self._rows = iter(rows)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        return next(self._rows)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CachingResultRows(object):
+    """
+    Passes on streamed SELECT query result rows (see SPARQLResultRows) and
+    puts the result into the result cache once all rows were read. Results
+    with more than the cache's max_rows rows are not cached.
+    """
+
+    def __init__(
+            self,
+            rows,
+            cache: 'SPARQLResultCache',
+            key: Tuple,
+            dataset_file_paths: List[str]):
+
+        self.variables = rows.variables
+        self._rows = rows
+        self._cache = cache
+        self._key = key
+        self._dataset_file_paths = dataset_file_paths
+        self._read_rows: Optional[List[dict]] = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        try:
+            row = next(self._rows)
+
+        except StopIteration:
+            if self._read_rows is not None:
+                self._cache.put(
+                    self._key,
+                    {'head': {'vars': self.variables},
+                     'results': {'bindings': self._read_rows}},
+                    self._dataset_file_paths)
+                self._read_rows = None
+
+            raise
+
+        if self._read_rows is not None:
+            if len(self._read_rows) < self._cache.max_rows:
+                self._read_rows.append(row)
+            else:
+                self._read_rows = None
+
+        return row
+
+    def close(self):
+        self._rows.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SPARQLResultCache(object):
+    """
+    In-memory cache of SPARQL query results, keyed by the normalized query
+    and the versions of the datasets it was run on. At most max_entries
+    results are kept (least recently used ones are evicted first), each for
+    at most ttl seconds. Streamed results are only cached up to max_rows
+    rows. Results of a dataset can be dropped explicitly via invalidate(),
+    e.g. when a new version of it was registered.
+
+    Hits and misses are counted in the sparql_result_cache_hits and
+    sparql_result_cache_misses metrics.
+    """
+
+    def __init__(
+            self,
+            max_entries: int = 1000,
+            ttl: float = 600,
+            max_rows: int = 10000):
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_rows = max_rows
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(
+            sparql_query: str, dataset_versions: List[str]) -> Tuple:
+
+        return normalize_query(sparql_query), tuple(sorted(dataset_versions))
+
+    def get(self, key: Tuple) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry.expires < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                metrics.inc('sparql_result_cache_misses')
+
+                return None
+
+            self._entries.move_to_end(key)
+            metrics.inc('sparql_result_cache_hits')
+
+            return copy.deepcopy(entry.result)
+
+    def put(self, key: Tuple, result: dict, dataset_file_paths: List[str]):
+        entry = _CacheEntry(
+            copy.deepcopy(result),
+            [os.path.abspath(p) for p in dataset_file_paths],
+            time.monotonic() + self.ttl)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, dataset_file_path: str):
+        """
+        Drops all cached results of queries run on the given dataset
+        """
+        dataset_file_path = os.path.abspath(dataset_file_path)
+
+        with self._lock:
+            for key in [k for k, e in self._entries.items()
+                        if dataset_file_path in e.dataset_file_paths]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import defaultdict
+from typing import List
+
+from gkgaas.toolrunner import ToolRunner
+from gkgaas.utils.filecache import get_file_version
+
+logger = logging.getLogger(__name__)
+
+
+class TDB2Loader(ToolRunner):
+    """
+    Runs Jena's tdb2.tdbloader to bulk-load RDF files into a TDB2 database
+    directory
+    """
+
+    tool_name = 'TDB2 loader'
+
+    def run(self, rdf_file_paths: List[str], location: str):
+        self._execute([self.exec_path, f'--loc={location}'] + rdf_file_paths)
+
+
+class TDB2DatasetStore(object):
+    """
+    Keeps an on-disk TDB2 database for every RDF file served via SPARQL, s.t.
+    the file does not have to be parsed into memory on every server start and
+    may be larger than the available memory.
+
+    Databases live in <base_dir>/<hash of file path>/<file version>. A
+    database is built on first request of a file version and re-used
+    afterwards. When a new version of a file gets loaded, all but the
+    previous version of the file are removed (the previous one might still be
+    served by a running server).
+    """
+
+    def __init__(
+            self,
+            loader_executable_path: str,
+            base_dir: str,
+            timeout: float = None,
+            memory_limit: int = None):
+
+        # fail early in case the loader path is mis-configured
+        TDB2Loader(loader_executable_path)
+
+        os.makedirs(base_dir, exist_ok=True)
+
+        self.loader_executable_path = loader_executable_path
+        self.base_dir = base_dir
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+
+        self._locks = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+
+    def _get_file_dir(self, rdf_file_path: str) -> str:
+        path_hash = hashlib.sha256(
+            os.path.abspath(rdf_file_path).encode('utf-8')).hexdigest()
+
+        return os.path.join(self.base_dir, path_hash)
+
+    def _get_lock(self, file_dir: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks[file_dir]
+
+    def _remove_old_versions(self, file_dir: str, current_version: str):
+        versions = []
+
+        for dir_entry in os.scandir(file_dir):
+            if dir_entry.is_dir() and dir_entry.name != current_version \
+                    and not dir_entry.name.endswith('.tmp'):
+                versions.append((dir_entry.stat().st_mtime, dir_entry.path))
+
+        # keep the previous version
+        for _, dir_path in sorted(versions)[:-1]:
+            logger.info(f'Removing outdated TDB2 database {dir_path}')
+            shutil.rmtree(dir_path)
+
+    def get_dataset_dir(self, rdf_file_path: str) -> str:
+        """
+        Returns the TDB2 database directory for the current version of the
+        given RDF file, bulk-loading the file first if needed
+        """
+        version = get_file_version(rdf_file_path)
+        file_dir = self._get_file_dir(rdf_file_path)
+        dataset_dir = os.path.join(file_dir, version)
+
+        with self._get_lock(file_dir):
+            if os.path.isdir(dataset_dir):
+                return dataset_dir
+
+            os.makedirs(file_dir, exist_ok=True)
+            tmp_dataset_dir = tempfile.mkdtemp(suffix='.tmp', dir=file_dir)
+
+            logger.info(
+                f'Loading {rdf_file_path} into TDB2 database {dataset_dir}')
+
+            try:
+                TDB2Loader(
+                    self.loader_executable_path,
+                    self.timeout,
+                    self.memory_limit).run([rdf_file_path], tmp_dataset_dir)
+
+            except Exception:
+                shutil.rmtree(tmp_dataset_dir)
+                raise
+
+            os.rename(tmp_dataset_dir, dataset_dir)
+            self._remove_old_versions(file_dir, version)
+
+        return dataset_dir
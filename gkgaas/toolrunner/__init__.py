@@ -0,0 +1,356 @@
+import logging
+import logging.handlers
+import os
+import resource
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import List, Optional
+
+from gkgaas.exceptions import WrongExecutablePath, RunnerExecutionFailed, \
+    RunnerTimeout, RunnerCancelled
+
+logger = logging.getLogger(__name__)
+
+# util-linux prlimit, which sets resource limits before executing a command
+_prlimit_path = shutil.which('prlimit')
+
+
+@dataclass
+class ToolExecutionResult:
+    return_code: int
+    # wall-clock time in seconds
+    duration: float
+    # peak resident set size of the tool process (and its waited-for
+    # children) in bytes
+    peak_rss: int
+    # the last lines of the tool output
+    output: str = None
+
+
+def get_output_logger(
+        log_file_path: str,
+        max_bytes: int = 100 * 1024 ** 2,
+        backup_count: int = 3) -> logging.Logger:
+    """
+    Creates a logger which writes the output of tool runs, e.g. of all tools
+    run for one job, to a rotating log file. The logger should be closed via
+    close_output_logger() when it is not needed anymore.
+    """
+    # Not registered via logging.getLogger(), s.t. it can be garbage collected
+    output_logger = logging.Logger(log_file_path)
+    handler = logging.handlers.RotatingFileHandler(
+        log_file_path, maxBytes=max_bytes, backupCount=backup_count)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    output_logger.addHandler(handler)
+
+    return output_logger
+
+
+def close_output_logger(output_logger: logging.Logger):
+    for handler in output_logger.handlers[:]:
+        handler.close()
+        output_logger.removeHandler(handler)
+
+
+def _get_return_code(wait_status: int) -> int:
+    if os.WIFSIGNALED(wait_status):
+        return -os.WTERMSIG(wait_status)
+
+    return os.WEXITSTATUS(wait_status)
+
+
+class ToolRunner(object):
+    """
+    Base class for running external tools like TripleGeo, LIMES, FAGI or
+    Fuseki.
+
+    Tools are executed directly, i.e. without a shell, in their own process
+    group, s.t. a tool and all processes it spawns (e.g. the JVM started by a
+    wrapper script) can be killed at once. Optionally the wall-clock time of a
+    tool run can be limited (timeout, in seconds) as well as the address space
+    of the tool process (memory_limit, in bytes). Note that a JVM reserves
+    considerably more virtual memory than its maximum heap size, so the memory
+    limit has to be chosen generously. Tools are started from several threads
+    at once, so the memory limit is not set via preexec_fn, which may
+    deadlock the child process in multithreaded programs, but by running the
+    tool via prlimit. Without prlimit, it is set on the running tool process
+    right after starting it.
+
+    The tool output is read line by line while the tool runs. Only the last
+    output_buffer_size lines are kept in memory to report errors. If an output
+    logger is given (see get_output_logger()), every line is forwarded to it.
+
+    For every finished run the exit status, duration and peak RSS are kept in
+    last_result.
+    """
+
+    tool_name = 'Tool'
+    output_buffer_size = 200
+    # longer lines are split
+    max_line_length = 8192
+
+    def __init__(
+            self,
+            executable_path: str,
+            timeout: float = None,
+            memory_limit: int = None,
+            output_logger: logging.Logger = None):
+
+        if not os.path.exists(executable_path):
+            raise WrongExecutablePath(
+                f'{self.tool_name} executable path {executable_path} does '
+                f'not exist'
+            )
+
+        self.exec_path = executable_path
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.output_logger = output_logger
+
+        self.process: Optional[subprocess.Popen] = None
+        self.last_result: Optional[ToolExecutionResult] = None
+
+        self._timed_out = False
+        self._cancelled = False
+        self._output_tail = deque(maxlen=self.output_buffer_size)
+
+    def _get_working_dir(self) -> str:
+        return os.path.dirname(self.exec_path)
+
+    def _start(self, args: List[str], capture_output: bool = True):
+        self._timed_out = False
+        self._cancelled = False
+        self._output_tail = deque(maxlen=self.output_buffer_size)
+        self._start_time = time.monotonic()
+
+        if self.memory_limit is not None and _prlimit_path is not None:
+            args = [_prlimit_path, f'--as={self.memory_limit}', '--'] + args
+
+        self.process = subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE if capture_output else None,
+            stderr=subprocess.STDOUT if capture_output else None,
+            encoding='utf-8',
+            errors='replace',
+            cwd=self._get_working_dir(),
+            start_new_session=True)
+
+        if self.memory_limit is not None and _prlimit_path is None:
+            resource.prlimit(
+                self.process.pid,
+                resource.RLIMIT_AS,
+                (self.memory_limit, self.memory_limit))
+
+    def _start_in_background(self, args: List[str]):
+        """
+        Starts a long running tool, e.g. a server. If there is an output
+        logger, the tool output is forwarded to it by a background thread.
+        Otherwise the output goes to the service's stdout.
+        """
+        capture_output = self.output_logger is not None
+        self._start(args, capture_output=capture_output)
+
+        if capture_output:
+            threading.Thread(target=self._read_output, daemon=True).start()
+
+    def _handle_output_line(self, line: str):
+        """
+        Called for every line of the tool output. Subclasses may override this
+        to inspect the output while the tool is running.
+        """
+        self._output_tail.append(line)
+
+        if self.output_logger is not None:
+            self.output_logger.info(f'{self.tool_name}: {line}')
+
+    def _read_output(self):
+        stdout = self.process.stdout
+
+        for line in iter(lambda: stdout.readline(self.max_line_length), ''):
+            self._handle_output_line(line.rstrip('\n'))
+
+        stdout.close()
+
+    def _get_output_tail(self) -> str:
+        return '\n'.join(self._output_tail)
+
+    def _signal_process_group(self, sig: int):
+        try:
+            os.killpg(self.process.pid, sig)
+        except ProcessLookupError:
+            # already terminated
+            pass
+
+    def _kill(self):
+        if self.process is not None and self.process.returncode is None:
+            self._signal_process_group(signal.SIGKILL)
+
+    def _on_timeout(self):
+        logger.warning(
+            f'{self.exec_path} did not finish within {self.timeout} seconds. '
+            f'Killing it.')
+
+        self._timed_out = True
+        self._kill()
+
+    def cancel(self):
+        """
+        Kills the tool and all processes it spawned. Can be called from any
+        thread.
+        """
+        self._cancelled = True
+        self._kill()
+
+    def _wait(self, output: str = None) -> ToolExecutionResult:
+        _, wait_status, rusage = os.wait4(self.process.pid, 0)
+        # tell subprocess that the process was reaped already
+        self.process.returncode = _get_return_code(wait_status)
+
+        # ru_maxrss is given in kilobytes on Linux
+        self.last_result = ToolExecutionResult(
+            return_code=self.process.returncode,
+            duration=time.monotonic() - self._start_time,
+            peak_rss=rusage.ru_maxrss * 1024,
+            output=output)
+
+        logger.info(
+            f'{self.exec_path} finished with exit status '
+            f'{self.last_result.return_code} after '
+            f'{self.last_result.duration:.1f} seconds (peak RSS: '
+            f'{self.last_result.peak_rss // 1024 ** 2} MiB)')
+
+        return self.last_result
+
+    def _execute(self, args: List[str]) -> ToolExecutionResult:
+        """
+        Runs the tool with the given command line arguments until it
+        terminates and returns the execution result. Raises
+        RunnerExecutionFailed if the tool exits with a non-zero exit status,
+        RunnerTimeout if it exceeded the timeout and RunnerCancelled if it was
+        cancelled.
+        """
+        self._start(args)
+
+        timer = None
+        if self.timeout is not None:
+            timer = threading.Timer(self.timeout, self._on_timeout)
+            timer.daemon = True
+            timer.start()
+
+        try:
+            self._read_output()
+            output = self._get_output_tail()
+            result = self._wait(output)
+
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+            # make sure no spawned processes are left behind
+            self._signal_process_group(signal.SIGKILL)
+
+        if self._cancelled:
+            log_msg = f'{self.exec_path} was cancelled'
+            logger.warning(log_msg)
+
+            raise RunnerCancelled(log_msg)
+
+        if self._timed_out:
+            log_msg = \
+                f'{self.exec_path} timed out after {self.timeout} seconds:' \
+                f'\n{output}'
+            logger.error(log_msg)
+
+            raise RunnerTimeout(log_msg)
+
+        if result.return_code != 0:
+            log_msg = \
+                f'{self.exec_path} failed with return code ' \
+                f'{result.return_code}:\n{output}'
+            logger.error(log_msg)
+
+            raise RunnerExecutionFailed(log_msg)
+
+        return result
+
+    def _terminate(self, grace_period: float = 10):
+        """
+        Stops a tool started via _start(), e.g. a server, by sending SIGTERM to
+        its process group and SIGKILL if it did not exit within the grace
+        period (in seconds)
+        """
+        if self.process is None or self.process.returncode is not None:
+            return
+
+        self._signal_process_group(signal.SIGTERM)
+
+        deadline = time.monotonic() + grace_period
+        while time.monotonic() < deadline:
+            pid, wait_status, rusage = os.wait4(self.process.pid, os.WNOHANG)
+
+            if pid != 0:
+                self.process.returncode = _get_return_code(wait_status)
+                self.last_result = ToolExecutionResult(
+                    return_code=self.process.returncode,
+                    duration=time.monotonic() - self._start_time,
+                    peak_rss=rusage.ru_maxrss * 1024)
+
+                return
+
+            time.sleep(0.1)
+
+        self._kill()
+        self._wait()
+
+
+def run_in_parallel(
+        runners: List[ToolRunner],
+        max_workers: int,
+        slots: threading.BoundedSemaphore = None):
+    """
+    Runs the given tool runners (e.g. one per tile of a dataset) with up to
+    max_workers threads. Every run holds one of the given slots (e.g. the
+    slots bounding the number of processes of the tool service-wide) while
+    it runs. If a run fails, the pending runs are not started, the running
+    tools are killed and the error of the failed run is raised.
+    """
+    failed = threading.Event()
+
+    def run(runner: ToolRunner):
+        with slots if slots is not None else nullcontext():
+            if failed.is_set():
+                return
+
+            try:
+                runner.run()
+            except BaseException:
+                failed.set()
+                raise
+
+    with ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='gkgaas-tool') as executor:
+
+        futures = [executor.submit(run, runner) for runner in runners]
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+
+        while not_done:
+            # runs which just started their tool are killed in the next round
+            for runner in runners:
+                runner.cancel()
+
+            done, not_done = wait(not_done, timeout=0.1)
+
+        # the error of the first failed run rather than of the cancelled ones
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        errors.sort(key=lambda e: isinstance(e, RunnerCancelled))
+
+        if errors:
+            raise errors[0]
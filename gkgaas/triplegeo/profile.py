@@ -1,12 +1,14 @@
 import os
+import shutil
 import tempfile
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import List, Union, Optional, Tuple
 
 from gkgaas.triplegeo import Runtime, InputFormat, ProcessingMode, \
     Serialization, Encoding
 from gkgaas.triplegeo.classification import ClassificationSpecification
 from gkgaas.triplegeo.mapping import MappingSpecification
+from gkgaas.utils.filecache import get_fingerprint
 
 
 class MissingSettingException(Exception):
@@ -218,3 +220,36 @@ class TripleGeoProfile(object):
 
             # quote
             config_file.write(f'quote = {self.quote}')
+
+    def get_fingerprint(self) -> str:
+        """
+        Returns a hash of all settings which influence the conversion result,
+        i.e. the rendered config file together with the mapping and
+        classification specifications. Settings which are set per run (input
+        files, output and tmp directory) are not considered.
+        """
+        tmp_dir = tempfile.mkdtemp()
+        profile = replace(self, input_files=[], output_dir='', tmp_dir='')
+
+        conf_file_path = os.path.join(tmp_dir, 'config.properties')
+        profile.to_config_file(conf_file_path)
+        file_paths = [conf_file_path]
+
+        self.mapping_specification.to_yml_dir(tmp_dir)
+        file_paths.append(
+            os.path.join(tmp_dir, self.mapping_specification.file_name))
+
+        if self.classification_specification is not None:
+            self.classification_specification.to_yml_file(tmp_dir)
+            file_paths.append(
+                os.path.join(
+                    tmp_dir, self.classification_specification.file_name))
+
+        contents = []
+        for file_path in file_paths:
+            with open(file_path) as in_file:
+                contents.append(in_file.read())
+
+        shutil.rmtree(tmp_dir)
+
+        return get_fingerprint(*contents)
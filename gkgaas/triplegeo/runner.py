@@ -1,74 +1,128 @@
+import copy
+import glob
+import hashlib
 import logging
 import os
 import shutil
-import subprocess
 import tempfile
 from typing import List
 
-from gkgaas.exceptions import WrongExecutablePath, RunnerExecutionFailed
+from gkgaas.toolrunner import ToolRunner
+from gkgaas.triplegeo import InputFormat, Serialization
 from gkgaas.triplegeo.profile import TripleGeoProfile
+from gkgaas.utils.filecache import FileCache, get_file_hash, get_fingerprint
+from gkgaas.utils.paths import get_file_name_base
 
 logger = logging.getLogger(__name__)
 
 
-class TripleGeoRunner(object):
+class TripleGeoRunner(ToolRunner):
     """
     Executes TripleGeo to convert geospatial data given a certain format to RDF
 
     It is assumed that there is an executable for TripleGeo which takes exactly
     one command line argument which is a file path pointing to the main config
     file (corresponding to a TripleGeoProfile).
+
+    If a conversion cache is provided, input files which were already converted
+    with an equivalent profile are not converted again, but their cached
+    N-Triples result file is linked into the output directory.
     """
 
+    tool_name = 'TripleGeo'
+
     def __init__(
             self,
             triplegeo_executable_path: str,
             profile: TripleGeoProfile,
             input_files: List[str],
-            output_dir):
-
-        if not os.path.exists(triplegeo_executable_path):
-            raise WrongExecutablePath(
-                f'TripleGeo executable path {triplegeo_executable_path} does '
-                f'not exist'
-            )
-
-        self.exec_path = triplegeo_executable_path
-        self.profile = profile
+            output_dir,
+            cache: FileCache = None,
+            timeout: float = None,
+            memory_limit: int = None,
+            output_logger: logging.Logger = None):
+
+        super().__init__(
+            triplegeo_executable_path, timeout, memory_limit, output_logger)
+
+        # Profiles get modified during the run and preconfigured profiles are
+        # shared between concurrent runs, so we work on a copy
+        self.profile = copy.deepcopy(profile)
         self.input_files = input_files
         self.output_dir = output_dir
 
+        if cache is not None and \
+                profile.output_serialization != Serialization.N_TRIPLES:
+            logger.debug(
+                'Conversion cache is only used for N-Triples output')
+            cache = None
+
+        self.cache = cache
+
+    def _get_result_file_path(self, input_file: str) -> str:
+        return os.path.join(
+            self.output_dir, get_file_name_base(input_file) + '.nt')
+
+    def _get_cache_key(self, input_file: str, profile_fingerprint: str):
+        if self.profile.input_format == InputFormat.SHAPEFILE:
+            # A shapefile comes with sidecar files (.dbf, .shx, .prj, ...)
+            # which also influence the conversion result
+            file_paths = sorted(
+                glob.glob(
+                    glob.escape(os.path.splitext(input_file)[0]) + '.*'))
+        else:
+            file_paths = [input_file]
+
+        h = hashlib.sha256()
+        for file_path in file_paths:
+            h.update(os.path.splitext(file_path)[1].encode('utf-8'))
+            get_file_hash(file_path, h)
+
+        return get_fingerprint(h.hexdigest(), profile_fingerprint)
+
     def run(self):
+        input_files = self.input_files
+        cache_keys = {}
+
+        if self.cache is not None:
+            profile_fingerprint = self.profile.get_fingerprint()
+            input_files = []
+
+            for input_file in self.input_files:
+                cache_key = self._get_cache_key(input_file, profile_fingerprint)
+
+                if self.cache.get(
+                        cache_key, self._get_result_file_path(input_file)):
+                    logger.info(
+                        f'Re-using cached conversion result for {input_file}')
+                else:
+                    cache_keys[input_file] = cache_key
+                    input_files.append(input_file)
+
+            if not input_files:
+                return
+
         tmp_dir = tempfile.mkdtemp()
         self.profile.tmp_dir = tmp_dir
 
         self.profile.mapping_specification.to_yml_dir(tmp_dir)
-        self.profile.input_files = self.input_files
+        self.profile.input_files = input_files
         self.profile.output_dir = self.output_dir
 
         self.profile.classification_specification.to_yml_file(tmp_dir)
 
         conf_file_path = tmp_dir + os.sep + 'config_generated.properties'
         self.profile.to_config_file(conf_file_path)
-        wd = self.exec_path.rsplit(os.sep, 1)[0]
 
         try:
-            output = subprocess.check_output(
-                f'{self.exec_path} {conf_file_path}',
-                stderr=subprocess.STDOUT,
-                shell=True,
-                universal_newlines=True,
-                cwd=wd)
-
-        except subprocess.CalledProcessError as e:
-            log_msg = \
-                f'{self.exec_path} failed with return code {e.returncode}:' + \
-                f'\n{e.output}'
-            logger.error(log_msg)
-
+            self._execute([self.exec_path, conf_file_path])
+        finally:
             shutil.rmtree(tmp_dir)
-            raise RunnerExecutionFailed(log_msg)
 
-        else:
-            logger.debug(f'{self.exec_path} succeeded:\n{output}')
-            shutil.rmtree(tmp_dir)
+        logger.debug(f'{self.exec_path} succeeded')
+
+        for input_file, cache_key in cache_keys.items():
+            result_file_path = self._get_result_file_path(input_file)
+
+            if os.path.exists(result_file_path):
+                self.cache.put(cache_key, result_file_path)
@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import tempfile
+from collections import Counter
+from typing import Dict, Tuple
+
+from gkgaas.utils.filecache import get_file_version
+from gkgaas.utils.ntriples import iter_triples, rdf_type_iri, format_iri, \
+    is_iri, get_iri
+from gkgaas.utils.paths import get_class_index_file_path
+
+logger = logging.getLogger(__name__)
+
+_rdf_type = format_iri(rdf_type_iri)
+
+# Class indexes which could not be stored next to their file (e.g. in a
+# read-only directory), by file path, together with the file version
+_unstored_class_indexes: Dict[str, Tuple[str, Dict[str, int]]] = {}
+
+
+def build_class_index(rdf_file_path: str) -> Dict[str, int]:
+    """
+    Counts the rdf:type statements per class IRI in one streaming pass over
+    the given N-Triples file
+    """
+    counts = Counter()
+
+    for _, pred, obj in iter_triples(rdf_file_path):
+        if pred == _rdf_type and is_iri(obj):
+            counts[get_iri(obj)] += 1
+
+    return dict(counts)
+
+
+def write_class_index(rdf_file_path: str) -> Dict[str, int]:
+    """
+    Builds the class index of the given N-Triples file and stores it next to
+    the file, together with the version of the file it was built from. If the
+    index cannot be stored, it is kept in memory only.
+    """
+    version = get_file_version(rdf_file_path)
+    class_index = build_class_index(rdf_file_path)
+    index_file_path = get_class_index_file_path(rdf_file_path)
+
+    try:
+        fd, tmp_file_path = tempfile.mkstemp(
+            dir=os.path.dirname(index_file_path) or '.')
+
+        with os.fdopen(fd, 'w') as out_file:
+            json.dump({'version': version, 'classes': class_index}, out_file)
+
+        os.replace(tmp_file_path, index_file_path)
+
+    except OSError as e:
+        logger.warning(
+            f'Could not store class index of {rdf_file_path} in '
+            f'{index_file_path}, keeping it in memory: {e}')
+        _unstored_class_indexes[rdf_file_path] = version, class_index
+
+        return class_index
+
+    logger.info(
+        f'Wrote class index of {rdf_file_path} with {len(class_index)} '
+        f'classes to {index_file_path}')
+
+    return class_index
+
+
+def get_class_index(rdf_file_path: str) -> Dict[str, int]:
+    """
+    Returns the stored class index (class IRI -> number of instances) of the
+    given N-Triples file, (re-)building it if it is missing or was built from
+    another version of the file
+    """
+    index_file_path = get_class_index_file_path(rdf_file_path)
+    version = get_file_version(rdf_file_path)
+
+    try:
+        with open(index_file_path) as in_file:
+            index = json.load(in_file)
+
+        if index.get('version') == version:
+            return index['classes']
+
+    except (FileNotFoundError, ValueError):
+        pass
+
+    unstored_version, class_index = \
+        _unstored_class_indexes.get(rdf_file_path, (None, None))
+
+    if unstored_version == version:
+        return class_index
+
+    return write_class_index(rdf_file_path)
@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+_chunk_size = 1024 * 1024
+
+
+def get_file_hash(file_path: str, hash_obj=None) -> str:
+    """
+    Computes the SHA-256 hex digest of a file's content without loading the
+    whole file into memory. If a hash object is given, the file content is
+    fed into it instead.
+    """
+    h = hashlib.sha256() if hash_obj is None else hash_obj
+
+    with open(file_path, 'rb') as in_file:
+        for chunk in iter(lambda: in_file.read(_chunk_size), b''):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def get_fingerprint(*parts: str) -> str:
+    """
+    Combines the given strings, e.g. file hashes and rendered configs, into
+    one cache key
+    """
+    h = hashlib.sha256()
+
+    for part in parts:
+        part_bytes = part.encode('utf-8')
+        # length prefix, s.t. ('ab', 'c') and ('a', 'bc') differ
+        h.update(str(len(part_bytes)).encode('ascii') + b':')
+        h.update(part_bytes)
+
+    return h.hexdigest()
+
+
+def get_file_version(file_path: str) -> str:
+    """
+    Returns a cheap version identifier of a file based on its path, size and
+    modification time. Other than get_file_hash() this does not read the file
+    and is thus suited for large files like the topio KG which are replaced,
+    but not modified in place.
+    """
+    stat = os.stat(file_path)
+
+    return get_fingerprint(
+        os.path.abspath(file_path), str(stat.st_size), str(stat.st_mtime_ns))
+
+
+def _link_or_copy(src_file_path: str, dst_file_path: str):
+    try:
+        os.link(src_file_path, dst_file_path)
+    except OSError:
+        # e.g. cache and target reside on different file systems
+        shutil.copyfile(src_file_path, dst_file_path)
+
+
+class FileCache(object):
+    """
+    On-disk cache which maps keys (usually content fingerprints as created by
+    get_fingerprint()) to files.
+
+    Files are hard-linked in and out of the cache directory, so storing and
+    restoring an entry does not copy any data if the cache and the working
+    directories reside on the same file system. Hence, restored files must not
+    be modified in place.
+
+    The total size of the cached files is bounded by max_size_bytes. If the
+    limit is exceeded, the least recently used entries are evicted, where
+    'used' is tracked via the modification time of the cache entry files.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int):
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._get_entry_path(key))
+
+    def get(self, key: str, target_file_path: str) -> bool:
+        """
+        Puts the cached file for the given key at target_file_path. Returns
+        False in case there is no such cache entry.
+        """
+        entry_path = self._get_entry_path(key)
+
+        with self._lock:
+            if not os.path.exists(entry_path):
+                return False
+
+            # mark as recently used
+            os.utime(entry_path)
+
+            if os.path.exists(target_file_path):
+                os.remove(target_file_path)
+
+            _link_or_copy(entry_path, target_file_path)
+
+        logger.debug(f'Cache hit for {key} in {self.cache_dir}')
+
+        return True
+
+    def put(self, key: str, file_path: str):
+        entry_path = self._get_entry_path(key)
+        tmp_entry_path = entry_path + '.' + uuid.uuid4().hex + '.tmp'
+
+        _link_or_copy(file_path, tmp_entry_path)
+
+        with self._lock:
+            os.replace(tmp_entry_path, entry_path)
+            os.utime(entry_path)
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        total_size = 0
+
+        for dir_entry in os.scandir(self.cache_dir):
+            if not dir_entry.is_file() or dir_entry.name.endswith('.tmp'):
+                continue
+
+            stat = dir_entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, dir_entry.path))
+            total_size += stat.st_size
+
+        entries.sort()
+
+        while total_size > self.max_size_bytes and entries:
+            _, size, entry_path = entries.pop(0)
+            os.remove(entry_path)
+            total_size -= size
+
+            logger.debug(f'Evicted cache entry {entry_path}')
@@ -0,0 +1,55 @@
+import threading
+from collections import defaultdict, deque
+
+
+class Metrics(object):
+    """
+    Thread-safe in-process registry of monitoring metrics, exposed via the
+    /metrics endpoint. Counters are monotonically increasing numbers,
+    observations are measured values (e.g. durations) which may carry labels
+    (e.g. the size of the processed dataset). Only the last max_samples
+    observations per metric are kept, besides their total count and sum.
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._observation_counts = defaultdict(int)
+        self._observation_sums = defaultdict(float)
+
+    def inc(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def get_counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            self._samples[name].append(dict(labels, value=value))
+            self._observation_counts[name] += 1
+            self._observation_sums[name] += value
+
+    def get_samples(self, name: str) -> list:
+        with self._lock:
+            return list(self._samples.get(name, []))
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'observations': {
+                    name: {
+                        'count': self._observation_counts[name],
+                        'sum': self._observation_sums[name],
+                        'samples': list(samples)
+                    } for name, samples in self._samples.items()
+                }
+            }
+
+
+metrics = Metrics()
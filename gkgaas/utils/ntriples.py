@@ -0,0 +1,90 @@
+import re
+from typing import Iterator, Tuple
+
+rdf_type_iri = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+
+Triple = Tuple[str, str, str]
+
+_escape_pattern = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+_escaped_chars = {
+    't': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f',
+    '"': '"', "'": "'", '\\': '\\'}
+_literal_escapes = str.maketrans({
+    '\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'})
+
+
+def _unescape(match) -> str:
+    escaped = match.group(1)
+
+    if len(escaped) > 1:
+        return chr(int(escaped[1:], 16))
+
+    return _escaped_chars.get(escaped, escaped)
+
+
+def iter_triples(file_path: str) -> Iterator[Triple]:
+    """
+    Reads an N-Triples file line by line, yielding (subject, predicate,
+    object) tuples of the terms as written in the file, e.g.
+    ('<http://ex.com/s>', '<http://ex.com/p>', '"foo"@en'). Empty lines and
+    comments are skipped.
+
+    Subjects and predicates (IRIs or blank nodes) cannot contain whitespace in
+    N-Triples, so only the object needs to be separated from the trailing dot.
+    """
+    with open(file_path, encoding='utf-8') as in_file:
+        for line in in_file:
+            line = line.strip()
+
+            if not line or line.startswith('#'):
+                continue
+
+            subj, pred, rest = line.split(maxsplit=2)
+            obj = rest[:-1].rstrip() if rest.endswith('.') else rest
+
+            yield subj, pred, obj
+
+
+def is_iri(term: str) -> bool:
+    return term.startswith('<')
+
+
+def get_iri(term: str) -> str:
+    """
+    Strips the angle brackets from an IRI term
+    """
+    return term[1:-1]
+
+
+def get_literal_value(term: str) -> str:
+    """
+    Returns the (unescaped) lexical value of a literal term like
+    "foo"@en or "1"^^<http://www.w3.org/2001/XMLSchema#int>
+    """
+    value = term[1:term.rindex('"')]
+
+    if '\\' in value:
+        value = _escape_pattern.sub(_unescape, value)
+
+    return value
+
+
+def get_literal_suffix(term: str) -> str:
+    """
+    Returns the language tag or datatype of a literal term as written after
+    its lexical value, e.g. '@en' or
+    '^^<http://www.w3.org/2001/XMLSchema#int>', or '' for plain literals
+    """
+    return term[term.rindex('"') + 1:]
+
+
+def format_iri(iri: str) -> str:
+    return f'<{iri}>'
+
+
+def format_literal(value: str, suffix: str = '') -> str:
+    """
+    Returns a literal term, e.g. '"foo \\"bar\\""' for 'foo "bar"', with the
+    given language tag or datatype suffix (see get_literal_suffix())
+    """
+    return '"' + value.translate(_literal_escapes) + '"' + suffix
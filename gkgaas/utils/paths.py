@@ -16,3 +16,61 @@ def get_links_file_path(file_path: str) -> str:
     path_w_base_name, suffix = os.path.splitext(file_path)
 
     return path_w_base_name + '_links' + suffix
+
+
+def get_review_links_file_path(file_path: str) -> str:
+    """
+    Given an RDF file path like /path/to/file.nt this will create a file path
+    for the respective linking triples which still need review, named
+    /path/to/file_review_links.nt
+    """
+
+    path_w_base_name, suffix = os.path.splitext(file_path)
+
+    return path_w_base_name + '_review_links' + suffix
+
+
+def get_same_as_links_file_path(file_path: str) -> str:
+    """
+    Given an RDF file path like /path/to/file.nt this will create a file path
+    for the owl:sameAs links of all fusions which led to the file named
+    /path/to/file_same_as_links.nt
+    """
+
+    path_w_base_name, suffix = os.path.splitext(file_path)
+
+    return path_w_base_name + '_same_as_links' + suffix
+
+
+def get_unique_links_file_path(file_path: str) -> str:
+    """
+    Given an RDF file path like /path/to/file.nt this will create a file path
+    for the respective one-to-one links in CSV format named
+    /path/to/file_unique_links.csv
+    """
+
+    path_w_base_name, _ = os.path.splitext(file_path)
+
+    return path_w_base_name + '_unique_links.csv'
+
+
+def get_class_index_file_path(file_path: str) -> str:
+    """
+    Given an RDF file path like /path/to/file.nt this will create a file path
+    for the respective class index named /path/to/file_class_index.json
+    """
+
+    path_w_base_name, _ = os.path.splitext(file_path)
+
+    return path_w_base_name + '_class_index.json'
+
+
+def get_scores_file_path(file_path: str) -> str:
+    """
+    Given an RDF file path like /path/to/file.nt this will create a file path
+    for the scores of the respective links named /path/to/file_scores.npz
+    """
+
+    path_w_base_name, _ = os.path.splitext(file_path)
+
+    return path_w_base_name + '_scores.npz'
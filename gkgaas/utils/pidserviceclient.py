@@ -1,8 +1,26 @@
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import Callable, Optional, Union
 
 
 class PIDServiceClient(ABC):
+    def __init__(self):
+        self._asset_replacement_listeners = []
+
+    def add_asset_replacement_listener(self, listener: Callable[[str], None]):
+        """
+        Registers a callback which is called with the local ID of every asset
+        replaced by a newly registered one (see register_asset()), e.g. to
+        invalidate cached data of the replaced version
+        """
+        self._asset_replacement_listeners.append(listener)
+
+    def _notify_asset_replaced(self, replaced_asset_local_id: Optional[str]):
+        if replaced_asset_local_id is None:
+            return
+
+        for listener in self._asset_replacement_listeners:
+            listener(replaced_asset_local_id)
+
     @abstractmethod
     def get_custom_id(self, topio_id: str) -> Union[str, None]:
         pass
@@ -13,7 +31,15 @@ class PIDServiceClient(ABC):
 
     @abstractmethod
     def register_asset(
-            self, asset_local_id: str, user_id: int, description: str = None):
+            self,
+            asset_local_id: str,
+            user_id: int,
+            description: str = None,
+            replaced_asset_local_id: str = None):
+        """
+        Registers an asset, which is a new version of the asset with local ID
+        replaced_asset_local_id, if given
+        """
         pass
 
     @abstractmethod
@@ -27,7 +53,7 @@ class DummyPIDServiceClient(PIDServiceClient):
     Topio ID-local ID mappings via a local dictionary
     """
     def __init__(self):
-        # Nothing to do here
+        super().__init__()
         self._id_mappings = {}
         self._assets = {}
         self._asset_cntr = 0
@@ -78,7 +104,8 @@ class DummyPIDServiceClient(PIDServiceClient):
             self,
             local_id: str,
             user_id: int = 0,
-            description: str = None
+            description: str = None,
+            replaced_asset_local_id: str = None
     ):
 
         asset_id = self._get_next_asset_id()
@@ -92,3 +119,4 @@ class DummyPIDServiceClient(PIDServiceClient):
         }
 
         self._id_mappings[topio_id] = local_id
+        self._notify_asset_replaced(replaced_asset_local_id)
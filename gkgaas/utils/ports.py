@@ -0,0 +1,13 @@
+import socket
+
+
+def get_free_port() -> int:
+    """
+    Asks the OS for a currently unused TCP port. The port is not reserved, so
+    there is a (small) chance it gets taken by another process before it is
+    used.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('', 0))
+
+        return sock.getsockname()[1]
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class UnionFind(object):
+    """
+    Disjoint sets over the integers 0, ..., size - 1 with union by size and
+    path halving, kept in NumPy arrays
+    """
+
+    def __init__(self, size: int):
+        self.parents = np.arange(size, dtype=np.int64)
+        self.sizes = np.ones(size, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def find(self, x: int) -> int:
+        parents = self.parents
+
+        while parents[x] != x:
+            parents[x] = parents[parents[x]]
+            x = parents[x]
+
+        return int(x)
+
+    def union(self, x: int, y: int) -> int:
+        """
+        Merges the sets of x and y and returns the root of the merged set
+        """
+        x, y = self.find(x), self.find(y)
+
+        if x == y:
+            return x
+
+        if self.sizes[x] < self.sizes[y]:
+            x, y = y, x
+
+        self.parents[y] = x
+        self.sizes[x] += self.sizes[y]
+
+        return x
+
+    def get_roots(self) -> np.ndarray:
+        """
+        Returns the root of every element, compressing all paths
+        """
+        parents = self.parents
+
+        while True:
+            grandparents = parents[parents]
+
+            if np.array_equal(grandparents, parents):
+                return parents
+
+            parents[:] = grandparents
+
+    def union_all(self, xs: np.ndarray, ys: np.ndarray):
+        """
+        Merges the sets of xs[i] and ys[i] for all i at once by repeatedly
+        hooking the greater of two distinct roots onto the smaller one, with
+        paths fully compressed in between
+        """
+        parents = self.parents
+
+        while len(xs) > 0:
+            roots = self.get_roots()
+            x_roots, y_roots = roots[xs], roots[ys]
+            distinct = x_roots != y_roots
+
+            xs, ys = xs[distinct], ys[distinct]
+            x_roots, y_roots = x_roots[distinct], y_roots[distinct]
+
+            np.minimum.at(
+                parents,
+                np.maximum(x_roots, y_roots),
+                np.minimum(x_roots, y_roots))
+
+        self.sizes = np.bincount(self.get_roots(), minlength=len(parents))
@@ -15,6 +15,6 @@ setup(
         'rdflib==6.1.1',
         'pydantic==1.5.1',
         'PyYAML==5.3.1',
-        'sparqlwrapper==2.0.0',
+        'numpy==1.24.4',
     ]
 )
@@ -0,0 +1,130 @@
+import copy
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from unittest import TestCase
+
+from gkgaas.fagi import FusionMode, LinksFormat
+from gkgaas.fagi.action import DatasetAction
+from gkgaas.fagi.extraction import extract_linked_entities, get_fused_paths
+from gkgaas.fagi.preconfigs.profiles import slipo_default_ab_mode
+from gkgaas.fagi.runner import FAGIRunner
+from gkgaas.limes.links import write_links
+from tests.fagi.shardingtests import fake_fagi_script
+
+geo = 'http://www.opengis.net/ont/geosparql#'
+slipo = 'http://slipo.eu/def#'
+
+
+def _write_pois(file_path, pois, source='osm'):
+    with open(file_path, 'w') as out_file:
+        for iri, name in pois:
+            out_file.write(
+                f'<{iri}> <{slipo}name> <{iri}/name> .\n'
+                f'<{iri}/name> <{slipo}nameValue> "{name}" .\n'
+                f'<{iri}/name> <{slipo}language> "en" .\n'
+                f'<{iri}> <{geo}hasGeometry> <{iri}/geom> .\n'
+                f'<{iri}/geom> <{geo}asWKT> "POINT (1 2)" .\n'
+                f'<{iri}> <{slipo}source> "{source}" .\n')
+
+
+class TestExtraction(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'pois.nt')
+        self.out_file_path = os.path.join(self.tmp_dir, 'extracted.nt')
+
+        _write_pois(self.file_path, [
+            ('http://ex.com/p1', 'a'), ('http://ex.com/p2', 'b')])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _read_output(self):
+        with open(self.out_file_path) as in_file:
+            return in_file.read().splitlines()
+
+    def test_get_fused_paths(self):
+        rules = copy.deepcopy(slipo_default_ab_mode.rules)
+
+        # unmatched properties of the left entities are kept
+        self.assertIsNone(get_fused_paths(rules, True))
+
+        paths = get_fused_paths(rules, False)
+        self.assertIn([f'{geo}hasGeometry', f'{geo}asWKT'], paths)
+        self.assertIn([f'{slipo}name', f'{slipo}nameValue'], paths)
+        self.assertNotIn([f'{slipo}source'], paths)
+
+        rules.default_dataset_action = DatasetAction.KEEP_BOTH
+        self.assertIsNone(get_fused_paths(rules, False))
+
+    def test_extract_all(self):
+        self.assertEqual(
+            [6],
+            extract_linked_entities(
+                self.file_path, {'<http://ex.com/p1>': 0},
+                [self.out_file_path]))
+        self.assertFalse(any(['p2' in line for line in self._read_output()]))
+
+    def test_extract_paths(self):
+        rest_file_path = os.path.join(self.tmp_dir, 'rest.nt')
+
+        self.assertEqual(
+            [4],
+            extract_linked_entities(
+                self.file_path,
+                {'<http://ex.com/p1>': 0},
+                [self.out_file_path],
+                rest_file_path,
+                [[f'{slipo}name', f'{slipo}nameValue'],
+                 [f'{geo}hasGeometry', f'{geo}asWKT']]))
+
+        lines = self._read_output()
+        self.assertIn(
+            f'<http://ex.com/p1/name> <{slipo}nameValue> "a" .', lines)
+        self.assertFalse(any(['language' in line for line in lines]))
+
+        # the triples of the linked entities off the paths are dropped
+        with open(rest_file_path) as in_file:
+            self.assertFalse(any(['p1' in line for line in in_file]))
+
+    def test_fagi_runner(self):
+        exec_path = os.path.join(self.tmp_dir, 'fagi.py')
+        with open(exec_path, 'w') as out_file:
+            out_file.write(fake_fagi_script.format(python=sys.executable))
+        os.chmod(exec_path, os.stat(exec_path).st_mode | stat.S_IXUSR)
+
+        right_file_path = os.path.join(self.tmp_dir, 'right.nt')
+        _write_pois(
+            right_file_path, [('http://ex.org/k1', 'a')], source='wikidata')
+        links_file_path = os.path.join(self.tmp_dir, 'links.nt')
+        write_links(
+            [('http://ex.com/p1', 'http://ex.org/k1', 1.0)], links_file_path)
+
+        profile = copy.deepcopy(slipo_default_ab_mode)
+        profile.config.target.mode = FusionMode.L
+        profile.config.links.links_format = LinksFormat.NT
+
+        fagi = FAGIRunner(
+            fagi_executable_path=exec_path,
+            profile=profile,
+            left_input_file_path=self.file_path,
+            right_input_file_path=right_file_path,
+            links_file_path=links_file_path,
+            output_dir_path=self.tmp_dir,
+            extract_linked_entities=True)
+        fagi.run()
+
+        with open(os.path.join(self.tmp_dir, 'fused.nt')) as in_file:
+            lines = in_file.read().splitlines()
+
+        # all of the left entity, the rule paths of the right one
+        self.assertIn(
+            f'<http://ex.com/p1> <{geo}hasGeometry> <http://ex.org/k1/geom> .',
+            lines)
+        self.assertFalse(any(['wikidata' in line for line in lines]))
+        self.assertFalse(any(['p2' in line for line in lines]))
+        self.assertEqual(
+            self.file_path, fagi.profile.config.left.file_path)
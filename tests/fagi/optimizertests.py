@@ -0,0 +1,147 @@
+import copy
+import itertools
+import unittest
+
+from gkgaas.fagi.condition import SimpleFAGIRuleConditionExpression, And, \
+    Or, Not
+from gkgaas.fagi.function import Exists, GeometriesCloserThan, \
+    IsSameCustomNormalize, IsLiteralAbbreviation, IsPointGeometry
+from gkgaas.fagi.optimizer import order_expression, order_conditions, \
+    get_cost
+from gkgaas.fagi.preconfigs.profiles import slipo_get_osm_aa_mode
+
+
+def _evaluate(expression, values):
+    """
+    Evaluates an expression given the values of its functions by their string
+    """
+    if isinstance(expression, SimpleFAGIRuleConditionExpression):
+        return values[str(expression.evaluation_function)]
+
+    if isinstance(expression, And):
+        return _evaluate(expression.first_expression, values) and \
+            _evaluate(expression.second_expression, values)
+
+    if isinstance(expression, Or):
+        return _evaluate(expression.first_expression, values) or \
+            _evaluate(expression.second_expression, values)
+
+    return not _evaluate(expression.expression, values)
+
+
+class OptimizerTests(unittest.TestCase):
+    def setUp(self):
+        self.closer = SimpleFAGIRuleConditionExpression(
+            GeometriesCloserThan('a0', 'b0', '150'))
+        self.same_name = SimpleFAGIRuleConditionExpression(
+            IsSameCustomNormalize('a1', 'b1', '0.8'))
+        self.exists = SimpleFAGIRuleConditionExpression(Exists('a2'))
+        self.abbreviation = SimpleFAGIRuleConditionExpression(
+            IsLiteralAbbreviation('b1'))
+        self.point = SimpleFAGIRuleConditionExpression(IsPointGeometry('a0'))
+
+    def test_order_expression(self):
+        expr = order_expression(And(self.closer, self.same_name))
+
+        expected_expr_str = """
+                    <expression>
+                        <and>
+                            <function>isSameCustomNormalize(a1,b1,0.8)</function>
+                            <function>geometriesCloserThan(a0,b0,150)</function>
+                        </and>
+                    </expression>"""
+
+        self.assertEqual(expected_expr_str, str(expr))
+        self.assertEqual(80, get_cost(expr))
+
+    def test_flatten(self):
+        expr = order_expression(And(
+            And(self.closer, self.exists, nesting_level=1),
+            Or(self.same_name, self.abbreviation, nesting_level=1)))
+
+        expected_expr_str = """
+                    <expression>
+                        <and>
+                            <function>exists(a2)</function>
+                            <expression>
+                                <and>
+                                    <expression>
+                                        <or>
+                                            <function>isLiteralAbbreviation(b1)</function>
+                                            <function>isSameCustomNormalize(a1,b1,0.8)</function>
+                                        </or>
+                                    </expression>
+                                    <function>geometriesCloserThan(a0,b0,150)</function>
+                                </and>
+                            </expression>
+                        </and>
+                    </expression>"""
+
+        self.assertEqual(expected_expr_str, str(expr))
+
+    def test_not(self):
+        expr = order_expression(Not(Or(self.closer, self.exists)))
+
+        expected_expr_str = """
+                    <expression>
+                        <not>
+                            <expression>
+                                <or>
+                                    <function>exists(a2)</function>
+                                    <function>geometriesCloserThan(a0,b0,150)</function>
+                                </or>
+                            </expression>
+                        </not>
+                    </expression>"""
+
+        self.assertEqual(expected_expr_str, str(expr))
+
+    def test_equivalence(self):
+        functions = [
+            self.closer, self.same_name, self.exists, self.abbreviation,
+            self.point]
+        expr = Or(
+            And(
+                Not(And(self.closer, self.point)),
+                Or(self.same_name, self.exists)),
+            And(
+                self.abbreviation,
+                Or(self.point, And(self.closer, self.exists))))
+        ordered = order_expression(expr)
+
+        for truth_values in itertools.product(
+                [False, True], repeat=len(functions)):
+            values = {
+                str(function.evaluation_function): value
+                for function, value in zip(functions, truth_values)}
+
+            self.assertEqual(
+                _evaluate(expr, values), _evaluate(ordered, values))
+
+    def test_order_conditions(self):
+        rules = copy.deepcopy(slipo_get_osm_aa_mode.rules)
+        rules_str = [str(rule) for rule in rules.rules]
+
+        ordered = order_conditions(rules)
+
+        # the rules are copied
+        self.assertEqual(rules_str, [str(rule) for rule in rules.rules])
+
+        first_condition = str(
+            ordered.rules[0].action_rule_set[0].condition).strip()
+        self.assertLess(
+            first_condition.index('isSameCustomNormalize'),
+            first_condition.index('geometriesCloserThan'))
+
+        # ordered only once per rules object and kept there
+        self.assertIs(ordered, rules.ordered)
+        self.assertIs(ordered, order_conditions(rules))
+        self.assertIsNot(
+            ordered, order_conditions(slipo_get_osm_aa_mode.rules))
+
+    def test_profile_copy(self):
+        profile = slipo_get_osm_aa_mode.copy()
+
+        self.assertIs(slipo_get_osm_aa_mode.rules, profile.rules)
+        self.assertIsNot(slipo_get_osm_aa_mode.config, profile.config)
+        self.assertEqual(slipo_get_osm_aa_mode.config, profile.config)
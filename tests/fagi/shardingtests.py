@@ -0,0 +1,229 @@
+import copy
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+from unittest import TestCase
+
+from gkgaas.fagi import FusionMode, LinksFormat
+from gkgaas.fagi.preconfigs.profiles import slipo_default_ab_mode
+from gkgaas.fagi.runner import FAGIRunner
+from gkgaas.fagi.sharding import ShardedFAGIRunner, get_shards
+from gkgaas.limes.links import write_links
+
+# Fake FAGI executable fusing linked entities by writing the triples of the
+# left entities and of the right entities renamed to the left ones they are
+# linked with, where the triples of an entity are those of the entity IRI and
+# of IRIs below it (e.g. <entity/name>). Unlinked triples are written as
+# FAGI's fusion modes do.
+fake_fagi_script = """#!{python}
+import os
+import re
+import sys
+
+config = open(sys.argv[1]).read()
+
+
+def get(section, tag):
+    section_str = re.search(f'<{{section}}>(.*?)</{{section}}>', config,
+                            re.DOTALL).group(1)
+    return re.search(f'<{{tag}}>(.*)</{{tag}}>', section_str).group(1)
+
+
+links = {{}}
+for line in open(get('links', 'file')):
+    if line.strip():
+        left, right = re.findall(r'http://[^,> ]+', line)[::2] \\
+            if '> <' in line else line.strip().split(',')[:2]
+        links[right] = left
+
+
+def get_entity(subj, entities):
+    iri = subj[1:-1]
+    for entity in entities:
+        if iri == entity or iri.startswith(entity + '/'):
+            return entity
+    return None
+
+
+fused, unlinked = [], {{'left': [], 'right': []}}
+for dataset in ['left', 'right']:
+    entities = set(links.values()) if dataset == 'left' else set(links)
+    for line in open(get(dataset, 'file')):
+        if not line.strip():
+            continue
+        entity = get_entity(line.split()[0], entities)
+        if entity is None:
+            unlinked[dataset].append(line)
+        elif dataset == 'left':
+            fused.append(line)
+        else:
+            fused.append(line.replace(entity, links[entity], 1))
+
+mode = get('target', 'mode')
+fused_datasets, remaining_datasets = {{
+    'aa_mode': ([], []), 'bb_mode': ([], []), 'l_mode': ([], []),
+    'ab_mode': (['left', 'right'], []), 'ba_mode': (['left', 'right'], []),
+    'a_mode': (['left'], ['right']), 'b_mode': (['right'], ['left'])}}[mode]
+
+output_dir = get('target', 'outputDir')
+with open(os.path.join(output_dir, get('target', 'fused')), 'w') as f:
+    f.writelines(sorted(set(fused)))
+    for dataset in fused_datasets:
+        f.writelines(unlinked[dataset])
+with open(os.path.join(output_dir, get('target', 'remaining')), 'w') as f:
+    for dataset in remaining_datasets:
+        f.writelines(unlinked[dataset])
+open(os.path.join(output_dir, get('target', 'ambiguous')), 'w').close()
+"""
+
+
+def _write_entities(file_path, entities):
+    with open(file_path, 'w') as out_file:
+        for iri, name in entities:
+            out_file.write(
+                f'<{iri}> <http://slipo.eu/def#name> <{iri}/name> .\n'
+                f'<{iri}> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> '
+                f'<http://slipo.eu/def#POI> .\n'
+                f'<{iri}/name> <http://slipo.eu/def#nameValue> "{name}" .\n')
+
+
+class TestShardedFAGIRunner(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.exec_path = os.path.join(self.tmp_dir, 'fagi.py')
+
+        with open(self.exec_path, 'w') as out_file:
+            out_file.write(fake_fagi_script.format(python=sys.executable))
+        os.chmod(
+            self.exec_path, os.stat(self.exec_path).st_mode | stat.S_IXUSR)
+
+        self.left_file_path = os.path.join(self.tmp_dir, 'left.nt')
+        self.right_file_path = os.path.join(self.tmp_dir, 'right.nt')
+        self.links_file_path = os.path.join(self.tmp_dir, 'links.nt')
+
+        _write_entities(self.left_file_path, [
+            ('http://ex.com/u1', 'a'), ('http://ex.com/u2', 'b'),
+            ('http://ex.com/u3', 'c'), ('http://ex.com/u4', 'd')])
+        _write_entities(self.right_file_path, [
+            ('http://ex.org/k1', 'A'), ('http://ex.org/k2', 'B'),
+            ('http://ex.org/k3', 'B'), ('http://ex.org/k4', 'C'),
+            ('http://ex.org/k5', 'E')])
+        write_links([
+            ('http://ex.com/u1', 'http://ex.org/k1', 1.0),
+            ('http://ex.com/u2', 'http://ex.org/k2', 1.0),
+            ('http://ex.com/u2', 'http://ex.org/k3', 1.0),
+            ('http://ex.com/u3', 'http://ex.org/k4', 1.0)],
+            self.links_file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _fuse(self, runner_cls, mode, **kwargs):
+        output_dir = tempfile.mkdtemp(dir=self.tmp_dir)
+        profile = copy.deepcopy(slipo_default_ab_mode)
+        profile.config.target.mode = mode
+        profile.config.links.links_format = LinksFormat.NT
+
+        runner_cls(
+            fagi_executable_path=self.exec_path,
+            profile=profile,
+            left_input_file_path=self.left_file_path,
+            right_input_file_path=self.right_file_path,
+            links_file_path=self.links_file_path,
+            output_dir_path=output_dir,
+            **kwargs).run()
+
+        outputs = []
+
+        for file_name in ['fused.nt', 'remaining.nt', 'review.nt']:
+            with open(os.path.join(output_dir, file_name)) as in_file:
+                outputs.append(sorted(in_file.read().splitlines()))
+
+        return outputs
+
+    def test_get_shards(self):
+        links = [('a1', 'b1'), ('a2', 'b2'), ('a2', 'b3'), ('a3', 'b3'),
+                 ('a4', 'b4')]
+
+        self.assertEqual(
+            [[1, 2, 3], [0, 4]], get_shards(links, 2))
+        self.assertEqual(
+            [[1, 2, 3], [0], [4]], get_shards(links, 4))
+        self.assertEqual([], get_shards([], 2))
+
+    def test_run(self):
+        for mode in [FusionMode.AB, FusionMode.A, FusionMode.B,
+                     FusionMode.L]:
+            fused, remaining, ambiguous = self._fuse(
+                ShardedFAGIRunner, mode, num_shards=2)
+
+            self.assertEqual(
+                self._fuse(FAGIRunner, mode), [fused, remaining, ambiguous])
+
+        fused = self._fuse(ShardedFAGIRunner, FusionMode.L, num_shards=2)[0]
+        self.assertIn(
+            '<http://ex.com/u2/name> <http://slipo.eu/def#nameValue> "B" .',
+            fused)
+        self.assertFalse(any(['u4' in line for line in fused]))
+
+    def test_run_in_slots(self):
+        fused = self._fuse(
+            ShardedFAGIRunner, FusionMode.AB, num_shards=2,
+            slots=threading.BoundedSemaphore(1))[0]
+
+        self.assertEqual(self._fuse(FAGIRunner, FusionMode.AB)[0], fused)
+
+    def test_shared_nodes(self):
+        # u1 and u3 are in different shards and share their category
+        with open(self.left_file_path, 'a') as out_file:
+            out_file.write(
+                '<http://ex.com/u1> <http://slipo.eu/def#category> '
+                '<http://ex.com/cat> .\n'
+                '<http://ex.com/u3> <http://slipo.eu/def#category> '
+                '<http://ex.com/cat> .\n'
+                '<http://ex.com/cat> <http://slipo.eu/def#value> "food" .\n')
+
+        fused = self._fuse(ShardedFAGIRunner, FusionMode.AB, num_shards=3)[0]
+
+        self.assertEqual(self._fuse(FAGIRunner, FusionMode.AB)[0], fused)
+        self.assertEqual(1, len([line for line in fused if '"food"' in line]))
+
+    def test_merge_output(self):
+        category = '<http://ex.com/c> <http://ex.com/label> "Cafe" .\n'
+        shard_dirs = []
+
+        for i, lines in enumerate([
+                ['<http://ex.com/u1> <http://ex.com/p> "a" .\n', category],
+                [category, '<http://ex.com/u2> <http://ex.com/p> "b" .\n',
+                 '<http://ex.com/u2> <http://ex.com/p> "b" .\n']]):
+            shard_dir = os.path.join(self.tmp_dir, str(i))
+            os.mkdir(shard_dir)
+            shard_dirs.append(shard_dir)
+
+            with open(os.path.join(shard_dir, 'fused.nt'), 'w') as out_file:
+                out_file.writelines(lines)
+
+        unlinked_file_path = os.path.join(self.tmp_dir, 'unlinked.nt')
+        with open(unlinked_file_path, 'w') as out_file:
+            out_file.write('<http://ex.com/u4> <http://ex.com/p> "d" .\n')
+
+        out_file_path = os.path.join(self.tmp_dir, 'fused.nt')
+        ShardedFAGIRunner._merge_output(
+            shard_dirs,
+            'fused.nt',
+            [unlinked_file_path],
+            {'<http://ex.com/c>'},
+            out_file_path)
+
+        # only the lines of shared nodes are deduplicated
+        with open(out_file_path) as in_file:
+            self.assertEqual(
+                ['<http://ex.com/u4> <http://ex.com/p> "d" .',
+                 '<http://ex.com/u1> <http://ex.com/p> "a" .',
+                 category.strip(),
+                 '<http://ex.com/u2> <http://ex.com/p> "b" .',
+                 '<http://ex.com/u2> <http://ex.com/p> "b" .'],
+                in_file.read().splitlines())
@@ -0,0 +1,62 @@
+import threading
+from unittest import TestCase
+
+from gkgaas.jobs import JobManager, JobStage, JobStatus, JobQueueFull
+
+
+class TestJobManager(TestCase):
+    def test_successful_job(self):
+        def pipeline(job, value):
+            job.enter_stage(JobStage.CONVERSION)
+            job.enter_stage(JobStage.LINKING)
+            return value * 2
+
+        job_manager = JobManager(max_workers=1)
+        job = job_manager.submit(pipeline, 21)
+        job_manager.shutdown(wait=True)
+
+        self.assertEqual(JobStatus.SUCCEEDED, job.status)
+        self.assertEqual(JobStage.DONE, job.stage)
+        self.assertEqual(42, job.result)
+        self.assertIsNone(job.error)
+        self.assertEqual(
+            {'queued', 'conversion', 'linking'}, set(job.stage_durations))
+        self.assertIs(job, job_manager.get(job.id))
+
+    def test_failed_job(self):
+        def pipeline(job):
+            job.enter_stage(JobStage.FUSION)
+            raise Exception('fusion failed')
+
+        job_manager = JobManager(max_workers=1)
+        job = job_manager.submit(pipeline)
+        job_manager.shutdown(wait=True)
+
+        self.assertEqual(JobStatus.FAILED, job.status)
+        self.assertEqual(JobStage.FUSION, job.stage)
+        self.assertEqual('fusion failed', job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_queue_limit(self):
+        release = threading.Event()
+
+        def pipeline(job):
+            release.wait()
+
+        job_manager = JobManager(max_workers=1, max_pending_jobs=1)
+        job_manager.submit(pipeline)
+        job_manager.submit(pipeline)
+
+        with self.assertRaises(JobQueueFull):
+            job_manager.submit(pipeline)
+
+        release.set()
+        job_manager.shutdown(wait=True)
+
+    def test_retained_jobs(self):
+        job_manager = JobManager(max_workers=1, max_retained_jobs=2)
+        jobs = [job_manager.submit(lambda job: None) for _ in range(4)]
+        job_manager.shutdown(wait=True)
+
+        self.assertIsNone(job_manager.get(jobs[0].id))
+        self.assertIsNotNone(job_manager.get(jobs[-1].id))
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.clusters import SameAsClusters
+from gkgaas.limes.links import write_links
+
+
+class TestSameAsClusters(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.links_file_paths = [
+            os.path.join(self.tmp_dir, 'links1.nt'),
+            os.path.join(self.tmp_dir, 'links2.nt')]
+
+        # kg/1 and kg/2 were linked by an earlier fusion, the chain
+        # user/b -> user/a -> kg/2 -> kg/1 is one cluster
+        write_links(
+            [('http://ex.com/kg/2', 'http://ex.com/kg/1', 1.0),
+             ('http://ex.com/kg/3', 'http://ex.com/kg/4', 1.0)],
+            self.links_file_paths[0])
+        write_links(
+            [('http://ex.com/user/a', 'http://ex.com/kg/2', 1.0),
+             ('http://ex.com/user/b', 'http://ex.com/user/a', 1.0),
+             ('http://ex.com/user/c', 'http://ex.com/kg/5', 1.0)],
+            self.links_file_paths[1])
+
+        # small chunks to cover chunking
+        self.clusters = SameAsClusters.from_link_files(
+            self.links_file_paths, chunk_size=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_clusters(self):
+        self.assertEqual(3, len(self.clusters))
+        self.assertEqual(
+            ['http://ex.com/kg/1', 'http://ex.com/kg/4', 'http://ex.com/kg/5'],
+            [self.clusters.get_canonical_iri_of_cluster(i) for i in range(3)])
+
+        for iri in ['http://ex.com/kg/1', 'http://ex.com/kg/2',
+                    'http://ex.com/user/a', 'http://ex.com/user/b']:
+            self.assertEqual(
+                'http://ex.com/kg/1', self.clusters.get_canonical_iri(iri))
+
+        self.assertEqual(
+            'http://ex.com/kg/4',
+            self.clusters.get_canonical_iri('http://ex.com/kg/3'))
+        self.assertEqual(
+            'http://ex.com/other',
+            self.clusters.get_canonical_iri('http://ex.com/other'))
+
+    def test_csv_links(self):
+        links_file_path = os.path.join(self.tmp_dir, 'links.csv')
+        write_links(
+            [('http://ex.com/a', 'http://ex.com/b', 0.9)],
+            links_file_path,
+            LinksFormat.CSV_UNIQUE_LINKS,
+            keep_confidence=True)
+
+        clusters = SameAsClusters.from_link_files(
+            [links_file_path], LinksFormat.CSV_UNIQUE_LINKS)
+        self.assertEqual(
+            'http://ex.com/b', clusters.get_canonical_iri('http://ex.com/a'))
+
+    def test_empty(self):
+        links_file_path = os.path.join(self.tmp_dir, 'links.nt')
+        write_links([], links_file_path)
+
+        clusters = SameAsClusters.from_link_files([links_file_path])
+        self.assertEqual(0, len(clusters))
+        self.assertEqual(
+            'http://ex.com/a', clusters.get_canonical_iri('http://ex.com/a'))
+
+    def test_save_and_load(self):
+        file_path = os.path.join(self.tmp_dir, 'clusters.npz')
+        self.clusters.save(file_path)
+        clusters = SameAsClusters.load(file_path)
+
+        self.assertEqual(3, len(clusters))
+        self.assertEqual(
+            'http://ex.com/kg/1',
+            clusters.get_canonical_iri('http://ex.com/user/b'))
+
+    def test_smush(self):
+        in_file_path = os.path.join(self.tmp_dir, 'fused.nt')
+        out_file_path = os.path.join(self.tmp_dir, 'smushed.nt')
+
+        with open(in_file_path, 'w') as out_file:
+            out_file.write(
+                '<http://ex.com/user/b> <http://ex.com/p> "b" .\n'
+                '<http://ex.com/user/a> <http://ex.com/p> '
+                '<http://ex.com/kg/3> .\n'
+                '<http://ex.com/user/a> '
+                '<http://www.w3.org/2002/07/owl#sameAs> '
+                '<http://ex.com/kg/2> .\n'
+                '\n'
+                '<http://ex.com/kg/1> <http://ex.com/p> "1"@en .\n'
+                '_:b0 <http://ex.com/p> <http://ex.com/other> .\n')
+
+        self.assertEqual(
+            3, self.clusters.smush(in_file_path, out_file_path, chunk_size=2))
+
+        with open(out_file_path) as in_file:
+            self.assertEqual(
+                '<http://ex.com/kg/1> <http://ex.com/p> "b" .\n'
+                '<http://ex.com/kg/1> <http://ex.com/p> '
+                '<http://ex.com/kg/4> .\n'
+                '\n'
+                '<http://ex.com/kg/1> <http://ex.com/p> "1"@en .\n'
+                '_:b0 <http://ex.com/p> <http://ex.com/other> .\n',
+                in_file.read())
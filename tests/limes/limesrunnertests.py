@@ -0,0 +1,130 @@
+import os
+import shutil
+import stat
+import tempfile
+from unittest import TestCase
+
+from gkgaas.exceptions import RunnerExecutionFailed
+from gkgaas.limes.preconfigs.profiles import \
+    slipo_equi_match_by_name_and_distance
+from gkgaas.limes.runner import LIMESRunner
+from gkgaas.utils.filecache import FileCache
+
+# Fake LIMES executable writing the accepted and review link files configured
+# in the given config file and counting its invocations
+fake_limes_script = """#!/bin/sh
+echo x >> "$(dirname "$0")/calls.txt"
+files=$(sed -n 's:.*<FILE>\\(.*\\)</FILE>.*:\\1:p' "$1")
+accepted=$(echo "$files" | sed -n 1p)
+review=$(echo "$files" | sed -n 2p)
+printf '<http://ex.com/s1>\\t<http://ex.com/t1>\\t0.97\\n' > "$accepted"
+printf '<http://ex.com/s2>\\t<http://ex.com/t2>\\t0.85\\n' > "$review"
+"""
+
+
+class TestLIMESRunner(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+        self.exec_path = os.path.join(self.tmp_dir, 'run_limes.sh')
+        with open(self.exec_path, 'w') as out_file:
+            out_file.write(fake_limes_script)
+        os.chmod(self.exec_path, os.stat(self.exec_path).st_mode | stat.S_IXUSR)
+
+        self.source_file_path = os.path.join(self.tmp_dir, 'source.nt')
+        self.target_file_path = os.path.join(self.tmp_dir, 'target.nt')
+
+        for file_path in [self.source_file_path, self.target_file_path]:
+            with open(file_path, 'w') as out_file:
+                out_file.write(
+                    '<http://ex.com/s1> <http://ex.com/p> "o" .\n')
+
+        self.cache = FileCache(os.path.join(self.tmp_dir, 'cache'), 1024 ** 2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _get_num_calls(self):
+        with open(os.path.join(self.tmp_dir, 'calls.txt')) as in_file:
+            return len(in_file.readlines())
+
+    def _run(self, out_dir_name, **kwargs):
+        out_dir = os.path.join(self.tmp_dir, out_dir_name)
+        os.mkdir(out_dir)
+
+        links_file_path = os.path.join(out_dir, 'links.nt')
+        review_links_file_path = os.path.join(out_dir, 'review_links.nt')
+
+        LIMESRunner(
+            limes_executable_path=self.exec_path,
+            profile=slipo_equi_match_by_name_and_distance,
+            source_input_file_path=self.source_file_path,
+            target_input_file_path=self.target_file_path,
+            result_links_kg_file_path=links_file_path,
+            output_dir=out_dir,
+            result_review_links_kg_file_path=review_links_file_path,
+            cache=self.cache,
+            **kwargs).run()
+
+        with open(links_file_path) as in_file:
+            links = in_file.read().strip()
+
+        with open(review_links_file_path) as in_file:
+            review_links = in_file.read().strip()
+
+        return links, review_links
+
+    def test_link_set_cache(self):
+        links, review_links = self._run('out1')
+        self.assertEqual(1, self._get_num_calls())
+        self.assertEqual(
+            '<http://ex.com/s1> <http://www.w3.org/2002/07/owl#sameAs> '
+            '<http://ex.com/t1> .',
+            links)
+        self.assertEqual(
+            '<http://ex.com/s2> <http://www.w3.org/2002/07/owl#sameAs> '
+            '<http://ex.com/t2> .',
+            review_links)
+
+        # cache hit
+        self.assertEqual((links, review_links), self._run('out2'))
+        self.assertEqual(1, self._get_num_calls())
+
+        # changed source dataset
+        with open(self.source_file_path, 'a') as out_file:
+            out_file.write('<http://ex.com/s2> <http://ex.com/p> "o" .\n')
+
+        self._run('out3')
+        self.assertEqual(2, self._get_num_calls())
+
+    def test_fatal_error_in_output(self):
+        with open(self.exec_path, 'w') as out_file:
+            out_file.write(
+                '#!/bin/sh\n'
+                'echo \'Exception in thread "main" java.lang.Error\'\n'
+                'exit 0\n')
+
+        with self.assertRaises(RunnerExecutionFailed):
+            self._run('out')
+
+    def test_project_inputs(self):
+        # additionally keeps a copy of the source dataset LIMES got
+        with open(self.exec_path, 'a') as out_file:
+            out_file.write(
+                'source=$(sed -n "s:.*<ENDPOINT>\\(.*\\)</ENDPOINT>.*:\\1:p" '
+                '"$1" | head -n 1)\n'
+                'cp "$source" "$(dirname "$0")/limes_source.nt"\n')
+
+        with open(self.source_file_path, 'w') as out_file:
+            out_file.write(
+                '<http://ex.com/s1> <http://slipo.eu/def#name> _:n .\n'
+                '_:n <http://slipo.eu/def#nameValue> "A" .\n'
+                '<http://ex.com/s1> <http://slipo.eu/def#phone> "123" .\n')
+
+        self._run('out', project_inputs=True)
+
+        with open(os.path.join(self.tmp_dir, 'limes_source.nt')) as in_file:
+            self.assertEqual([
+                '<http://ex.com/s1> <http://slipo.eu/def#name> _:n .',
+                '_:n <http://slipo.eu/def#nameValue> "A" .'],
+                in_file.read().splitlines())
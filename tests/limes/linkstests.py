@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.links import convert_limes_links, iter_limes_links, \
+    iter_links, write_links
+
+limes_output = \
+    '<http://slipo.eu/id/poi/1>\t<https://sws.geonames.org/9294554/>\t' \
+    '0.9321554652991914\n' \
+    '\n' \
+    '<http://slipo.eu/id/poi/1>\t<https://sws.geonames.org/9300183/>\t' \
+    '0.9985261319810942\n'
+
+
+class TestLinks(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.limes_links_file_path = os.path.join(self.tmp_dir, 'accepted.csv')
+        self.out_file_path = os.path.join(self.tmp_dir, 'links')
+
+        with open(self.limes_links_file_path, 'w') as out_file:
+            out_file.write(limes_output)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _read_output(self):
+        with open(self.out_file_path) as in_file:
+            return in_file.read()
+
+    def test_iter_limes_links(self):
+        links = list(iter_limes_links(self.limes_links_file_path))
+
+        self.assertEqual(
+            [
+                ('http://slipo.eu/id/poi/1',
+                 'https://sws.geonames.org/9294554/',
+                 0.9321554652991914),
+                ('http://slipo.eu/id/poi/1',
+                 'https://sws.geonames.org/9300183/',
+                 0.9985261319810942)
+            ],
+            links)
+
+    def test_convert_to_nt(self):
+        convert_limes_links(self.limes_links_file_path, self.out_file_path)
+
+        self.assertEqual(
+            '<http://slipo.eu/id/poi/1> <http://www.w3.org/2002/07/owl#sameAs> '
+            '<https://sws.geonames.org/9294554/> .\n'
+            '<http://slipo.eu/id/poi/1> <http://www.w3.org/2002/07/owl#sameAs> '
+            '<https://sws.geonames.org/9300183/> .\n',
+            self._read_output())
+
+    def test_convert_to_csv(self):
+        convert_limes_links(
+            self.limes_links_file_path, self.out_file_path, LinksFormat.CSV)
+
+        self.assertEqual(
+            'http://slipo.eu/id/poi/1,https://sws.geonames.org/9294554/\n'
+            'http://slipo.eu/id/poi/1,https://sws.geonames.org/9300183/\n',
+            self._read_output())
+
+    def test_convert_to_csv_with_confidence(self):
+        convert_limes_links(
+            self.limes_links_file_path,
+            self.out_file_path,
+            LinksFormat.CSV,
+            keep_confidence=True)
+
+        self.assertEqual(
+            'http://slipo.eu/id/poi/1,https://sws.geonames.org/9294554/,'
+            '0.9321554652991914\n'
+            'http://slipo.eu/id/poi/1,https://sws.geonames.org/9300183/,'
+            '0.9985261319810942\n',
+            self._read_output())
+
+    def test_nt_with_confidence_not_supported(self):
+        with self.assertRaises(ValueError):
+            convert_limes_links(
+                self.limes_links_file_path,
+                self.out_file_path,
+                keep_confidence=True)
+
+    def test_iter_links(self):
+        expected = [
+            ('http://slipo.eu/id/poi/1', 'https://sws.geonames.org/9294554/'),
+            ('http://slipo.eu/id/poi/1', 'https://sws.geonames.org/9300183/')]
+
+        convert_limes_links(self.limes_links_file_path, self.out_file_path)
+        self.assertEqual(expected, list(iter_links(self.out_file_path)))
+
+        convert_limes_links(
+            self.limes_links_file_path,
+            self.out_file_path,
+            LinksFormat.CSV,
+            keep_confidence=True)
+        self.assertEqual(
+            expected,
+            list(iter_links(self.out_file_path, LinksFormat.CSV)))
+
+    def test_append_links(self):
+        write_links([('http://ex.com/a', 'http://ex.org/a', 1.0)],
+                    self.out_file_path)
+        write_links([('http://ex.com/b', 'http://ex.org/b', 1.0)],
+                    self.out_file_path, append=True)
+
+        self.assertEqual(
+            [('http://ex.com/a', 'http://ex.org/a'),
+             ('http://ex.com/b', 'http://ex.org/b')],
+            list(iter_links(self.out_file_path)))
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.native import NativeLinker, UnsupportedLinkingProfile, \
+    parse_metric, get_trigrams, haversine_distance, get_bbox
+from gkgaas.limes.preconfigs.profiles import \
+    slipo_equi_match_by_name_and_distance_native, slipo_match_by_name
+
+poi_template = """<{iri}> <http://slipo.eu/def#name> <{iri}/name> .
+<{iri}/name> <http://slipo.eu/def#nameValue> "{name}"@en .
+<{iri}> <http://www.opengis.net/ont/geosparql#hasGeometry> <{iri}/geom> .
+<{iri}/geom> <http://www.opengis.net/ont/geosparql#asWKT> "<http://www.opengis.net/def/crs/EPSG/0/4326> POINT ({lon} {lat})"^^<http://www.opengis.net/ont/geosparql#wktLiteral> .
+"""
+
+
+def write_pois(file_path, pois):
+    with open(file_path, 'w') as out_file:
+        for iri, name, lat, lon in pois:
+            out_file.write(
+                poi_template.format(iri=iri, name=name, lat=lat, lon=lon))
+
+
+class TestNativeLinker(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.source_file_path = os.path.join(self.tmp_dir, 'source.nt')
+        self.target_file_path = os.path.join(self.tmp_dir, 'target.nt')
+
+        write_pois(self.source_file_path, [
+            ('http://ex.com/s1', 'Cafe Central', 48.0, 11.0),
+            ('http://ex.com/s2', 'Hotel Post', 48.1, 11.1),
+            ('http://ex.com/s3', 'Bar X', 48.2, 11.2)])
+
+        write_pois(self.target_file_path, [
+            ('http://ex.org/t1', 'cafe central', 48.0, 11.0),
+            # ~100m north
+            ('http://ex.org/t2', 'Hotel Post', 48.1009, 11.1),
+            ('http://ex.org/t3', 'Something Else', 48.2, 11.2),
+            # ~1km east
+            ('http://ex.org/t4', 'Bar X', 48.2, 11.2134)])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _read_lines(self, file_path):
+        with open(file_path) as in_file:
+            return sorted(in_file.read().splitlines())
+
+    def test_run(self):
+        links_file_path = os.path.join(self.tmp_dir, 'links.csv')
+        review_file_path = os.path.join(self.tmp_dir, 'review_links.csv')
+
+        NativeLinker(
+            slipo_equi_match_by_name_and_distance_native,
+            self.source_file_path,
+            self.target_file_path,
+            links_file_path,
+            result_review_links_kg_file_path=review_file_path,
+            links_format=LinksFormat.CSV,
+            keep_confidence=True,
+            chunk_size=2).run()
+
+        self.assertEqual(
+            ['http://ex.com/s1,http://ex.org/t1,1.0'],
+            self._read_lines(links_file_path))
+
+        review_links = self._read_lines(review_file_path)
+        self.assertEqual(1, len(review_links))
+
+        source_iri, target_iri, score = review_links[0].split(',')
+        self.assertEqual(
+            ('http://ex.com/s2', 'http://ex.org/t2'), (source_iri, target_iri))
+        self.assertAlmostEqual(1 / 1.1, float(score), places=2)
+
+    def test_nt_output(self):
+        links_file_path = os.path.join(self.tmp_dir, 'links.nt')
+
+        NativeLinker(
+            slipo_equi_match_by_name_and_distance_native,
+            self.source_file_path,
+            self.target_file_path,
+            links_file_path).run()
+
+        self.assertEqual(
+            ['<http://ex.com/s1> <http://www.w3.org/2002/07/owl#sameAs> '
+             '<http://ex.org/t1> .'],
+            self._read_lines(links_file_path))
+
+    def test_unsupported_profile(self):
+        self.assertFalse(NativeLinker.supports_profile(slipo_match_by_name))
+
+        with self.assertRaises(UnsupportedLinkingProfile):
+            NativeLinker(slipo_match_by_name, '', '', '')
+
+    def test_parse_metric(self):
+        trigrams, distance = parse_metric(
+            'AND (trigrams(x.label, y.label)|0.8, '
+            'euclidean(x.lat|long, y.lat|long)|0.5)')
+
+        self.assertEqual('trigrams', trigrams.name)
+        self.assertEqual(['label'], trigrams.source_properties)
+        self.assertEqual(0.8, trigrams.threshold)
+        self.assertEqual('euclidean', distance.name)
+        self.assertEqual(['lat', 'long'], distance.target_properties)
+
+    def test_similarity_functions(self):
+        self.assertEqual(
+            ['  a', ' ab', 'ab ', 'b  '], get_trigrams('ab'))
+
+        # Munich - Berlin
+        distance = haversine_distance(
+            np.array([48.137]), np.array([11.575]),
+            np.array([52.520]), np.array([13.405]))
+        self.assertAlmostEqual(504, distance[0], delta=2)
+
+    def test_get_bbox(self):
+        crs = '<http://www.opengis.net/def/crs/EPSG/0/4326> '
+
+        self.assertEqual((48.0, 11.0, 48.0, 11.0), get_bbox(
+            {'wkt': [crs + 'POINT (11.0 48.0)']}, ['wkt'], True))
+        self.assertEqual((48.0, 10.5, 49.0, 12.0), get_bbox(
+            {'wkt': [crs + 'POLYGON ((11 48, 12 48, 12 49, 11 48))',
+                     'GEOMETRYCOLLECTION (POINT (10.5 48.5), '
+                     'LINESTRING (11 48, 11.5 48.5))']},
+            ['wkt'], True))
+        self.assertIsNone(
+            get_bbox({'wkt': ['POINT EMPTY']}, ['wkt'], True))
+        self.assertEqual((48.0, 11.0, 48.0, 11.0), get_bbox(
+            {'lat': ['48.0'], 'long': ['11.0']}, ['lat', 'long'], False))
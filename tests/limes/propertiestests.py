@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gkgaas.limes.limesprofile import Prefix
+from gkgaas.limes.properties import parse_property, parse_restriction, \
+    load_property_values, write_projection, UnsupportedPropertyDefinition, \
+    PropertyGraph
+
+prefixes = [
+    Prefix(namespace='http://slipo.eu/def#', label='slipo'),
+    Prefix(namespace='http://www.opengis.net/ont/geosparql#', label='geo')]
+
+
+class TestProperties(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'kg.nt')
+
+        with open(self.file_path, 'w') as out_file:
+            out_file.write(
+                '<http://ex.com/a> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://slipo.eu/def#POI> .\n'
+                '<http://ex.com/a> <http://slipo.eu/def#name> _:n1 .\n'
+                '_:n1 <http://slipo.eu/def#nameValue> "Café A"@de .\n'
+                '<http://ex.com/b> <http://slipo.eu/def#name> _:n2 .\n'
+                '_:n2 <http://slipo.eu/def#nameValue> "B" .\n'
+                '<http://ex.com/b> <http://slipo.eu/def#category> <http://ex.com/cat> .\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parse_property(self):
+        prop = parse_property(
+            'slipo:name/slipo:nameValue AS nolang->lowercase RENAME label',
+            prefixes)
+
+        self.assertEqual(
+            ['http://slipo.eu/def#name', 'http://slipo.eu/def#nameValue'],
+            prop.path)
+        self.assertEqual('label', prop.name)
+        self.assertEqual('abc', prop.preprocess('ABC'))
+
+        prop = parse_property(
+            'geo:asWKT AS regexreplace(&lt;http:\\/\\/www\\.opengis\\.net'
+            '\\/def\\/crs(\\/.+)*&gt;, ) RENAME wkt',
+            prefixes)
+        self.assertEqual(
+            ' POINT (1 2)',
+            prop.preprocess(
+                '<http://www.opengis.net/def/crs/EPSG/0/4326> POINT (1 2)'))
+
+        prop = parse_property('slipo:category', prefixes)
+        self.assertEqual('slipo:category', prop.name)
+
+        with self.assertRaises(UnsupportedPropertyDefinition):
+            parse_property('slipo:name AS cleaniri RENAME x', prefixes)
+
+        with self.assertRaises(UnsupportedPropertyDefinition):
+            parse_property('unknown:name', prefixes)
+
+    def test_parse_restriction(self):
+        self.assertEqual(
+            'http://slipo.eu/def#POI',
+            parse_restriction('?x a slipo:POI', prefixes))
+
+        with self.assertRaises(UnsupportedPropertyDefinition):
+            parse_restriction('?x slipo:name ?n .', prefixes)
+
+    def test_load_property_values(self):
+        properties = [
+            parse_property(
+                'slipo:name/slipo:nameValue AS nolang->lowercase RENAME label',
+                prefixes),
+            parse_property('slipo:category RENAME category', prefixes)]
+
+        self.assertEqual(
+            {'http://ex.com/a': {'label': ['café a']},
+             'http://ex.com/b': {'label': ['b'],
+                                 'category': ['http://ex.com/cat']}},
+            load_property_values(self.file_path, properties))
+
+        self.assertEqual(
+            {'http://ex.com/a': {'label': ['café a']}},
+            load_property_values(
+                self.file_path, properties, ['http://slipo.eu/def#POI']))
+
+    def test_resource_order(self):
+        properties = [
+            parse_property('slipo:category RENAME category', prefixes),
+            parse_property('slipo:name/slipo:nameValue RENAME label', prefixes)]
+
+        # first seen order rather than set order
+        for _ in range(3):
+            self.assertEqual(
+                ['<http://ex.com/b>', '<http://ex.com/a>'],
+                PropertyGraph(self.file_path, properties).get_resources())
+
+    def test_write_projection(self):
+        out_file_path = os.path.join(self.tmp_dir, 'projected.nt')
+        properties = [
+            parse_property('slipo:name/slipo:nameValue RENAME label', prefixes)]
+
+        self.assertEqual(
+            1,
+            write_projection(
+                self.file_path,
+                properties,
+                ['http://slipo.eu/def#POI'],
+                out_file_path))
+
+        with open(out_file_path) as in_file:
+            self.assertEqual([
+                '<http://ex.com/a> <http://slipo.eu/def#name> _:n1 .',
+                '_:n1 <http://slipo.eu/def#nameValue> "Café A"@de .',
+                '<http://ex.com/a> '
+                '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type> '
+                '<http://slipo.eu/def#POI> .'],
+                in_file.read().splitlines())
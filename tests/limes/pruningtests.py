@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gkgaas.limes.preconfigs.profiles import \
+    slipo_equi_match_by_name_and_distance, slipo_match_by_name
+from gkgaas.limes.pruning import TargetPruning, get_wkt_bbox, read_extents
+from tests.limes.nativelinkertests import write_pois
+
+
+def write_categories(file_path, categories):
+    with open(file_path, 'a') as out_file:
+        for iri, category in categories:
+            out_file.write(
+                f'<{iri}> <http://slipo.eu/def#category> '
+                f'<http://ex.com/category/{category}> .\n')
+
+
+class TestGetWKTBBox(TestCase):
+    def test_get_wkt_bbox(self):
+        self.assertEqual(
+            (11.0, 48.0, 11.0, 48.0),
+            get_wkt_bbox('<http://www.opengis.net/def/crs/EPSG/0/4326> '
+                         'POINT (11.0 48.0)'))
+        self.assertEqual(
+            (1.0, -2.0, 3.0, 4.0),
+            get_wkt_bbox('POLYGON ((1 -2, 3 -2, 3 4, 1 4, 1 -2))'))
+        self.assertEqual(
+            (1.0, 2.0, 5.0, 6.0),
+            get_wkt_bbox('MULTIPOINT Z ((1 2 9), (5 6 9))'))
+        self.assertIsNone(get_wkt_bbox('POINT EMPTY'))
+
+
+class TestTargetPruning(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.source_file_path = os.path.join(self.tmp_dir, 'source.nt')
+        self.target_file_path = os.path.join(self.tmp_dir, 'target.nt')
+        self.out_file_path = os.path.join(self.tmp_dir, 'pruned.nt')
+
+        write_pois(self.source_file_path, [
+            ('http://ex.com/s1', 'Cafe', 37.0, 25.0),
+            ('http://ex.com/s2', 'Hotel', 37.1, 25.1)])
+        write_categories(
+            self.source_file_path,
+            [('http://ex.com/s1', 'food'), ('http://ex.com/s2', 'hotel')])
+
+        write_pois(self.target_file_path, [
+            ('http://ex.org/t1', 'Cafe', 37.0, 25.0),
+            # ~100m outside the source bounding box
+            ('http://ex.org/t2', 'Hotel', 37.1009, 25.1),
+            ('http://ex.org/t3', 'Museum', 37.05, 25.05),
+            ('http://ex.org/t4', 'Elsewhere', 40.0, 20.0)])
+        write_categories(
+            self.target_file_path,
+            [('http://ex.org/t1', 'food'), ('http://ex.org/t2', 'hotel'),
+             ('http://ex.org/t3', 'museum'), ('http://ex.org/t4', 'food')])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _get_subjects(self):
+        with open(self.out_file_path) as in_file:
+            return sorted(set([line.split()[0] for line in in_file]))
+
+    def test_read_extents(self):
+        pruning = TargetPruning()
+        extents = read_extents(
+            self.source_file_path,
+            pruning.geometry_path,
+            pruning.category_property)
+
+        self.assertEqual(
+            ['<http://ex.com/s1>', '<http://ex.com/s2>'],
+            sorted(extents.keys()))
+        self.assertEqual(
+            (25.0, 37.0, 25.0, 37.0), extents['<http://ex.com/s1>'].bbox)
+        self.assertEqual(
+            {'<http://ex.com/category/food>'},
+            extents['<http://ex.com/s1>'].categories)
+
+    def test_prune(self):
+        # the profile's maximal link distance of 250m covers t2
+        num_kept = TargetPruning().prune(
+            slipo_equi_match_by_name_and_distance,
+            self.source_file_path,
+            self.target_file_path,
+            self.out_file_path)
+
+        self.assertEqual(2, num_kept)
+        self.assertEqual([
+            '<http://ex.org/t1/geom>', '<http://ex.org/t1/name>',
+            '<http://ex.org/t1>', '<http://ex.org/t2/geom>',
+            '<http://ex.org/t2/name>', '<http://ex.org/t2>'],
+            self._get_subjects())
+
+        # no categories
+        TargetPruning(match_categories=False).prune(
+            slipo_equi_match_by_name_and_distance,
+            self.source_file_path,
+            self.target_file_path,
+            self.out_file_path)
+        self.assertIn('<http://ex.org/t3>', self._get_subjects())
+
+    def test_prune_without_distance_bound(self):
+        num_kept = TargetPruning().prune(
+            slipo_match_by_name,
+            self.source_file_path,
+            self.target_file_path,
+            self.out_file_path)
+        self.assertEqual(1, num_kept)
+
+        num_kept = TargetPruning(margin=0.01).prune(
+            slipo_match_by_name,
+            self.source_file_path,
+            self.target_file_path,
+            self.out_file_path)
+        self.assertEqual(2, num_kept)
@@ -0,0 +1,94 @@
+import itertools
+import os
+import random
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gkgaas.limes.resolution import OneToOneResolution
+
+
+def _get_max_matching_score(links):
+    """
+    Brute-forces the sum of scores of a maximum weight matching
+    """
+    best = 0.0
+
+    for num_links in range(1, len(links) + 1):
+        for subset in itertools.combinations(links, num_links):
+            sources = [s for s, _, _ in subset]
+            targets = [t for _, t, _ in subset]
+
+            if len(set(sources)) == len(sources) and \
+                    len(set(targets)) == len(targets):
+                best = max(best, sum([score for _, _, score in subset]))
+
+    return best
+
+
+class TestOneToOneResolution(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # greedy picks s1-t1 and leaves s2 unlinked, exact matching picks
+        # s1-t2 and s2-t1
+        self.links = [
+            ('http://ex.com/s1', 'http://ex.org/t1', 0.95),
+            ('http://ex.com/s1', 'http://ex.org/t2', 0.9),
+            ('http://ex.com/s2', 'http://ex.org/t1', 0.9),
+            ('http://ex.com/s3', 'http://ex.org/t3', 0.8),
+            ('http://ex.com/s3', 'http://ex.org/t4', 0.85)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_resolve_greedily(self):
+        self.assertEqual(
+            [('http://ex.com/s1', 'http://ex.org/t1', 0.95),
+             ('http://ex.com/s3', 'http://ex.org/t4', 0.85)],
+            OneToOneResolution().resolve(self.links))
+
+    def test_resolve_exactly(self):
+        self.assertEqual(
+            [('http://ex.com/s1', 'http://ex.org/t2', 0.9),
+             ('http://ex.com/s2', 'http://ex.org/t1', 0.9),
+             ('http://ex.com/s3', 'http://ex.org/t4', 0.85)],
+            OneToOneResolution(exact=True).resolve(self.links))
+
+        # components exceeding the size limit are resolved greedily
+        self.assertEqual(
+            OneToOneResolution().resolve(self.links),
+            OneToOneResolution(exact=True, max_exact_component_size=3)
+            .resolve(self.links))
+
+        self.assertEqual([], OneToOneResolution(exact=True).resolve([]))
+
+    def test_resolve_exactly_random(self):
+        rnd = random.Random(42)
+
+        for _ in range(50):
+            links = list(set([
+                (f's{rnd.randrange(4)}', f't{rnd.randrange(5)}')
+                for _ in range(rnd.randrange(1, 9))]))
+            links = [(s, t, rnd.choice([0.5, 0.7, 0.9, 1.0]))
+                     for s, t in links]
+
+            resolved = OneToOneResolution(exact=True).resolve(links)
+            self.assertEqual(
+                len(resolved), len(set([s for s, _, _ in resolved])))
+            self.assertEqual(
+                len(resolved), len(set([t for _, t, _ in resolved])))
+            self.assertAlmostEqual(
+                _get_max_matching_score(links),
+                sum([score for _, _, score in resolved]))
+
+    def test_write(self):
+        out_file_path = os.path.join(self.tmp_dir, 'links.csv')
+
+        self.assertEqual(
+            2, OneToOneResolution().write(self.links, out_file_path))
+
+        with open(out_file_path) as in_file:
+            self.assertEqual(
+                'http://ex.com/s1,http://ex.org/t1\n'
+                'http://ex.com/s3,http://ex.org/t4\n',
+                in_file.read())
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.preconfigs.profiles import \
+    slipo_equi_match_by_name_and_distance
+from gkgaas.limes.runner import LIMESRunner
+from gkgaas.limes.scores import ScoredLinks
+from tests.limes.limesrunnertests import fake_limes_script
+
+
+class TestScoredLinks(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.links = ScoredLinks.from_links([
+            ('http://ex.com/s1', 'http://ex.org/t1', 0.97),
+            ('http://ex.com/s1', 'http://ex.org/t2', 0.85),
+            ('http://ex.com/s2', 'http://ex.org/t2', 0.9),
+            # duplicate with lower score
+            ('http://ex.com/s1', 'http://ex.org/t1', 0.9)], 0.8)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_get_links(self):
+        self.assertEqual(3, len(self.links))
+        self.assertEqual(
+            ['http://ex.com/s1', 'http://ex.org/t1', 'http://ex.org/t2',
+             'http://ex.com/s2'],
+            self.links.iris)
+
+        self.assertEqual(
+            [('http://ex.com/s1', 'http://ex.org/t1')],
+            [(s, t) for s, t, _ in self.links.get_links(0.95)])
+        # thresholds are inclusive
+        self.assertEqual(2, len(self.links.get_links(0.9)))
+        self.assertEqual(3, len(self.links.get_links(0.8)))
+        self.assertAlmostEqual(0.97, self.links.get_links(0.95)[0][2], 6)
+
+        with self.assertRaises(ValueError):
+            self.links.get_links(0.7)
+
+    def test_split(self):
+        accepted, review = self.links.split(0.9, 0.85)
+        self.assertEqual(2, len(accepted))
+        self.assertEqual(
+            [('http://ex.com/s1', 'http://ex.org/t2')],
+            [(s, t) for s, t, _ in review])
+
+        accepted, review = self.links.split(0.99, 0.99)
+        self.assertEqual(([], []), (accepted, review))
+
+    def test_save_and_load(self):
+        file_path = os.path.join(self.tmp_dir, 'scores.npz')
+        self.links.save(file_path)
+        loaded = ScoredLinks.load(file_path)
+
+        self.assertEqual(0.8, loaded.min_score)
+        self.assertEqual(self.links.get_links(0.8), loaded.get_links(0.8))
+
+        empty = ScoredLinks.from_links([], 0.5)
+        empty.save(file_path)
+        self.assertEqual([], ScoredLinks.load(file_path).get_links(0.5))
+
+    def test_write(self):
+        links_file_path = os.path.join(self.tmp_dir, 'links.csv')
+        review_file_path = os.path.join(self.tmp_dir, 'review_links.csv')
+
+        self.links.write(
+            0.95, 0.88, links_file_path, review_file_path, LinksFormat.CSV)
+
+        with open(links_file_path) as in_file:
+            self.assertEqual(
+                'http://ex.com/s1,http://ex.org/t1\n', in_file.read())
+
+        with open(review_file_path) as in_file:
+            self.assertEqual(
+                'http://ex.com/s2,http://ex.org/t2\n', in_file.read())
+
+    def test_limes_runner(self):
+        exec_path = os.path.join(self.tmp_dir, 'run_limes.sh')
+        with open(exec_path, 'w') as out_file:
+            out_file.write(fake_limes_script)
+        os.chmod(exec_path, 0o755)
+
+        source_file_path = os.path.join(self.tmp_dir, 'source.nt')
+        with open(source_file_path, 'w') as out_file:
+            out_file.write('<http://ex.com/s1> <http://ex.com/p> "o" .\n')
+
+        scores_file_path = os.path.join(self.tmp_dir, 'scores.npz')
+
+        LIMESRunner(
+            limes_executable_path=exec_path,
+            profile=slipo_equi_match_by_name_and_distance,
+            source_input_file_path=source_file_path,
+            target_input_file_path=source_file_path,
+            result_links_kg_file_path=os.path.join(self.tmp_dir, 'links.nt'),
+            output_dir=self.tmp_dir,
+            scores_file_path=scores_file_path).run()
+
+        accepted, review = ScoredLinks.load(scores_file_path).split(0.9, 0.8)
+        self.assertEqual(
+            [('http://ex.com/s1', 'http://ex.com/t1')],
+            [(s, t) for s, t, _ in accepted])
+        self.assertEqual(
+            [('http://ex.com/s2', 'http://ex.com/t2')],
+            [(s, t) for s, t, _ in review])
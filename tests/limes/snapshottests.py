@@ -0,0 +1,227 @@
+import os
+import shutil
+import stat
+import tempfile
+from unittest import TestCase
+
+from gkgaas.limes.preconfigs.profiles import \
+    slipo_equi_match_by_name_and_distance
+from gkgaas.limes.properties import parse_property
+from gkgaas.limes.runner import LIMESRunner
+from gkgaas.limes.snapshot import LinkingSnapshotStore
+from tests.limes.limesrunnertests import fake_limes_script
+from tests.limes.nativelinkertests import write_pois
+from tests.limes.pruningtests import write_categories
+
+
+class TestLinkingSnapshotStore(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.kg_file_path = os.path.join(self.tmp_dir, 'kg.nt')
+        self.store = LinkingSnapshotStore(
+            os.path.join(self.tmp_dir, 'snapshots'), partition_size=1.0)
+
+        write_pois(self.kg_file_path, [
+            ('http://ex.org/t1', 'Cafe CENTRAL', 37.5, 25.5),
+            ('http://ex.org/t2', 'Hotel', 38.5, 23.5)])
+        write_categories(self.kg_file_path, [('http://ex.org/t1', 'food')])
+
+        with open(self.kg_file_path, 'a') as out_file:
+            out_file.write(
+                '<http://ex.org/t1> <http://slipo.eu/def#phone> "123" .\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _get_snapshot(self):
+        return self.store.get_snapshot(
+            slipo_equi_match_by_name_and_distance, self.kg_file_path)
+
+    @staticmethod
+    def _read_lines(file_path):
+        with open(file_path) as in_file:
+            return in_file.read().splitlines()
+
+    def test_get_snapshot(self):
+        snapshot = self._get_snapshot()
+        lines = self._read_lines(snapshot.file_path)
+
+        self.assertIn(
+            '<http://ex.org/t1/name> <http://slipo.eu/def#nameValue> '
+            '"cafe central" .',
+            lines)
+        self.assertIn(
+            '<http://ex.org/t1> <http://slipo.eu/def#category> '
+            '<http://ex.com/category/food> .',
+            lines)
+        self.assertFalse(any(['phone' in line for line in lines]))
+        self.assertEqual(
+            ['<http://slipo.eu/def#nameValue>'],
+            snapshot.normalized_predicates)
+
+        target = snapshot.get_target_definition(
+            slipo_equi_match_by_name_and_distance.target,
+            slipo_equi_match_by_name_and_distance.prefixes)
+        self.assertEqual(snapshot.file_path, target.endpoint)
+        self.assertIn(
+            'slipo:name/slipo:nameValue RENAME label', target.properties)
+        self.assertIn(
+            'geo:hasGeometry/geo:asWKT RENAME wkt', target.properties)
+
+        # re-used as long as the KG does not change
+        self.assertEqual(
+            snapshot.snapshot_dir, self._get_snapshot().snapshot_dir)
+
+    def test_normalize_keeps_datatype_and_language(self):
+        prefixes = slipo_equi_match_by_name_and_distance.prefixes
+        wkt_literal = \
+            '^^<http://www.opengis.net/ont/geosparql#wktLiteral>'
+
+        self.assertEqual(
+            '"point (1 2)"' + wkt_literal,
+            LinkingSnapshotStore._normalize(
+                parse_property(
+                    'geo:hasGeometry/geo:asWKT AS lowercase RENAME wkt',
+                    prefixes),
+                '"POINT (1 2)"' + wkt_literal))
+
+        name_property = \
+            'slipo:name/slipo:nameValue AS {} RENAME label'
+        self.assertEqual(
+            '"cafe"@en',
+            LinkingSnapshotStore._normalize(
+                parse_property(name_property.format('lowercase'), prefixes),
+                '"Cafe"@en'))
+        self.assertEqual(
+            '"cafe"',
+            LinkingSnapshotStore._normalize(
+                parse_property(
+                    name_property.format('nolang->lowercase'), prefixes),
+                '"Cafe"@en'))
+
+    def test_write_partitions(self):
+        snapshot = self._get_snapshot()
+        self.assertEqual(
+            [[23, 38], [25, 37]],
+            [p['partition'] for p in snapshot.index['partitions']])
+
+        out_file_path = os.path.join(self.tmp_dir, 'partitions.nt')
+        self.assertEqual(
+            1,
+            snapshot.write_partitions((25.0, 37.0, 26.0, 38.0), out_file_path))
+        self.assertEqual(
+            ['<http://ex.org/t1/geom>', '<http://ex.org/t1/name>',
+             '<http://ex.org/t1>'],
+            sorted(set([line.split()[0]
+                        for line in self._read_lines(out_file_path)])))
+
+        self.assertEqual(2, snapshot.write_partitions(None, out_file_path))
+
+    def test_incremental_rebuild(self):
+        snapshot = self._get_snapshot()
+
+        # Dropping a triple from the filtered input triples shows whether a
+        # rebuild re-reads the KG
+        filtered_file_path = \
+            os.path.join(snapshot.snapshot_dir, 'filtered.nt')
+        filtered_lines = self._read_lines(filtered_file_path)
+        with open(filtered_file_path, 'w') as out_file:
+            out_file.writelines([
+                line + '\n' for line in filtered_lines
+                if 'category' not in line])
+
+        with open(self.kg_file_path, 'a') as out_file:
+            out_file.write(
+                '<http://ex.org/t3> <http://slipo.eu/def#category> '
+                '<http://ex.com/category/food> .\n'
+                '<http://ex.org/t3> '
+                '<http://www.opengis.net/ont/geosparql#hasGeometry> '
+                '<http://ex.org/t3/geom> .\n'
+                '<http://ex.org/t3/geom> '
+                '<http://www.opengis.net/ont/geosparql#asWKT> '
+                '"POINT (25.6 37.6)" .\n')
+
+        appended_snapshot = self._get_snapshot()
+        self.assertNotEqual(
+            snapshot.snapshot_dir, appended_snapshot.snapshot_dir)
+
+        lines = self._read_lines(appended_snapshot.file_path)
+        self.assertEqual(
+            ['<http://ex.org/t3>'],
+            [line.split()[0] for line in lines if 'category' in line])
+
+        # not appended, full rebuild
+        write_pois(self.kg_file_path, [
+            ('http://ex.org/t4', 'Bar', 37.5, 25.5)])
+        write_categories(self.kg_file_path, [('http://ex.org/t4', 'food')])
+
+        rebuilt_snapshot = self._get_snapshot()
+        lines = self._read_lines(rebuilt_snapshot.file_path)
+        self.assertEqual(
+            ['<http://ex.org/t4>'],
+            [line.split()[0] for line in lines if 'category' in line])
+
+        # only the current and the previous snapshot are kept
+        self.assertFalse(os.path.exists(snapshot.snapshot_dir))
+        self.assertTrue(os.path.exists(appended_snapshot.snapshot_dir))
+
+    def test_kg_id(self):
+        snapshot = self.store.get_snapshot(
+            slipo_equi_match_by_name_and_distance, self.kg_file_path, 'kg')
+
+        # the next KG version stored at another path
+        next_kg_file_path = os.path.join(self.tmp_dir, 'next_kg.nt')
+        shutil.copyfile(self.kg_file_path, next_kg_file_path)
+        with open(next_kg_file_path, 'a') as out_file:
+            out_file.write(
+                '<http://ex.org/t1> <http://slipo.eu/def#phone> "456" .\n')
+
+        next_snapshot = self.store.get_snapshot(
+            slipo_equi_match_by_name_and_distance, next_kg_file_path, 'kg')
+        self.assertEqual(
+            os.path.dirname(snapshot.snapshot_dir),
+            os.path.dirname(next_snapshot.snapshot_dir))
+
+        write_pois(next_kg_file_path, [
+            ('http://ex.org/t4', 'Bar', 37.5, 25.5)])
+        self.store.get_snapshot(
+            slipo_equi_match_by_name_and_distance, next_kg_file_path, 'kg')
+
+        # older versions of the KG are removed
+        self.assertFalse(os.path.exists(snapshot.snapshot_dir))
+        self.assertEqual(
+            1, len(os.listdir(os.path.join(self.tmp_dir, 'snapshots'))))
+
+    def test_limes_runner(self):
+        exec_path = os.path.join(self.tmp_dir, 'run_limes.sh')
+
+        # additionally keeps the config LIMES got
+        with open(exec_path, 'w') as out_file:
+            out_file.write(
+                fake_limes_script +
+                'cp "$1" "$(dirname "$0")/limes_config.xml"\n')
+        os.chmod(exec_path, os.stat(exec_path).st_mode | stat.S_IXUSR)
+
+        source_file_path = os.path.join(self.tmp_dir, 'source.nt')
+        write_pois(source_file_path, [
+            ('http://ex.com/s1', 'Cafe', 37.5, 25.5)])
+
+        LIMESRunner(
+            limes_executable_path=exec_path,
+            profile=slipo_equi_match_by_name_and_distance,
+            source_input_file_path=source_file_path,
+            target_input_file_path=self.kg_file_path,
+            result_links_kg_file_path=os.path.join(self.tmp_dir, 'links.nt'),
+            output_dir=self.tmp_dir,
+            target_snapshots=self.store).run()
+
+        config = ''.join(
+            self._read_lines(os.path.join(self.tmp_dir, 'limes_config.xml')))
+        target_config = config[config.index('<TARGET>'):]
+
+        self.assertIn(
+            f'<ENDPOINT>{self._get_snapshot().file_path}</ENDPOINT>',
+            target_config)
+        self.assertIn(
+            '<PROPERTY>slipo:name/slipo:nameValue RENAME label</PROPERTY>',
+            target_config)
@@ -0,0 +1,168 @@
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from unittest import TestCase
+
+from gkgaas.fagi import LinksFormat
+from gkgaas.limes.preconfigs.profiles import \
+    slipo_equi_match_by_name_and_distance, slipo_match_by_name
+from gkgaas.limes.runner import LIMESRunner
+from gkgaas.limes.tiling import TiledLIMESRunner
+from tests.limes.nativelinkertests import write_pois, poi_template
+
+# Fake LIMES executable linking all resources of the configured source and
+# target datasets whose closest WKT vertices are at most 250m apart (the
+# maximal distance of the profile's Geo_Hausdorff(x.wkt,y.wkt)|0.8 measure)
+# and logging the number of source resources per call
+fake_limes_script = """#!{python}
+import math
+import os
+import re
+import sys
+
+config = open(sys.argv[1]).read()
+source, target = re.findall('<ENDPOINT>(.*)</ENDPOINT>', config)
+accepted, review = re.findall('<FILE>(.*)</FILE>', config)[:2]
+
+
+def read_geometries(file_path):
+    geometries = {{}}
+    for line in open(file_path):
+        match = re.search(r'^<(.*)/geom> .*> (\\w+ \\(.*\\))"', line)
+        if match is not None:
+            geometries[match.group(1)] = [
+                (float(lat), float(lon)) for lon, lat in
+                re.findall(r'([-0-9.]+) ([-0-9.]+)', match.group(2))]
+    return geometries
+
+
+def point_distance(p1, p2):
+    lat_1, lon_1, lat_2, lon_2 = map(math.radians, p1 + p2)
+    a = math.sin((lat_2 - lat_1) / 2) ** 2 + math.cos(lat_1) * \\
+        math.cos(lat_2) * math.sin((lon_2 - lon_1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+def distance(g1, g2):
+    return min([point_distance(p1, p2) for p1 in g1 for p2 in g2])
+
+
+sources, targets = read_geometries(source), read_geometries(target)
+
+with open(os.path.join(os.path.dirname(sys.argv[0]), 'calls.txt'), 'a') as f:
+    f.write(str(len(sources)) + '\\n')
+
+with open(accepted, 'w') as acc, open(review, 'w') as rev:
+    for s, s_point in sources.items():
+        for t, t_point in targets.items():
+            similarity = 1 / (1 + distance(s_point, t_point))
+            if similarity >= 0.95:
+                acc.write(f'<{{s}}>\\t<{{t}}>\\t{{similarity}}\\n')
+            elif similarity >= 0.8:
+                rev.write(f'<{{s}}>\\t<{{t}}>\\t{{similarity}}\\n')
+"""
+
+
+class TestTiledLIMESRunner(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+        self.exec_path = os.path.join(self.tmp_dir, 'run_limes.py')
+        with open(self.exec_path, 'w') as out_file:
+            out_file.write(fake_limes_script.format(python=sys.executable))
+        os.chmod(self.exec_path, os.stat(self.exec_path).st_mode | stat.S_IXUSR)
+
+        self.source_file_path = os.path.join(self.tmp_dir, 'source.nt')
+        self.target_file_path = os.path.join(self.tmp_dir, 'target.nt')
+
+        # With 0.01 degree tiles s1 and t1 (~15m apart) are in neighbouring
+        # tiles, s2 and s3 share a tile
+        write_pois(self.source_file_path, [
+            ('http://ex.com/s1', 'Cafe', 48.005, 11.0099),
+            ('http://ex.com/s2', 'Hotel', 48.105, 11.105),
+            ('http://ex.com/s3', 'Bar', 48.108, 11.108),
+            ('http://ex.com/s4', 'Far away', 10.0, 10.0)])
+
+        write_pois(self.target_file_path, [
+            ('http://ex.org/t1', 'Cafe', 48.005, 11.0101),
+            # ~100m north of s2
+            ('http://ex.org/t2', 'Hotel', 48.1059, 11.105),
+            ('http://ex.org/t3', 'Bar', 48.108, 11.108),
+            ('http://ex.org/t4', 'Elsewhere', 20.0, 20.0)])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _run(self, runner_cls, name, **kwargs):
+        links_file_path = os.path.join(self.tmp_dir, f'{name}_links.csv')
+        review_file_path = os.path.join(self.tmp_dir, f'{name}_review.csv')
+
+        runner_cls(
+            limes_executable_path=self.exec_path,
+            profile=slipo_equi_match_by_name_and_distance,
+            source_input_file_path=self.source_file_path,
+            target_input_file_path=self.target_file_path,
+            result_links_kg_file_path=links_file_path,
+            output_dir=self.tmp_dir,
+            result_review_links_kg_file_path=review_file_path,
+            links_format=LinksFormat.CSV,
+            **kwargs).run()
+
+        links = []
+
+        for file_path in [links_file_path, review_file_path]:
+            with open(file_path) as in_file:
+                links.append(sorted(in_file.read().splitlines()))
+
+        return links
+
+    def _get_calls(self):
+        with open(os.path.join(self.tmp_dir, 'calls.txt')) as in_file:
+            return sorted([int(line) for line in in_file])
+
+    def test_run(self):
+        accepted, review = self._run(
+            TiledLIMESRunner, 'tiled', tile_size=0.01, max_workers=2)
+
+        self.assertEqual(
+            ['http://ex.com/s1,http://ex.org/t1',
+             'http://ex.com/s3,http://ex.org/t3'],
+            accepted)
+        self.assertEqual(['http://ex.com/s2,http://ex.org/t2'], review)
+
+        # s4 has no target nearby, so its tile is not linked at all
+        self.assertEqual([1, 2], self._get_calls())
+
+        os.remove(os.path.join(self.tmp_dir, 'calls.txt'))
+        self.assertEqual(
+            [accepted, review], self._run(LIMESRunner, 'untiled'))
+
+    def test_run_polygons(self):
+        # With 0.01 degree tiles the polygons span several tiles each and
+        # only their corners at ~30.03, 30.03 are close
+        for file_path, iri, wkt in [
+                (self.source_file_path, 'http://ex.com/s5',
+                 'POLYGON ((30.0 30.0, 30.03 30.0, 30.03 30.03, '
+                 '30.0 30.03, 30.0 30.0))'),
+                (self.target_file_path, 'http://ex.org/t5',
+                 'POLYGON ((30.0302 30.0302, 30.05 30.0302, 30.05 30.05, '
+                 '30.0302 30.05, 30.0302 30.0302))')]:
+            with open(file_path, 'a') as out_file:
+                out_file.write(
+                    poi_template.format(iri=iri, name='Park', lat=0, lon=0)
+                    .replace('POINT (0 0)', wkt))
+
+        untiled = self._run(LIMESRunner, 'untiled')
+        self.assertIn('http://ex.com/s5,http://ex.org/t5', untiled[0])
+
+        self.assertEqual(
+            untiled,
+            self._run(TiledLIMESRunner, 'tiled', tile_size=0.01))
+
+    def test_supports_profile(self):
+        self.assertTrue(TiledLIMESRunner.supports_profile(
+            slipo_equi_match_by_name_and_distance))
+        self.assertFalse(TiledLIMESRunner.supports_profile(
+            slipo_match_by_name))
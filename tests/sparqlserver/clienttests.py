@@ -0,0 +1,126 @@
+import asyncio
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+from unittest import TestCase
+
+from gkgaas.exceptions import SPARQLQueryFailed, SPARQLQueryTimeout
+from gkgaas.sparqlserver.client import SPARQLClient, TSV
+
+json_result = {
+    'head': {'vars': ['s', 'label']},
+    'results': {
+        'bindings': [
+            {'s': {'type': 'uri', 'value': f'http://ex.com/s{i}'},
+             'label': {'type': 'literal', 'value': f'Label {i}'}}
+            for i in range(1000)]
+    }
+}
+
+tsv_result = '?s\t?label\n<http://ex.com/s1>\t"Label 1"\n<http://ex.com/s2>\t\n'
+
+
+class FakeSPARQLEndpoint(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    requests = []
+
+    def setup(self):
+        super().setup()
+        FakeSPARQLEndpoint.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        params = urllib.parse.parse_qs(body.decode('utf-8'))
+        FakeSPARQLEndpoint.requests.append(params)
+        query = params['query'][0]
+
+        if query == 'slow':
+            time.sleep(1)
+
+        if query == 'error':
+            self.send_response(400)
+            result = b'Parse error'
+        elif 'tab-separated' in self.headers['Accept']:
+            self.send_response(200)
+            result = tsv_result.encode('utf-8')
+        else:
+            self.send_response(200)
+            result = json.dumps(json_result, indent=1).encode('utf-8')
+
+        self.send_header('Content-Length', str(len(result)))
+        self.end_headers()
+        self.wfile.write(result)
+
+    def log_message(self, *args):
+        pass
+
+
+class QuietHTTPServer(http.server.ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # e.g. connections closed by the client on timeout
+        pass
+
+
+class TestSPARQLClient(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = QuietHTTPServer(
+            ('localhost', 0), FakeSPARQLEndpoint)
+        cls.url = f'http://localhost:{cls.server.server_port}/kg/sparql'
+
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.client = SPARQLClient(chunk_size=100)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_query(self):
+        self.assertEqual(json_result, self.client.query(self.url, 'q'))
+
+    def test_query_rows(self):
+        with self.client.query_rows(self.url, 'q') as rows:
+            self.assertEqual(['s', 'label'], rows.variables)
+            self.assertEqual(
+                json_result['results']['bindings'][:2], [next(rows), next(rows)])
+
+        with self.client.query_rows(self.url, 'q', result_format=TSV) as rows:
+            self.assertEqual(['s', 'label'], rows.variables)
+            self.assertEqual(
+                [{'s': '<http://ex.com/s1>', 'label': '"Label 1"'},
+                 {'s': '<http://ex.com/s2>'}],
+                list(rows))
+
+    def test_connection_reuse(self):
+        connections = FakeSPARQLEndpoint.connections
+
+        for _ in range(3):
+            self.client.query(self.url, 'q')
+
+        self.assertEqual(connections + 1, FakeSPARQLEndpoint.connections)
+
+    def test_timeout(self):
+        with self.assertRaises(SPARQLQueryTimeout):
+            self.client.query(self.url, 'slow', timeout=0.2)
+
+        # the timeout is passed on to the endpoint in milliseconds
+        self.assertEqual(['200'], FakeSPARQLEndpoint.requests[-1]['timeout'])
+
+    def test_error(self):
+        with self.assertRaises(SPARQLQueryFailed):
+            self.client.query(self.url, 'error')
+
+    def test_aquery_all(self):
+        results = asyncio.run(
+            self.client.aquery_all([(self.url, 'q1'), (self.url, 'q2')]))
+
+        self.assertEqual([json_result, json_result], results)
@@ -0,0 +1,93 @@
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from unittest import TestCase
+
+from gkgaas.exceptions import RunnerExecutionFailed, SPARQLServerNotReady
+from gkgaas.sparqlserver.fusekiwrapper import FusekiWrapper
+from gkgaas.utils.metrics import metrics
+
+# Fake fuseki-server answering /$/ping on the given port after the given
+# delay (simulating the dataset loading)
+fake_fuseki_script = """#!{python}
+import http.server, sys, time
+
+port = int([a for a in sys.argv if a.startswith('--port=')][0][7:])
+time.sleep({delay})
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if self.path == '/$/ping' else 404)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+http.server.HTTPServer(('', port), Handler).serve_forever()
+"""
+
+
+class TestFusekiWrapper(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.exec_path = os.path.join(self.tmp_dir, 'fuseki-server')
+
+        self.rdf_file_path = os.path.join(self.tmp_dir, 'kg.nt')
+        with open(self.rdf_file_path, 'w') as out_file:
+            out_file.write('<http://ex.com/s1> <http://ex.com/p> "o" .\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_fuseki(self, script):
+        with open(self.exec_path, 'w') as out_file:
+            out_file.write(script)
+        os.chmod(self.exec_path, os.stat(self.exec_path).st_mode | stat.S_IXUSR)
+
+    def test_wait_until_ready(self):
+        self._write_fuseki(
+            fake_fuseki_script.format(python=sys.executable, delay=0.3))
+
+        server = FusekiWrapper(self.exec_path, [self.rdf_file_path])
+        server.run()
+
+        try:
+            num_samples = len(metrics.get_samples('fuseki_time_to_ready_seconds'))
+            server.wait_until_ready(timeout=30)
+
+            samples = metrics.get_samples('fuseki_time_to_ready_seconds')
+            self.assertEqual(num_samples + 1, len(samples))
+            self.assertGreaterEqual(samples[-1]['value'], 0.3)
+            self.assertEqual(
+                os.path.getsize(self.rdf_file_path),
+                samples[-1]['dataset_size_bytes'])
+        finally:
+            server.stop()
+
+    def test_wait_until_ready_deadline(self):
+        self._write_fuseki(
+            fake_fuseki_script.format(python=sys.executable, delay=30))
+
+        server = FusekiWrapper(self.exec_path, [self.rdf_file_path])
+        server.run()
+
+        try:
+            with self.assertRaises(SPARQLServerNotReady):
+                server.wait_until_ready(timeout=0.5)
+        finally:
+            server.stop()
+
+    def test_wait_until_ready_process_died(self):
+        self._write_fuseki('#!/bin/sh\nexit 1\n')
+
+        server = FusekiWrapper(self.exec_path, [self.rdf_file_path])
+        server.run()
+
+        with self.assertRaises(RunnerExecutionFailed):
+            server.wait_until_ready(timeout=30)
+
+        server.stop()
@@ -0,0 +1,90 @@
+from unittest import TestCase
+
+from gkgaas.sparqlserver.paging import InvalidQuery, get_paged_query, \
+    encode_cursor, decode_cursor, format_csv_row, get_csv_values, is_ordered
+
+
+class TestPaging(TestCase):
+    def test_get_paged_query(self):
+        query = 'PREFIX ex: <http://ex.com/>\n' \
+                'BASE <http://ex.com/>\n' \
+                'select ?s WHERE { ?s ex:p ?o } LIMIT 100000'
+
+        self.assertEqual(
+            'PREFIX ex: <http://ex.com/>\nBASE <http://ex.com/>\n'
+            'SELECT * WHERE {\n'
+            'select ?s WHERE { ?s ex:p ?o } LIMIT 100000\n'
+            '}\n'
+            'LIMIT 10 OFFSET 20',
+            get_paged_query(query, 10, 20))
+
+    def test_only_select_queries(self):
+        with self.assertRaises(InvalidQuery):
+            get_paged_query('CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }', 10, 0)
+
+    def test_negative_limit_or_offset(self):
+        for limit, offset in [(-1, 0), (10, -10)]:
+            with self.assertRaises(InvalidQuery):
+                get_paged_query('SELECT * WHERE { ?s ?p ?o }', limit, offset)
+
+    def test_dataset_clause(self):
+        for query in [
+                'SELECT * FROM <http://ex.com/g> WHERE { ?s ?p ?o }',
+                'PREFIX ex: <http://ex.com/>\n'
+                'SELECT * from named ex:g WHERE { GRAPH ?g { ?s ?p ?o } }']:
+            with self.assertRaises(InvalidQuery):
+                get_paged_query(query, 10, 0)
+
+        # no dataset clauses
+        get_paged_query(
+            'PREFIX ex: <http://ex.com/>\n'
+            'SELECT ?from WHERE { ?from ex:from "FROM" # FROM\n }', 10, 0)
+
+    def test_is_ordered(self):
+        self.assertTrue(is_ordered(
+            'SELECT ?s WHERE { ?s ?p ?o } order by ?s LIMIT 10'))
+        self.assertTrue(is_ordered(
+            'PREFIX ex: <http://ex.com/>\n'
+            'SELECT ?s WHERE { { SELECT ?s WHERE { ?s ex:p ?o } } }\n'
+            'ORDER BY DESC(?s)'))
+
+        for query in [
+                'SELECT ?s WHERE { ?s ?p ?o }',
+                # only the sub-query is ordered
+                'SELECT ?s WHERE { { SELECT ?s WHERE { ?s ?p ?o } '
+                'ORDER BY ?s } }',
+                'SELECT ?s WHERE { ?s ?p "ORDER BY" } # ORDER BY ?s',
+                'SELECT ?order WHERE { ?s ?p ?order }']:
+            self.assertFalse(is_ordered(query))
+
+    def test_cursor(self):
+        query = 'SELECT ?s WHERE { ?s ?p ?o } ORDER BY ?s'
+        cursor = encode_cursor(query, 200, 100)
+
+        # formatting differences do not matter
+        self.assertEqual(
+            (200, 100),
+            decode_cursor(
+                'SELECT ?s\nWHERE {\n  ?s ?p ?o\n}\nORDER BY ?s', cursor))
+
+        with self.assertRaises(InvalidQuery):
+            decode_cursor('SELECT ?p WHERE { ?s ?p ?o } ORDER BY ?s', cursor)
+
+        with self.assertRaises(InvalidQuery):
+            decode_cursor(query, 'not a cursor')
+
+        # unordered queries have no stable pages
+        unordered_query = 'SELECT ?s WHERE { ?s ?p ?o }'
+        with self.assertRaises(InvalidQuery):
+            decode_cursor(
+                unordered_query, encode_cursor(unordered_query, 200, 100))
+
+    def test_csv(self):
+        row = {
+            's': {'type': 'uri', 'value': 'http://ex.com/s'},
+            'b': {'type': 'bnode', 'value': 'b0'},
+            'l': {'type': 'literal', 'value': 'a, "b"', 'xml:lang': 'en'}}
+
+        self.assertEqual(
+            'http://ex.com/s,_:b0,"a, ""b""",\n',
+            format_csv_row(get_csv_values(row, ['s', 'b', 'l', 'missing'])))
@@ -0,0 +1,200 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from gkgaas.exceptions import SPARQLServerNotReady
+from gkgaas.sparqlserver import SPARQLServer
+from gkgaas.sparqlserver.pool import SPARQLServerPool, \
+    SPARQLServerPoolExhausted
+
+
+class FakeServer(SPARQLServer):
+    def __init__(self, rdf_file_paths):
+        self.rdf_file_paths = rdf_file_paths
+        self.running = False
+
+    def run(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+
+class NeverReadyServer(FakeServer):
+    instances = []
+
+    def __init__(self, rdf_file_paths):
+        super().__init__(rdf_file_paths)
+        NeverReadyServer.instances.append(self)
+
+    def wait_until_ready(self, timeout: float = None):
+        raise SPARQLServerNotReady()
+
+
+class SlowServer(FakeServer):
+    instances = []
+
+    def __init__(self, rdf_file_paths):
+        super().__init__(rdf_file_paths)
+        SlowServer.instances.append(self)
+
+    def wait_until_ready(self, timeout: float = None):
+        if len(self.rdf_file_paths) > 1:
+            time.sleep(0.5)
+
+
+class TestSPARQLServerPool(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_paths = []
+
+        for i in range(3):
+            file_path = os.path.join(self.tmp_dir, f'{i}.nt')
+
+            with open(file_path, 'w') as out_file:
+                out_file.write(f'<http://ex.com/{i}> a <http://ex.com/C> .\n')
+
+            self.file_paths.append(file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_reuse(self):
+        pool = SPARQLServerPool(FakeServer)
+
+        with pool.acquire(self.file_paths[:2]) as server_1:
+            self.assertTrue(server_1.running)
+
+        # same dataset set in different order
+        with pool.acquire(list(reversed(self.file_paths[:2]))) as server_2:
+            self.assertIs(server_1, server_2)
+
+        with pool.acquire(self.file_paths[1:]) as server_3:
+            self.assertIsNot(server_1, server_3)
+
+        pool.close()
+        self.assertFalse(server_1.running)
+        self.assertFalse(server_3.running)
+
+    def test_idle_timeout(self):
+        pool = SPARQLServerPool(FakeServer, idle_timeout=0.1)
+
+        with pool.acquire(self.file_paths[:1]) as server_1:
+            time.sleep(0.2)
+            # in use, hence not evicted
+            self.assertTrue(server_1.running)
+
+        time.sleep(0.2)
+
+        with pool.acquire(self.file_paths[:1]) as server_2:
+            self.assertIsNot(server_1, server_2)
+            self.assertFalse(server_1.running)
+
+        pool.close()
+
+    def test_max_instances(self):
+        pool = SPARQLServerPool(
+            FakeServer, max_instances=1, acquire_timeout=0.1)
+
+        with pool.acquire(self.file_paths[:1]) as server_1:
+            with self.assertRaises(SPARQLServerPoolExhausted):
+                with pool.acquire(self.file_paths[1:2]):
+                    pass
+
+        # server_1 is idle now and gets replaced
+        with pool.acquire(self.file_paths[1:2]) as server_2:
+            self.assertFalse(server_1.running)
+            self.assertTrue(server_2.running)
+
+        pool.close()
+
+    def test_wait_for_idle_server(self):
+        pool = SPARQLServerPool(FakeServer, max_instances=1, acquire_timeout=5)
+        released = threading.Event()
+
+        def use_server():
+            with pool.acquire(self.file_paths[:1]):
+                time.sleep(0.2)
+            released.set()
+
+        thread = threading.Thread(target=use_server)
+        thread.start()
+        time.sleep(0.05)
+
+        with pool.acquire(self.file_paths[1:2]) as server:
+            self.assertTrue(released.is_set())
+            self.assertTrue(server.running)
+
+        thread.join()
+        pool.close()
+
+    def test_changed_file(self):
+        pool = SPARQLServerPool(FakeServer)
+
+        with pool.acquire(self.file_paths[:1]) as server_1:
+            pass
+
+        time.sleep(0.01)
+        with open(self.file_paths[0], 'a') as out_file:
+            out_file.write('<http://ex.com/x> a <http://ex.com/C> .\n')
+
+        with pool.acquire(self.file_paths[:1]) as server_2:
+            self.assertIsNot(server_1, server_2)
+
+        pool.close()
+
+    def test_server_not_ready(self):
+        pool = SPARQLServerPool(NeverReadyServer, ready_timeout=0.1)
+
+        with self.assertRaises(SPARQLServerNotReady):
+            with pool.acquire(self.file_paths[:1]):
+                pass
+
+        self.assertFalse(NeverReadyServer.instances[-1].running)
+
+        # not kept in the pool
+        with self.assertRaises(SPARQLServerNotReady):
+            with pool.acquire(self.file_paths[:1]):
+                pass
+
+        self.assertEqual(2, len(NeverReadyServer.instances))
+
+        pool.close()
+
+    def test_cold_start_does_not_block(self):
+        pool = SPARQLServerPool(SlowServer)
+
+        with pool.acquire(self.file_paths[:1]) as warm_server:
+            pass
+
+        cold_servers = []
+
+        def use_cold_server():
+            with pool.acquire(self.file_paths[1:]) as cold_server:
+                cold_servers.append(cold_server)
+
+        threads = [
+            threading.Thread(target=use_cold_server) for _ in range(2)]
+
+        for thread in threads:
+            thread.start()
+
+        time.sleep(0.1)
+
+        # the warm server is handed out while the other one is starting
+        start = time.monotonic()
+        with pool.acquire(self.file_paths[:1]) as server:
+            self.assertIs(warm_server, server)
+        self.assertLess(time.monotonic() - start, 0.2)
+
+        for thread in threads:
+            thread.join()
+
+        # both users of the cold server got the same one
+        self.assertEqual(2, len(SlowServer.instances))
+        self.assertIs(cold_servers[0], cold_servers[1])
+
+        pool.close()
@@ -0,0 +1,127 @@
+import time
+from unittest import TestCase
+
+from gkgaas.sparqlserver.resultcache import SPARQLResultCache, \
+    CachingResultRows, normalize_query
+from gkgaas.utils.metrics import metrics
+from gkgaas.utils.pidserviceclient import DummyPIDServiceClient
+
+
+class FakeResultRows(object):
+    def __init__(self, variables, rows):
+        self.variables = variables
+        self._rows = iter(rows)
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._rows)
+
+    def close(self):
+        self.closed = True
+
+
+class TestSPARQLResultCache(TestCase):
+    def test_normalize_query(self):
+        self.assertEqual(
+            'SELECT ?s WHERE { ?s <http://ex.com/p> "a  # b" . }',
+            normalize_query(
+                """
+                SELECT ?s  # comment
+                WHERE {
+                  ?s <http://ex.com/p>   "a  # b" .
+                }
+                """))
+
+    def test_get_put(self):
+        cache = SPARQLResultCache()
+        key = cache.get_key('SELECT * WHERE { ?s ?p ?o }', ['v1', 'v2'])
+
+        hits = metrics.get_counter('sparql_result_cache_hits')
+        misses = metrics.get_counter('sparql_result_cache_misses')
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, {'results': {'bindings': []}}, ['/tmp/a.nt'])
+
+        same_key = cache.get_key(
+            'SELECT *\n WHERE {\n ?s ?p ?o\n}', ['v2', 'v1'])
+        self.assertEqual({'results': {'bindings': []}}, cache.get(same_key))
+
+        other_version_key = cache.get_key(
+            'SELECT * WHERE { ?s ?p ?o }', ['v1', 'v3'])
+        self.assertIsNone(cache.get(other_version_key))
+
+        self.assertEqual(
+            hits + 1, metrics.get_counter('sparql_result_cache_hits'))
+        self.assertEqual(
+            misses + 2, metrics.get_counter('sparql_result_cache_misses'))
+
+    def test_lru_eviction(self):
+        cache = SPARQLResultCache(max_entries=2)
+
+        for i in range(3):
+            if i == 2:
+                # makes query 0 the most recently used one
+                cache.get(cache.get_key('q0', []))
+            cache.put(cache.get_key(f'q{i}', []), {'i': i}, [])
+
+        self.assertEqual({'i': 0}, cache.get(cache.get_key('q0', [])))
+        self.assertIsNone(cache.get(cache.get_key('q1', [])))
+        self.assertEqual({'i': 2}, cache.get(cache.get_key('q2', [])))
+
+    def test_ttl(self):
+        cache = SPARQLResultCache(ttl=0.05)
+        key = cache.get_key('q', [])
+        cache.put(key, {}, [])
+
+        time.sleep(0.1)
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(0, len(cache))
+
+    def test_invalidated_on_asset_replacement(self):
+        cache = SPARQLResultCache()
+        pid_service = DummyPIDServiceClient()
+        pid_service.add_asset_replacement_listener(cache.invalidate)
+
+        cache.put(cache.get_key('q1', []), {}, ['/tmp/topio.nt', '/tmp/a.nt'])
+        cache.put(cache.get_key('q2', []), {}, ['/tmp/fused.nt', '/tmp/b.nt'])
+
+        pid_service.register_asset('/tmp/new.nt')
+        self.assertEqual(2, len(cache))
+
+        pid_service.register_asset(
+            '/tmp/fused.nt', replaced_asset_local_id='/tmp/topio.nt')
+
+        self.assertIsNone(cache.get(cache.get_key('q1', [])))
+        self.assertIsNotNone(cache.get(cache.get_key('q2', [])))
+
+    def test_caching_result_rows(self):
+        cache = SPARQLResultCache(max_rows=2)
+        rows = [{'s': {'type': 'uri', 'value': f'http://ex.com/{i}'}}
+                for i in range(3)]
+
+        key = cache.get_key('q1', [])
+        with CachingResultRows(
+                FakeResultRows(['s'], rows[:2]), cache, key, []) as cached:
+            self.assertEqual(['s'], cached.variables)
+            self.assertEqual(rows[:2], list(cached))
+
+        self.assertEqual(
+            {'head': {'vars': ['s']}, 'results': {'bindings': rows[:2]}},
+            cache.get(key))
+
+        # too many rows
+        key = cache.get_key('q2', [])
+        self.assertEqual(rows, list(CachingResultRows(
+            FakeResultRows(['s'], rows), cache, key, [])))
+        self.assertIsNone(cache.get(key))
+
+        # not read completely
+        key = cache.get_key('q3', [])
+        fake_rows = FakeResultRows(['s'], rows[:2])
+        with CachingResultRows(fake_rows, cache, key, []) as cached:
+            next(cached)
+        self.assertTrue(fake_rows.closed)
+        self.assertIsNone(cache.get(key))
@@ -0,0 +1,98 @@
+import os
+import shutil
+import stat
+import tempfile
+import time
+from unittest import TestCase
+
+from gkgaas.exceptions import RunnerExecutionFailed
+from gkgaas.sparqlserver.fusekiwrapper import FusekiWrapper
+from gkgaas.sparqlserver.tdb2 import TDB2DatasetStore
+
+# Fake tdb2.tdbloader copying the loaded files into the database directory
+# and counting its invocations
+fake_loader_script = """#!/bin/sh
+echo x >> "$(dirname "$0")/calls.txt"
+loc=$(echo "$1" | sed 's/--loc=//')
+shift
+cat "$@" > "$loc/data"
+"""
+
+
+class TestTDB2DatasetStore(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+        self.exec_path = os.path.join(self.tmp_dir, 'tdb2.tdbloader')
+        self._write_loader(fake_loader_script)
+
+        self.rdf_file_path = os.path.join(self.tmp_dir, 'kg.nt')
+        self._write_rdf_file('<http://ex.com/s1> <http://ex.com/p> "o" .\n')
+
+        self.store = TDB2DatasetStore(
+            self.exec_path, os.path.join(self.tmp_dir, 'tdb2'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_loader(self, script):
+        with open(self.exec_path, 'w') as out_file:
+            out_file.write(script)
+        os.chmod(self.exec_path, os.stat(self.exec_path).st_mode | stat.S_IXUSR)
+
+    def _write_rdf_file(self, content):
+        with open(self.rdf_file_path, 'w') as out_file:
+            out_file.write(content)
+
+    def _get_num_calls(self):
+        with open(os.path.join(self.tmp_dir, 'calls.txt')) as in_file:
+            return len(in_file.readlines())
+
+    def test_get_dataset_dir_loads_once_per_version(self):
+        dataset_dir = self.store.get_dataset_dir(self.rdf_file_path)
+
+        with open(os.path.join(dataset_dir, 'data')) as in_file:
+            self.assertEqual(
+                '<http://ex.com/s1> <http://ex.com/p> "o" .\n', in_file.read())
+
+        self.assertEqual(dataset_dir, self.store.get_dataset_dir(self.rdf_file_path))
+        self.assertEqual(1, self._get_num_calls())
+
+        # new version of the file
+        time.sleep(0.01)
+        self._write_rdf_file('<http://ex.com/s2> <http://ex.com/p> "o" .\n')
+        new_dataset_dir = self.store.get_dataset_dir(self.rdf_file_path)
+
+        self.assertNotEqual(dataset_dir, new_dataset_dir)
+        self.assertEqual(2, self._get_num_calls())
+        # previous version is kept for servers still running on it
+        self.assertTrue(os.path.isdir(dataset_dir))
+
+        time.sleep(0.01)
+        self._write_rdf_file('<http://ex.com/s3> <http://ex.com/p> "o" .\n')
+        self.store.get_dataset_dir(self.rdf_file_path)
+
+        self.assertFalse(os.path.isdir(dataset_dir))
+        self.assertTrue(os.path.isdir(new_dataset_dir))
+
+    def test_failed_load_leaves_no_dataset(self):
+        self._write_loader('#!/bin/sh\nexit 1\n')
+
+        with self.assertRaises(RunnerExecutionFailed):
+            self.store.get_dataset_dir(self.rdf_file_path)
+
+        file_dir = self.store._get_file_dir(self.rdf_file_path)
+        self.assertEqual([], os.listdir(file_dir))
+
+    def test_assembler_config(self):
+        config_file_path = os.path.join(self.tmp_dir, 'config.ttl')
+        FusekiWrapper._write_assembler_config(
+            ['/data/tdb2/a', '/data/tdb2/b'], config_file_path)
+
+        with open(config_file_path) as in_file:
+            config = in_file.read()
+
+        self.assertIn('fuseki:name "kg"', config)
+        self.assertIn('ja:subModel <#graph0>, <#graph1> .', config)
+        self.assertIn('tdb2:location "/data/tdb2/a"', config)
+        self.assertIn('tdb2:location "/data/tdb2/b"', config)
@@ -0,0 +1,150 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from gkgaas.exceptions import RunnerExecutionFailed, RunnerTimeout, \
+    RunnerCancelled, WrongExecutablePath
+from gkgaas.toolrunner import ToolRunner, get_output_logger, \
+    close_output_logger, run_in_parallel
+
+
+class ScriptRunner(ToolRunner):
+    def __init__(self, exec_path: str, *args: str):
+        super().__init__(exec_path)
+        self.args = list(args)
+
+    def run(self):
+        self._execute([self.exec_path] + self.args)
+
+
+class TestToolRunner(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _mk_script(self, content: str, file_name: str = 'tool.sh') -> str:
+        file_path = os.path.join(self.tmp_dir, file_name)
+
+        with open(file_path, 'w') as out_file:
+            out_file.write('#!/bin/sh\n' + content)
+
+        os.chmod(file_path, os.stat(file_path).st_mode | stat.S_IXUSR)
+
+        return file_path
+
+    def test_wrong_executable_path(self):
+        with self.assertRaises(WrongExecutablePath):
+            ToolRunner(os.path.join(self.tmp_dir, 'does_not_exist.sh'))
+
+    def test_successful_run(self):
+        # arguments are passed as-is, i.e. without shell interpretation
+        exec_path = self._mk_script('echo "$1"\necho done\n')
+        runner = ToolRunner(exec_path)
+
+        result = runner._execute([exec_path, 'a b; echo injected'])
+
+        self.assertEqual('a b; echo injected\ndone', result.output)
+        self.assertEqual(0, result.return_code)
+        self.assertGreater(result.peak_rss, 0)
+        self.assertIs(result, runner.last_result)
+
+    def test_failed_run(self):
+        exec_path = self._mk_script('echo broken\nexit 3\n')
+        runner = ToolRunner(exec_path)
+
+        with self.assertRaises(RunnerExecutionFailed):
+            runner._execute([exec_path])
+
+        self.assertEqual(3, runner.last_result.return_code)
+
+    def test_timeout(self):
+        # the spawned sleep process keeps stdout open, so it has to be killed
+        # as well
+        exec_path = self._mk_script('sleep 30 &\nsleep 30\n')
+        runner = ToolRunner(exec_path, timeout=0.5)
+
+        start = time.monotonic()
+        with self.assertRaises(RunnerTimeout):
+            runner._execute([exec_path])
+
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_cancel(self):
+        exec_path = self._mk_script('sleep 30\n')
+        runner = ToolRunner(exec_path)
+
+        threading.Timer(0.5, runner.cancel).start()
+
+        with self.assertRaises(RunnerCancelled):
+            runner._execute([exec_path])
+
+    def test_memory_limit(self):
+        exec_path = self._mk_script(
+            'exec python3 -c "x = bytearray(512 * 1024 ** 2)"\n')
+        runner = ToolRunner(exec_path, memory_limit=256 * 1024 ** 2)
+
+        with self.assertRaises(RunnerExecutionFailed):
+            runner._execute([exec_path])
+
+        # set on the running tool process without prlimit
+        with patch('gkgaas.toolrunner._prlimit_path', None):
+            with self.assertRaises(RunnerExecutionFailed):
+                runner._execute([exec_path])
+
+        # only the address space is limited
+        exec_path = self._mk_script(
+            'exec python3 -c "x = bytearray(64 * 1024 ** 2)"\n',
+            'small_tool.sh')
+        self.assertEqual(0, runner._execute([exec_path]).return_code)
+
+    def test_output_tail_and_logger(self):
+        exec_path = self._mk_script('seq 1 1000\n')
+        log_file_path = os.path.join(self.tmp_dir, 'tools.log')
+        output_logger = get_output_logger(log_file_path)
+
+        runner = ToolRunner(exec_path, output_logger=output_logger)
+        runner.output_buffer_size = 3
+        result = runner._execute([exec_path])
+        close_output_logger(output_logger)
+
+        self.assertEqual('998\n999\n1000', result.output)
+
+        with open(log_file_path) as in_file:
+            self.assertEqual(1000, len(in_file.readlines()))
+
+    def test_run_in_parallel_slots(self):
+        # every run appends its start and end to the log
+        log_file_path = os.path.join(self.tmp_dir, 'runs.log')
+        exec_path = self._mk_script(
+            f'echo start >> {log_file_path}\nsleep 0.2\n'
+            f'echo end >> {log_file_path}\n')
+
+        run_in_parallel(
+            [ScriptRunner(exec_path) for _ in range(3)],
+            max_workers=3,
+            slots=threading.BoundedSemaphore(1))
+
+        with open(log_file_path) as in_file:
+            self.assertEqual(['start', 'end'] * 3, in_file.read().split())
+
+    def test_run_in_parallel_failure(self):
+        sleeping_path = self._mk_script('sleep 30\n', 'sleeping.sh')
+        failing_path = self._mk_script('sleep 0.5\nexit 3\n', 'failing.sh')
+        runners = [ScriptRunner(sleeping_path), ScriptRunner(failing_path),
+                   ScriptRunner(sleeping_path)]
+
+        start = time.monotonic()
+        with self.assertRaises(RunnerExecutionFailed):
+            run_in_parallel(runners, max_workers=2)
+
+        # the running tool is killed, the pending one is not started
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(-9, runners[0].last_result.return_code)
+        self.assertIsNone(runners[2].process)
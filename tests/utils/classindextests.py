@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from gkgaas.utils.classindex import get_class_index, write_class_index
+from gkgaas.utils.paths import get_class_index_file_path
+
+rdf_type = '<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>'
+
+
+class TestClassIndex(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'kg.nt')
+
+        self._write_kg([
+            f'<http://ex.com/s1> {rdf_type} <http://slipo.eu/def#POI> .',
+            f'<http://ex.com/s2> {rdf_type} <http://slipo.eu/def#POI> .',
+            f'<http://ex.com/s2> {rdf_type} <http://ex.com/Cafe> .',
+            '<http://ex.com/s2> <http://ex.com/p> "x" .'])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_kg(self, lines):
+        with open(self.file_path, 'w') as out_file:
+            out_file.write('\n'.join(lines) + '\n')
+
+    def test_write_class_index(self):
+        class_index = write_class_index(self.file_path)
+
+        expected = {'http://slipo.eu/def#POI': 2, 'http://ex.com/Cafe': 1}
+        self.assertEqual(expected, class_index)
+
+        with open(get_class_index_file_path(self.file_path)) as in_file:
+            self.assertEqual(expected, json.load(in_file)['classes'])
+
+    def test_get_class_index_rebuilds_outdated_index(self):
+        self.assertEqual(
+            {'http://slipo.eu/def#POI': 2, 'http://ex.com/Cafe': 1},
+            get_class_index(self.file_path))
+
+        time.sleep(0.01)
+        self._write_kg(
+            [f'<http://ex.com/s3> {rdf_type} <http://ex.com/Bar> .'])
+
+        self.assertEqual(
+            {'http://ex.com/Bar': 1}, get_class_index(self.file_path))
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            get_class_index(os.path.join(self.tmp_dir, 'missing.nt'))
+
+    def test_read_only_dir(self):
+        # e.g. a read-only KG directory (which root could still write to)
+        with patch('gkgaas.utils.classindex.tempfile.mkstemp',
+                   side_effect=PermissionError('read-only')):
+            expected = {'http://slipo.eu/def#POI': 2, 'http://ex.com/Cafe': 1}
+            self.assertEqual(expected, write_class_index(self.file_path))
+            self.assertEqual(expected, get_class_index(self.file_path))
+
+        self.assertFalse(
+            os.path.exists(get_class_index_file_path(self.file_path)))
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from gkgaas.utils.filecache import FileCache, get_fingerprint, get_file_hash
+
+
+class TestFileCache(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _mk_file(self, name: str, content: str) -> str:
+        file_path = os.path.join(self.tmp_dir, name)
+
+        with open(file_path, 'w') as out_file:
+            out_file.write(content)
+
+        return file_path
+
+    def test_fingerprint(self):
+        self.assertEqual(get_fingerprint('a', 'b'), get_fingerprint('a', 'b'))
+        self.assertNotEqual(
+            get_fingerprint('ab', 'c'), get_fingerprint('a', 'bc'))
+
+    def test_file_hash(self):
+        file_1 = self._mk_file('1.nt', 'abc')
+        file_2 = self._mk_file('2.nt', 'abc')
+        file_3 = self._mk_file('3.nt', 'abd')
+
+        self.assertEqual(get_file_hash(file_1), get_file_hash(file_2))
+        self.assertNotEqual(get_file_hash(file_1), get_file_hash(file_3))
+
+    def test_put_and_get(self):
+        cache = FileCache(self.cache_dir, 1024)
+        file_path = self._mk_file('in.nt', '<a> <b> <c> .')
+        target_file_path = os.path.join(self.tmp_dir, 'out.nt')
+
+        self.assertFalse(cache.get('key', target_file_path))
+        self.assertFalse(os.path.exists(target_file_path))
+
+        cache.put('key', file_path)
+        self.assertTrue(cache.contains('key'))
+        self.assertTrue(cache.get('key', target_file_path))
+
+        with open(target_file_path) as in_file:
+            self.assertEqual('<a> <b> <c> .', in_file.read())
+
+    def test_lru_eviction(self):
+        cache = FileCache(self.cache_dir, 25)
+
+        cache.put('first', self._mk_file('1', 10 * 'a'))
+        time.sleep(0.01)
+        cache.put('second', self._mk_file('2', 10 * 'b'))
+        time.sleep(0.01)
+        # 'first' becomes the most recently used entry
+        cache.get('first', os.path.join(self.tmp_dir, 'restored'))
+        time.sleep(0.01)
+        cache.put('third', self._mk_file('3', 10 * 'c'))
+
+        self.assertTrue(cache.contains('first'))
+        self.assertFalse(cache.contains('second'))
+        self.assertTrue(cache.contains('third'))
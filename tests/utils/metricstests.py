@@ -0,0 +1,30 @@
+from unittest import TestCase
+
+from gkgaas.utils.metrics import Metrics
+
+
+class TestMetrics(TestCase):
+    def test_counters(self):
+        metrics = Metrics()
+
+        metrics.inc('hits')
+        metrics.inc('hits', 2)
+
+        self.assertEqual(3, metrics.get_counter('hits'))
+        self.assertEqual(0, metrics.get_counter('misses'))
+
+    def test_observations(self):
+        metrics = Metrics(max_samples=2)
+
+        metrics.observe('time_to_ready', 1.0, dataset_size_bytes=10)
+        metrics.observe('time_to_ready', 2.0, dataset_size_bytes=20)
+        metrics.observe('time_to_ready', 4.0, dataset_size_bytes=40)
+
+        self.assertEqual(
+            [{'value': 2.0, 'dataset_size_bytes': 20},
+             {'value': 4.0, 'dataset_size_bytes': 40}],
+            metrics.get_samples('time_to_ready'))
+
+        observations = metrics.to_dict()['observations']['time_to_ready']
+        self.assertEqual(3, observations['count'])
+        self.assertEqual(7.0, observations['sum'])
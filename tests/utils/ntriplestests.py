@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gkgaas.utils.ntriples import iter_triples, get_literal_value, get_iri, \
+    get_literal_suffix, format_literal
+
+
+class TestNTriples(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'kg.nt')
+
+        with open(self.file_path, 'w') as out_file:
+            out_file.write(
+                '# comment\n'
+                '<http://ex.com/s1> <http://ex.com/p> <http://ex.com/o> .\n'
+                '\n'
+                '_:b1 <http://ex.com/p> "a . b"@en .\n'
+                '<http://ex.com/s1> <http://ex.com/p> "1"^^<http://www.w3.org/2001/XMLSchema#int>.\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_iter_triples(self):
+        self.assertEqual(
+            [('<http://ex.com/s1>', '<http://ex.com/p>', '<http://ex.com/o>'),
+             ('_:b1', '<http://ex.com/p>', '"a . b"@en'),
+             ('<http://ex.com/s1>', '<http://ex.com/p>',
+              '"1"^^<http://www.w3.org/2001/XMLSchema#int>')],
+            list(iter_triples(self.file_path)))
+
+    def test_terms(self):
+        self.assertEqual('http://ex.com/o', get_iri('<http://ex.com/o>'))
+        self.assertEqual('a . b', get_literal_value('"a . b"@en'))
+        self.assertEqual(
+            '1',
+            get_literal_value('"1"^^<http://www.w3.org/2001/XMLSchema#int>'))
+        self.assertEqual(
+            'Café "Zur Post"\n',
+            get_literal_value('"Caf\\u00E9 \\"Zur Post\\"\\n"'))
+        self.assertEqual('@en', get_literal_suffix('"a "@en'))
+        self.assertEqual('', get_literal_suffix('"a"'))
+        self.assertEqual(
+            '"1"^^<http://www.w3.org/2001/XMLSchema#int>',
+            format_literal(
+                '1', get_literal_suffix(
+                    '"2"^^<http://www.w3.org/2001/XMLSchema#int>')))
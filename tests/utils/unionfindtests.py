@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+import numpy as np
+
+from gkgaas.utils.unionfind import UnionFind
+
+
+class TestUnionFind(TestCase):
+    def test_union(self):
+        sets = UnionFind(6)
+        self.assertEqual(6, len(sets))
+
+        sets.union(0, 1)
+        sets.union(2, 3)
+        sets.union(1, 3)
+
+        self.assertEqual(sets.find(0), sets.find(2))
+        self.assertNotEqual(sets.find(0), sets.find(4))
+        self.assertEqual(sets.find(0), sets.union(3, 0))
+        self.assertEqual(4, sets.sizes[sets.find(0)])
+
+        roots = sets.get_roots().tolist()
+        self.assertEqual(1, len(set(roots[:4])))
+        self.assertEqual([4, 5], roots[4:])
+
+    def test_union_all(self):
+        sets = UnionFind(7)
+        # a chain and a cycle
+        sets.union_all(
+            np.array([0, 1, 2, 4, 5, 6]), np.array([1, 2, 3, 5, 6, 4]))
+
+        roots = sets.get_roots().tolist()
+        self.assertEqual([0, 0, 0, 0, 4, 4, 4], roots)
+        self.assertEqual([4, 0, 0, 0, 3, 0, 0], sets.sizes.tolist())
+        self.assertEqual(0, sets.find(3))